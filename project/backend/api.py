@@ -10,14 +10,14 @@ from datetime import datetime
 from typing import Optional
 from pathlib import Path
 import os
-import uuid
 import asyncio
 
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 from fastapi.responses import JSONResponse
 
 from .database import get_database
-from .scanner import AsyncScanner
+from .scanner import get_scanner
+from .scan_coordinator import get_scan_coordinator
 from .websocket import get_connection_manager
 from .models import (
     ProjectListResponse,
@@ -175,108 +175,45 @@ async def get_project_topics(project_id: int):
 # ========== スキャンAPI ==========
 
 @router.post("/scan", response_model=ScanResponse)
-async def trigger_scan(
-    request: ScanRequest,
-    background_tasks: BackgroundTasks
-):
-    """スキャンをトリガー"""
-    scan_id = f"scan_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+async def trigger_scan(request: ScanRequest):
+    """スキャンをトリガー
 
+    実行中のスキャンがある場合は後続スキャン1回にまとめ、
+    この要求を実際にカバーするスキャンの scan_id を返す。
+    """
     try:
         db = await get_database()
+        # 共有スキャナー（ハッシュキャッシュを再利用）
+        coordinator = get_scan_coordinator(get_scanner(db, DEFAULT_CONTENT_PATH), db)
 
-        # スキャン履歴を作成
-        await db.create_scan_history(
-            scan_id=scan_id,
-            scan_type=request.scan_type,
-            project_id=request.project_id
-        )
-
-        # バックグラウンドでスキャン実行
-        background_tasks.add_task(
-            _run_scan,
-            scan_id,
-            request.project_id,
-            request.scan_type
-        )
-
-        return ScanResponse(
-            status="accepted",
-            scan_id=scan_id,
-            message="スキャンを開始しました"
-        )
-
-    except Exception as e:
-        logger.error(f"Error triggering scan: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-async def _run_scan(
-    scan_id: str,
-    project_id: Optional[int],
-    scan_type: str
-):
-    """バックグラウンドスキャン実行"""
-    db = await get_database()
-    ws = get_connection_manager()
-
-    try:
-        # スキャン開始を通知
-        await ws.broadcast_scan_started(scan_id, project_id, scan_type)
-
-        # スキャナー初期化
-        scanner = AsyncScanner(db, DEFAULT_CONTENT_PATH)
-
-        if project_id:
+        if request.project_id:
             # 単一プロジェクトスキャン
-            project = await db.get_project(project_id)
-            if project:
-                result = await scanner.scan_project(Path(project['path']))
-                results = [result]
-            else:
-                results = []
+            project = await db.get_project(request.project_id)
+            if not project:
+                raise HTTPException(status_code=404, detail="Project not found")
+            ticket = coordinator.request_project_scan(
+                Path(project['path']),
+                project_id=request.project_id,
+                scan_type=request.scan_type
+            )
         else:
             # 全プロジェクトスキャン
-            results = await scanner.scan_all_projects()
-
-        # 結果を集計
-        total_files = sum(r.files_scanned for r in results)
-        total_changes = sum(r.changes_detected for r in results)
-
-        # スキャン履歴を更新
-        await db.update_scan_history(
-            scan_id=scan_id,
-            status="completed",
-            projects_scanned=len(results),
-            files_scanned=total_files,
-            changes_detected=total_changes
-        )
+            ticket = coordinator.request_full_scan(scan_type=request.scan_type)
 
-        # 完了を通知
-        await ws.broadcast_scan_completed(
-            scan_id,
-            {
-                "projects_scanned": len(results),
-                "files_scanned": total_files,
-                "changes_detected": total_changes
-            }
-        )
-
-        # 各プロジェクトの更新を通知
-        for result in results:
-            project = await db.get_project_by_name(result.project_name)
-            if project:
-                await ws.broadcast_project_update(dict(project))
+        if ticket.coalesced:
+            status, message = "coalesced", "待機中のスキャンに統合しました"
+        elif ticket.queued:
+            status, message = "queued", "実行中のスキャン完了後に開始します"
+        else:
+            status, message = "accepted", "スキャンを開始しました"
 
-        logger.info(f"Scan completed: {scan_id}")
+        return ScanResponse(status=status, scan_id=ticket.scan_id, message=message)
 
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Scan error: {e}")
-        await db.update_scan_history(
-            scan_id=scan_id,
-            status="failed",
-            error_message=str(e)
-        )
+        logger.error(f"Error triggering scan: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 # ========== 統計API ==========
@@ -566,12 +503,44 @@ async def update_project_settings(project_id: int, data: ProjectSettingsRequest)
 
 # ========== 公開API ==========
 
+@router.get("/projects/{project_id}/fingerprint")
+async def get_project_fingerprint(project_id: int):
+    """コンテンツフィンガープリントと公開・RAG構築時点からの変更箇所"""
+    try:
+        db = await get_database()
+        status = await db.get_fingerprint_status(project_id)
+        if status is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+
+        return {
+            "project_id": project_id,
+            **status,
+            "changed_subfolders_since_publish": (
+                await db.get_changed_subfolders(project_id, 'published')
+                if status['changed_since_publish'] else []
+            ),
+            "changed_subfolders_since_rag_index": (
+                await db.get_changed_subfolders(project_id, 'rag_indexed')
+                if status['changed_since_rag_index'] else []
+            ),
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting fingerprint for project {project_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/projects/{project_id}/publish")
 async def publish_project(
     project_id: int,
     background_tasks: BackgroundTasks
 ):
-    """プロジェクトのコンテンツをPersonal Video Platformに公開"""
+    """プロジェクトのコンテンツをPersonal Video Platformに公開
+
+    changed_since_publish は前回の公開から成果物ファイルが変わったか（メタデータは含まない参考値、公開は常に行う）。
+    """
     try:
         db = await get_database()
         project = await db.get_project(project_id)
@@ -579,6 +548,8 @@ async def publish_project(
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
 
+        fingerprint = await db.get_fingerprint_status(project_id)
+
         # トピック一覧取得
         topics = await db.get_topics_by_project(project_id)
 
@@ -591,13 +562,15 @@ async def publish_project(
             project_id,
             project['name'],
             project['path'],
-            [dict(t) for t in topics]
+            [dict(t) for t in topics],
+            fingerprint['root_hash']
         )
 
         return {
             "status": "accepted",
             "message": f"「{project['name']}」の公開を開始しました",
-            "total_topics": len(topics)
+            "total_topics": len(topics),
+            "changed_since_publish": fingerprint['changed_since_publish']
         }
 
     except HTTPException:
@@ -611,9 +584,10 @@ async def _run_publish(
     project_id: int,
     project_name: str,
     project_path: str,
-    topics: list
+    topics: list,
+    root_hash: Optional[str] = None
 ):
-    """バックグラウンド公開処理"""
+    """バックグラウンド公開処理（成功時は公開時点のフィンガープリントを記録）"""
     ws = get_connection_manager()
 
     try:
@@ -673,6 +647,10 @@ async def _run_publish(
             }
         )
 
+        # 全件成功した場合のみ公開時点として記録（公開中に内容が変わった場合は記録しない）
+        if result.success and not result.errors:
+            await db.snapshot_fingerprint(project_id, 'published', expected_root_hash=root_hash)
+
         logger.info(
             f"Publish completed: {project_name} - "
             f"{result.uploaded_contents}/{result.total_contents} contents"
@@ -703,6 +681,7 @@ async def get_rag_status(project_id: int):
             raise HTTPException(status_code=404, detail="Project not found")
 
         rag_index = await db.get_rag_index(project_id)
+        fingerprint = await db.get_fingerprint_status(project_id)
 
         # 外部ビルド進捗ファイルを直接読み（最新データ）
         build_progress = None
@@ -724,6 +703,7 @@ async def get_rag_status(project_id: int):
             "project_id": project_id,
             "has_rag_chunks": bool(project.get('has_rag_chunks', 0)),
             "rag_index": rag_index,
+            "content_changed_since_index": bool(rag_index) and fingerprint['changed_since_rag_index'],
             "build_progress": build_progress
         }
     except HTTPException:
@@ -750,12 +730,14 @@ async def build_rag_index(
 
         # ステータスを更新
         await db.upsert_rag_index(project_id=project_id, status='indexing')
+        fingerprint = await db.get_fingerprint_status(project_id)
 
         # バックグラウンドで構築
         background_tasks.add_task(
             _run_rag_build,
             project_id,
-            project['path']
+            project['path'],
+            fingerprint['root_hash']
         )
 
         return {
@@ -795,8 +777,8 @@ async def delete_rag_index(project_id: int):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-async def _run_rag_build(project_id: int, project_path: str):
-    """バックグラウンドRAGインデックス構築"""
+async def _run_rag_build(project_id: int, project_path: str, root_hash: Optional[str] = None):
+    """バックグラウンドRAGインデックス構築（成功時は構築時点のフィンガープリントを記録）"""
     from .rag_service import get_rag_builder
 
     db = await get_database()
@@ -824,6 +806,7 @@ async def _run_rag_build(project_id: int, project_path: str):
                 status='indexed',
                 chunk_count=result["chunk_count"]
             )
+            await db.snapshot_fingerprint(project_id, 'rag_indexed', expected_root_hash=root_hash)
             await ws.broadcast(
                 "rag_build_progress",
                 {
@@ -0,0 +1,138 @@
+"""
+音声メタデータキャッシュ
+パフォーマンス最適化: MP3ヘッダー解析（TinyTag）は新規・変更された音声のみ
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from tinytag import TinyTag
+
+logger = logging.getLogger(__name__)
+
+MAX_AUDIO_CACHE_SIZE = 50000
+
+
+@dataclass(frozen=True)
+class AudioMetadata:
+    """MP3メタデータ（解析失敗時は全て0）"""
+    duration_ms: int = 0
+    bitrate: int = 0
+    sample_rate: int = 0
+    channels: int = 0
+
+    @classmethod
+    def from_row(cls, row: Dict) -> Optional["AudioMetadata"]:
+        """トピック行から復元（未解析の行は None）"""
+        if row.get('mp3_sample_rate') is None:
+            return None
+        return cls(
+            duration_ms=row.get('mp3_duration_ms') or 0,
+            bitrate=row.get('mp3_bitrate') or 0,
+            sample_rate=row.get('mp3_sample_rate') or 0,
+            channels=row.get('mp3_channels') or 0,
+        )
+
+    def as_tuple(self) -> Tuple[int, int, int, int]:
+        return (self.duration_ms, self.bitrate, self.sample_rate, self.channels)
+
+
+def read_audio_metadata(path: Path) -> AudioMetadata:
+    """TinyTagでMP3ヘッダーを解析（ブロッキング）"""
+    try:
+        tag = TinyTag.get(str(path))
+    except Exception as e:
+        logger.debug(f"Could not read MP3 metadata for {path}: {e}")
+        return AudioMetadata()
+    return AudioMetadata(
+        duration_ms=int(tag.duration * 1000) if tag.duration else 0,
+        bitrate=int(tag.bitrate) if tag.bitrate else 0,
+        sample_rate=int(tag.samplerate) if tag.samplerate else 0,
+        channels=int(tag.channels) if tag.channels else 0,
+    )
+
+
+class AudioMetadataCache:
+    """MP3コンテンツハッシュ → メタデータのLRUキャッシュ（スレッドセーフ）
+
+    同一内容の音声はパスやトピックが変わっても再解析しない。
+    SQLite の audio_metadata テーブルへ更新分のみ永続化する。
+    """
+
+    def __init__(self, max_size: int = MAX_AUDIO_CACHE_SIZE):
+        self._cache: OrderedDict[str, AudioMetadata] = OrderedDict()
+        self._dirty: Dict[str, AudioMetadata] = {}
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    def get(self, content_hash: str) -> Optional[AudioMetadata]:
+        """キャッシュ取得（LRU順を更新）"""
+        with self._lock:
+            meta = self._cache.get(content_hash)
+            if meta is None:
+                self._misses += 1
+                return None
+            self._cache.move_to_end(content_hash)
+            self._hits += 1
+            return meta
+
+    def set(self, content_hash: str, meta: AudioMetadata, persist: bool = True) -> None:
+        """キャッシュ設定（persist=False は永続化対象にしない）"""
+        with self._lock:
+            if self._cache.get(content_hash) == meta:
+                self._cache.move_to_end(content_hash)
+                return
+            self._cache[content_hash] = meta
+            self._cache.move_to_end(content_hash)
+            if persist:
+                self._dirty[content_hash] = meta
+            while len(self._cache) > self._max_size:
+                self._cache.popitem(last=False)
+
+    def load(self, entries: List[Tuple[str, int, int, int, int]]) -> None:
+        """永続化済みエントリを読み込み（古い順）"""
+        with self._lock:
+            for content_hash, *values in entries:
+                self._cache[content_hash] = AudioMetadata(*values)
+                self._cache.move_to_end(content_hash)
+            while len(self._cache) > self._max_size:
+                self._cache.popitem(last=False)
+
+    def drain_dirty(self) -> List[Tuple[str, int, int, int, int]]:
+        """未永続化エントリを LRU の古い順に取り出してクリア（追い出し済みのエントリが先頭）"""
+        with self._lock:
+            if not self._dirty:
+                return []
+            entries = [
+                (h, *meta.as_tuple()) for h, meta in self._dirty.items() if h not in self._cache
+            ]
+            entries.extend(
+                (h, *self._dirty[h].as_tuple()) for h in self._cache if h in self._dirty
+            )
+            self._dirty.clear()
+            return entries
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'size': len(self._cache),
+                'hits': self._hits,
+                'misses': self._misses,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._dirty.clear()
+            self._hits = 0
+            self._misses = 0
@@ -0,0 +1,409 @@
+"""
+スキャナー・ウォッチャーのベンチマーク
+合成コンテンツツリーを生成して各種計測を行う
+
+Usage:
+    python -m backend.benchmarks loop-lag [--projects N] [--topics N]
+    python -m backend.benchmarks hash [--files N] [--size-mb N]
+    python -m backend.benchmarks shards [--projects N] [--topics N] [--workers 1,2,4,8]
+    python -m backend.benchmarks prune [--projects N] [--topics N] [--changed N]
+    python -m backend.benchmarks memory [--projects N] [--topics N]
+    python -m backend.benchmarks watch-burst [--events N] [--seconds N] [--interval-ms N] [--batch-interval-ms N]
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiofiles
+
+from .database import Database
+from .file_events import FileEvent
+from .hashing import HASH_ALGORITHMS, HashEngine, HashStrategy
+from .perf import LoopLagMonitor
+from .scanner import AsyncScanner, TopicScan
+from .watcher import DebounceBuffer
+
+
+def make_synthetic_tree(
+    root: Path,
+    projects: int = 10,
+    topics_per_project: int = 100,
+    mp3_bytes: int = 256 * 1024,
+    subfolders: tuple = ('', 'intro', 'advanced'),
+) -> int:
+    """合成コンテンツツリーを生成（戻り値: 生成ファイル数）"""
+    file_count = 0
+    mp3_payload = os.urandom(min(mp3_bytes, 1024 * 1024))
+    for p in range(projects):
+        content = root / f"course_{p:03d}" / "content"
+        for i in range(topics_per_project):
+            subfolder = subfolders[i % len(subfolders)]
+            folder = content / subfolder if subfolder else content
+            folder.mkdir(parents=True, exist_ok=True)
+            base = f"{i // 10 + 1:02d}-{i % 10 + 1:02d}_topic{i}"
+            (folder / f"{base}.html").write_text(f"<h1>{base}</h1>" * 50, encoding='utf-8')
+            (folder / f"{base}.txt").write_text(f"{base} script " * 200, encoding='utf-8')
+            with open(folder / f"{base}.mp3", 'wb') as f:
+                remaining = mp3_bytes
+                while remaining > 0:
+                    chunk = mp3_payload[:remaining]
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            file_count += 3
+    return file_count
+
+
+async def bench_loop_lag(projects: int, topics: int) -> Dict[str, Any]:
+    """フルスキャン中のイベントループ遅延を計測（初回・再スキャン）"""
+    tmp = Path(tempfile.mkdtemp(prefix="scan_bench_"))
+    try:
+        root = tmp / "content_root"
+        files = make_synthetic_tree(root, projects, topics)
+        db = Database(tmp / "bench.db")
+        await db.connect()
+        await db.init_tables()
+        try:
+            scanner = AsyncScanner(db, root)
+            results = {'files': files}
+            for label in ('initial', 'rescan'):
+                start = time.perf_counter()
+                async with LoopLagMonitor() as lag:
+                    await scanner.scan_all_projects()
+                results[label] = {
+                    'wall_ms': round((time.perf_counter() - start) * 1000, 1),
+                    **lag.summary(),
+                }
+            return results
+        finally:
+            await db.disconnect()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def bench_hash_throughput(files: int, size_mb: int) -> Dict[str, Any]:
+    """ハッシュ戦略ごとのスループット（MB/s）を計測"""
+    tmp = Path(tempfile.mkdtemp(prefix="hash_bench_"))
+    try:
+        payload = os.urandom(1024 * 1024)
+        paths = []
+        for i in range(files):
+            path = tmp / f"{i:03d}.mp3"
+            with open(path, 'wb') as f:
+                for _ in range(size_mb):
+                    f.write(payload)
+            paths.append(path)
+        total_mb = files * size_mb
+
+        results: Dict[str, Any] = {'files': files, 'size_mb': size_mb}
+
+        async def aiofiles_baseline() -> None:
+            # 旧実装: aiofiles で 64KB ずつ読み込み（チャンクごとにスレッドホップ）
+            for path in paths:
+                hasher = HASH_ALGORITHMS['xxh64']()
+                async with aiofiles.open(path, 'rb') as f:
+                    while chunk := await f.read(65536):
+                        hasher.update(chunk)
+
+        start = time.perf_counter()
+        asyncio.run(aiofiles_baseline())
+        results['aiofiles_64k'] = round(total_mb / (time.perf_counter() - start), 1)
+
+        for algorithm in HASH_ALGORITHMS:
+            for mode in ('full', 'mmap', 'sampled'):
+                engine = HashEngine(default=HashStrategy(algorithm, mode))
+                start = time.perf_counter()
+                for path in paths:
+                    engine.hash_file(path)
+                elapsed = time.perf_counter() - start
+                results[f"{algorithm}:{mode}"] = round(total_mb / elapsed, 1)
+        return results
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+async def bench_sharded_scan(projects: int, topics: int, workers: List[int]) -> Dict[str, Any]:
+    """プロセス数ごとの初回フルスキャン時間（毎回新しいDB・キャッシュ）"""
+    tmp = Path(tempfile.mkdtemp(prefix="shard_bench_"))
+    try:
+        root = tmp / "content_root"
+        results: Dict[str, Any] = {
+            'files': make_synthetic_tree(root, projects, topics),
+            'cpus': os.cpu_count(),
+        }
+        for count in workers:
+            db = Database(tmp / f"bench_{count}.db")
+            await db.connect()
+            await db.init_tables()
+            scanner = AsyncScanner(db, root)
+            try:
+                start = time.perf_counter()
+                # 1 = 従来の単一プロセススキャン
+                await scanner.scan_all_projects(process_workers=count if count > 1 else 0)
+                results[f"workers_{count}_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            finally:
+                scanner.close()
+                await db.disconnect()
+        return results
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _backdate_tree(root: Path, seconds: int = 3600) -> None:
+    """ツリー全体の mtime を過去にずらす（作成直後の mtime は枝刈りで信用されないため）"""
+    past = time.time() - seconds
+    for dir_path, _, file_names in os.walk(root):
+        for name in file_names:
+            os.utime(os.path.join(dir_path, name), (past, past))
+        os.utime(dir_path, (past, past))
+
+
+async def bench_dir_pruning(projects: int, topics: int, changed: int) -> Dict[str, Any]:
+    """ディレクトリ mtime 枝刈りの有無による再スキャン時間（changed 件のプロジェクトにファイル追加）"""
+    tmp = Path(tempfile.mkdtemp(prefix="prune_bench_"))
+    try:
+        root = tmp / "content_root"
+        results: Dict[str, Any] = {'files': make_synthetic_tree(root, projects, topics)}
+        _backdate_tree(root)
+        db = Database(tmp / "bench.db")
+        await db.connect()
+        await db.init_tables()
+        scanner = AsyncScanner(db, root)
+        try:
+            async def timed(label: str, pruning: bool) -> None:
+                scanner.dir_pruning = pruning
+                start = time.perf_counter()
+                scan_results = await scanner.scan_all_projects()
+                results[label] = {
+                    'wall_ms': round((time.perf_counter() - start) * 1000, 1),
+                    'skipped': sum(1 for r in scan_results if r.skipped),
+                }
+
+            await timed('initial', True)
+            await timed('rescan_unpruned', False)
+            await timed('rescan_pruned', True)
+            for p in range(changed):
+                new_file = root / f"course_{p:03d}" / "content" / "intro" / "99-99_new.html"
+                new_file.write_text("<h1>new</h1>", encoding='utf-8')
+                _backdate_tree(root / f"course_{p:03d}", seconds=60)
+            await timed('rescan_pruned_changed', True)
+            return results
+        finally:
+            scanner.close()
+            await db.disconnect()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+@contextmanager
+def _traced(label: str, results: Dict[str, Any]):
+    """tracemalloc で区間のピーク・残存メモリ（KB）を記録"""
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[label] = {'peak_kb': peak // 1024, 'retained_kb': current // 1024}
+
+
+async def bench_scan_memory(projects: int, topics: int) -> Dict[str, Any]:
+    """スキャン結果のメモリ使用量（tracemalloc）
+
+    - records_*: トピック数分の結果レコード（dict と slotted TopicScan）
+    - scan_*: 全プロジェクトの paranoid スキャン（トピックごとの結果を保持する / 集計値のみ）
+    """
+    tmp = Path(tempfile.mkdtemp(prefix="memory_bench_"))
+    try:
+        root = tmp / "content_root"
+        results: Dict[str, Any] = {
+            'files': make_synthetic_tree(root, projects, topics, mp3_bytes=1024),
+            'topics': projects * topics,
+        }
+
+        sample = TopicScan(
+            base_name='01-01_topic', topic_id='01-01', chapter='', title='01-01_topic', subfolder='intro',
+            has_html=True, has_txt=True, has_mp3=True, html_hash='0' * 16, txt_hash='1' * 16,
+            mp3_hash='2' * 16, html_sig='1:2:3', txt_sig='1:2:3', mp3_sig='1:2:3', mp3_duration_ms=1000,
+        )
+        with _traced('records_dict', results):
+            records = [dict(sample.as_dict(), base_name=f"{i:05d}") for i in range(projects * topics)]
+        del records
+        with _traced('records_slotted', results):
+            records = [
+                TopicScan(**dict(sample.as_dict(), base_name=f"{i:05d}")) for i in range(projects * topics)
+            ]
+        del records
+
+        project_dirs = sorted(p for p in root.iterdir() if p.is_dir())
+        for keep_topics in (True, False):
+            # 条件を揃えるため毎回新しいDB・キャッシュ
+            label = 'scan_detailed' if keep_topics else 'scan_aggregate'
+            db = Database(tmp / f"{label}.db")
+            await db.connect()
+            await db.init_tables()
+            scanner = AsyncScanner(db, root)
+            try:
+                with _traced(label, results):
+                    start = time.perf_counter()
+                    scan_results = [
+                        await scanner.scan_project(path, paranoid=True, keep_topics=keep_topics)
+                        for path in project_dirs
+                    ]
+                    results[f"{label}_ms"] = round((time.perf_counter() - start) * 1000, 1)
+                del scan_results
+            finally:
+                scanner.close()
+                await db.disconnect()
+        return results
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _submit_events(
+    buffer: DebounceBuffer,
+    events: List[FileEvent],
+    interval: float,
+    extra: Optional[Tuple[int, FileEvent]] = None
+) -> Tuple[float, float]:
+    """watchdog スレッド相当の別スレッドからイベントを投入
+
+    extra=(i, event) の場合は i 件目の直後に event も投入する。
+    Returns:
+        (投入にかかった秒数, extra を投入した時刻)
+    """
+    start = time.perf_counter()
+    extra_at = 0.0
+    for i, event in enumerate(events):
+        if interval and i:
+            time.sleep(interval)
+        buffer.submit(event)
+        if extra is not None and i == extra[0]:
+            buffer.submit(extra[1])
+            extra_at = time.perf_counter()
+    return time.perf_counter() - start, extra_at
+
+
+def _course_of(event: FileEvent) -> List[Tuple[str, FileEvent]]:
+    """/bench/<course>/... のパスからキーを取り出す（MultiProjectWatcher の振り分け相当）"""
+    return [(event.path.split('/')[2], event)]
+
+
+async def bench_watcher_burst(events: int, seconds: float, interval_ms: float, batch_interval_ms: float) -> Dict[str, Any]:
+    """ウォッチャーのイベント取り込み（DebounceBuffer）
+
+    - burst: 別スレッドから events 件を一気に投入（git checkout / rsync 相当）
+    - sustained: interval_ms ごとに seconds 秒投入し続ける（静穏期間が来ない連続書き込み）
+    - edit_during_batch: 1コースに batch_interval_ms ごとに書き込む一括生成の途中で、
+      別コースを1回編集（適応デバウンス / 固定デバウンスの比較）
+    """
+    loop = asyncio.get_running_loop()
+    results: Dict[str, Any] = {}
+    batch_count = max(2, int(seconds * 1000 / batch_interval_ms))
+    scenarios = (
+        ('burst', events, 0.0, {}),
+        ('sustained', max(1, int(seconds * 1000 / interval_ms)), interval_ms / 1000, {}),
+        ('edit_during_batch', batch_count, batch_interval_ms / 1000, {}),
+        ('edit_during_batch_fixed', batch_count, batch_interval_ms / 1000, {'max_delay_ms': 0}),
+    )
+    for label, count, interval, options in scenarios:
+        edit = FileEvent('modified', "/bench/edited/content/01-01_topic.html")
+        extra = (count // 2, edit) if label.startswith('edit') else None
+        total = count + (extra is not None)
+        flushes: List[Tuple[float, str, int]] = []
+        done = asyncio.Event()
+
+        async def callback(key: str, batch: List[FileEvent]) -> None:
+            flushes.append((time.perf_counter(), key, len(batch)))
+            if sum(size for _, _, size in flushes) >= total:
+                done.set()
+
+        buffer = DebounceBuffer(partition=_course_of, **options)
+        buffer.set_callback(callback, loop)
+        buffer.start()
+        batch = [FileEvent('modified', f"/bench/course/content/{i:06d}_topic.html") for i in range(count)]
+        try:
+            async with LoopLagMonitor() as lag:
+                start = time.perf_counter()
+                submit_s, edit_at = await asyncio.to_thread(_submit_events, buffer, batch, interval, extra)
+                await asyncio.wait_for(done.wait(), timeout=buffer.max_delay_seconds * 8 + 5)
+        finally:
+            await buffer.stop()
+
+        # 最初のイベントから各フラッシュまでの間隔の最大値（最大遅延の確認）
+        course_times = [start] + [t for t, key, _ in flushes if key == 'course']
+        results[label] = {
+            'events': count,
+            'submit_us_per_event': round(submit_s / count * 1e6, 2),
+            'flushes': len(course_times) - 1,
+            'max_flush_gap_ms': round(max(b - a for a, b in zip(course_times, course_times[1:])) * 1000, 1),
+            'last_event_to_flush_ms': round((course_times[-1] - start - submit_s) * 1000, 1),
+            'wakeups': buffer.stats()['wakeups'],
+            **lag.summary(),
+        }
+        if extra is not None:
+            edit_flush = next(t for t, key, _ in flushes if key == 'edited')
+            results[label]['edit_latency_ms'] = round((edit_flush - edit_at) * 1000, 1)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Scanner benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    lag = sub.add_parser("loop-lag", help="event loop lag during a full scan")
+    lag.add_argument("--projects", type=int, default=10)
+    lag.add_argument("--topics", type=int, default=100)
+
+    hash_ = sub.add_parser("hash", help="file hashing throughput per strategy")
+    hash_.add_argument("--files", type=int, default=20)
+    hash_.add_argument("--size-mb", type=int, default=16)
+
+    shards = sub.add_parser("shards", help="sharded full scan across process counts")
+    shards.add_argument("--projects", type=int, default=40)
+    shards.add_argument("--topics", type=int, default=50)
+    shards.add_argument("--workers", default="1,2,4,8")
+
+    prune = sub.add_parser("prune", help="rescan with and without directory-mtime pruning")
+    prune.add_argument("--projects", type=int, default=120)
+    prune.add_argument("--topics", type=int, default=60)
+    prune.add_argument("--changed", type=int, default=3)
+
+    memory = sub.add_parser("memory", help="tracemalloc of scan records and a paranoid full scan")
+    memory.add_argument("--projects", type=int, default=100)
+    memory.add_argument("--topics", type=int, default=500)
+
+    burst = sub.add_parser("watch-burst", help="watcher event ingestion under a burst and sustained writes")
+    burst.add_argument("--events", type=int, default=5000)
+    burst.add_argument("--seconds", type=float, default=3.0)
+    burst.add_argument("--interval-ms", type=float, default=20.0)
+    burst.add_argument("--batch-interval-ms", type=float, default=250.0)
+
+    args = parser.parse_args()
+
+    if args.command == "loop-lag":
+        print(asyncio.run(bench_loop_lag(args.projects, args.topics)))
+    elif args.command == "hash":
+        print(bench_hash_throughput(args.files, args.size_mb))
+    elif args.command == "shards":
+        workers = [int(w) for w in args.workers.split(',')]
+        print(asyncio.run(bench_sharded_scan(args.projects, args.topics, workers)))
+    elif args.command == "prune":
+        print(asyncio.run(bench_dir_pruning(args.projects, args.topics, args.changed)))
+    elif args.command == "memory":
+        print(asyncio.run(bench_scan_memory(args.projects, args.topics)))
+    elif args.command == "watch-burst":
+        print(asyncio.run(bench_watcher_burst(
+            args.events, args.seconds, args.interval_ms, args.batch_interval_ms
+        )))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,16 +5,137 @@
 
 import aiosqlite
 import asyncio
+import os
 from pathlib import Path
 from typing import Optional, List, Dict, Any, Tuple
 from contextlib import asynccontextmanager
 import logging
 
+from .filename_grammar import topic_sort_key
+from .fingerprint import FINGERPRINT_SCOPES, changed_subfolders, root_hash, subfolder_hashes, topic_content_hash
+
 logger = logging.getLogger(__name__)
 
 # デフォルトデータベースパス
 DEFAULT_DB_PATH = Path(__file__).parent.parent / "data" / "progress_tracker.db"
 
+# トピックの追跡対象フィールド
+# 内容フィールド: 変更時のみ updated_at を更新（変更マーカーとして利用可能）
+_TOPIC_CONTENT_FIELDS = (
+    'has_html', 'has_txt', 'has_mp3', 'has_ssml',
+    'html_hash', 'txt_hash', 'mp3_hash', 'ssml_hash',
+    'mp3_duration_ms', 'mp3_bitrate', 'mp3_sample_rate', 'mp3_channels',
+)
+# WBS由来フィールド: NULL の場合は既存値を維持（COALESCE）
+_TOPIC_META_FIELDS = ('topic_id', 'chapter', 'title')
+# stat シグネチャ: 変更されても内容変更とはみなさない
+_TOPIC_SIG_FIELDS = ('html_sig', 'txt_sig', 'mp3_sig', 'ssml_sig')
+# スキャン・差分判定で読む列（SELECT * の全列を辞書化しない）
+_TOPIC_STATE_COLUMNS = ", ".join(
+    ('id', 'base_name', 'subfolder') + _TOPIC_CONTENT_FIELDS + _TOPIC_META_FIELDS + _TOPIC_SIG_FIELDS
+)
+
+_TOPIC_CHANGED_SQL = " OR ".join(
+    [f"topics.{f} IS NOT excluded.{f}" for f in _TOPIC_CONTENT_FIELDS]
+    + [f"(excluded.{f} IS NOT NULL AND topics.{f} IS NOT excluded.{f})" for f in _TOPIC_META_FIELDS]
+)
+
+# トピックUPSERT（upsert_topic / bulk_upsert_topics 共通）
+# 追跡対象フィールドがすべて同じ行は書き込まない
+_TOPIC_UPSERT_SQL = f"""
+    INSERT INTO topics (
+        project_id, base_name, topic_id, chapter, title, subfolder,
+        has_html, has_txt, has_mp3, has_ssml, html_hash, txt_hash, mp3_hash, ssml_hash,
+        mp3_duration_ms, html_sig, txt_sig, mp3_sig, ssml_sig,
+        mp3_bitrate, mp3_sample_rate, mp3_channels, content_hash, sort_key
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(project_id, base_name, subfolder) DO UPDATE SET
+        topic_id = COALESCE(excluded.topic_id, topic_id),
+        chapter = COALESCE(excluded.chapter, chapter),
+        title = COALESCE(excluded.title, title),
+        has_html = excluded.has_html,
+        has_txt = excluded.has_txt,
+        has_mp3 = excluded.has_mp3,
+        has_ssml = excluded.has_ssml,
+        html_hash = excluded.html_hash,
+        txt_hash = excluded.txt_hash,
+        mp3_hash = excluded.mp3_hash,
+        ssml_hash = excluded.ssml_hash,
+        mp3_duration_ms = excluded.mp3_duration_ms,
+        html_sig = excluded.html_sig,
+        txt_sig = excluded.txt_sig,
+        mp3_sig = excluded.mp3_sig,
+        ssml_sig = excluded.ssml_sig,
+        mp3_bitrate = excluded.mp3_bitrate,
+        mp3_sample_rate = excluded.mp3_sample_rate,
+        mp3_channels = excluded.mp3_channels,
+        content_hash = excluded.content_hash,
+        updated_at = CASE WHEN {_TOPIC_CHANGED_SQL}
+            THEN datetime('now') ELSE topics.updated_at END
+    WHERE {_TOPIC_CHANGED_SQL}
+        OR {" OR ".join(f"topics.{f} IS NOT excluded.{f}" for f in _TOPIC_SIG_FIELDS)}
+"""
+
+# stat シグネチャのみ変わった行の更新（updated_at は変更しない）
+_TOPIC_SIG_UPDATE_SQL = f"""
+    UPDATE topics SET {", ".join(f"{f} = ?" for f in _TOPIC_SIG_FIELDS)}
+    WHERE id = ?
+"""
+
+# プロジェクト削除時に合わせて削除する子テーブル（外部キー制約は無効のため明示的に削除）
+_PROJECT_CHILD_TABLES = (
+    'topics', 'project_dir_mtimes', 'subfolder_fingerprints', 'rag_indexes', 'scan_history',
+)
+
+
+def _topic_params(project_id: int, topic: Dict[str, Any]) -> Tuple:
+    """トピック辞書を _TOPIC_UPSERT_SQL のパラメータに変換"""
+    return (
+        project_id, topic['base_name'], topic.get('topic_id'), topic.get('chapter'),
+        topic.get('title'), topic.get('subfolder') or "",
+        int(bool(topic.get('has_html'))), int(bool(topic.get('has_txt'))),
+        int(bool(topic.get('has_mp3'))), int(bool(topic.get('has_ssml'))),
+        topic.get('html_hash'), topic.get('txt_hash'), topic.get('mp3_hash'), topic.get('ssml_hash'),
+        topic.get('mp3_duration_ms') or 0,
+        topic.get('html_sig'), topic.get('txt_sig'), topic.get('mp3_sig'), topic.get('ssml_sig'),
+        topic.get('mp3_bitrate'), topic.get('mp3_sample_rate'), topic.get('mp3_channels'),
+        topic_content_hash(topic),
+        topic_sort_key(topic['base_name'], topic.get('subfolder')),
+    )
+
+
+def _classify_topic_change(existing: Optional[Dict[str, Any]], topic: Dict[str, Any]) -> str:
+    """既存行との差分を分類
+
+    Returns:
+        'inserted' / 'updated'（内容変更）/ 'sig'（stat シグネチャのみ変更）/ 'unchanged'
+    """
+    if existing is None:
+        return 'inserted'
+    for f in _TOPIC_CONTENT_FIELDS:
+        new, old = topic.get(f), existing.get(f)
+        if f.startswith('has_'):
+            new, old = int(bool(new)), int(bool(old))
+        elif f == 'mp3_duration_ms':
+            new, old = new or 0, old or 0
+        if new != old:
+            return 'updated'
+    for f in _TOPIC_META_FIELDS:
+        new = topic.get(f)
+        if new is not None and new != existing.get(f):
+            return 'updated'
+    for f in _TOPIC_SIG_FIELDS:
+        if topic.get(f) != existing.get(f):
+            return 'sig'
+    return 'unchanged'
+
+
+def _path_prefix_range(dir_path: str) -> Tuple[str, str]:
+    """dir_path 配下のパスに一致する範囲 [下限, 上限)（区切り文字の次のコードポイントで閉じる）"""
+    prefix = dir_path.rstrip(os.sep) + os.sep
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
 
 class Database:
     """非同期SQLiteデータベース管理クラス（パフォーマンス最適化版）"""
@@ -191,7 +312,16 @@ class Database:
                     txt_hash TEXT,
                     mp3_hash TEXT,
                     ssml_hash TEXT,
+                    html_sig TEXT,
+                    txt_sig TEXT,
+                    mp3_sig TEXT,
+                    ssml_sig TEXT,
                     mp3_duration_ms INTEGER DEFAULT 0,
+                    mp3_bitrate INTEGER,
+                    mp3_sample_rate INTEGER,
+                    mp3_channels INTEGER,
+                    content_hash TEXT,
+                    sort_key TEXT,
                     updated_at TEXT DEFAULT (datetime('now')),
                     UNIQUE(project_id, base_name, subfolder)
                 )
@@ -226,10 +356,59 @@ class Database:
                     generation_model TEXT DEFAULT 'gemini-2.5-flash',
                     index_built_at TEXT,
                     error_message TEXT,
+                    build_phase TEXT,
+                    build_message TEXT,
+                    build_percent INTEGER,
                     created_at TEXT DEFAULT (datetime('now')),
                     updated_at TEXT DEFAULT (datetime('now'))
                 )
             """)
+            await self._migrate_rag_indexes_table()
+
+            # file_hashes テーブル（スキャナーのハッシュキャッシュ永続化）
+            await self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS file_hashes (
+                    path TEXT PRIMARY KEY,
+                    hash TEXT NOT NULL,
+                    sig TEXT,
+                    updated_at TEXT DEFAULT (datetime('now'))
+                )
+            """)
+
+            # audio_metadata テーブル（MP3コンテンツハッシュ → メタデータ）
+            await self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS audio_metadata (
+                    hash TEXT PRIMARY KEY,
+                    duration_ms INTEGER DEFAULT 0,
+                    bitrate INTEGER DEFAULT 0,
+                    sample_rate INTEGER DEFAULT 0,
+                    channels INTEGER DEFAULT 0,
+                    updated_at TEXT DEFAULT (datetime('now'))
+                )
+            """)
+
+            # project_dir_mtimes テーブル（未変更プロジェクト・サブフォルダの枝刈り用）
+            await self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS project_dir_mtimes (
+                    project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+                    subfolder TEXT NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    PRIMARY KEY (project_id, subfolder)
+                )
+            """)
+
+            # subfolder_fingerprints テーブル（サブフォルダ単位のコンテンツハッシュ）
+            # scope: current = 最新スキャン、published / rag_indexed = 公開・RAG構築時点のスナップショット
+            await self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS subfolder_fingerprints (
+                    project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+                    scope TEXT NOT NULL CHECK(scope IN ('current', 'published', 'rag_indexed')),
+                    subfolder TEXT NOT NULL,
+                    hash TEXT NOT NULL,
+                    topic_count INTEGER DEFAULT 0,
+                    PRIMARY KEY (project_id, scope, subfolder)
+                )
+            """)
 
             # インデックス作成（パフォーマンス最適化）
             await self._connection.execute(
@@ -238,8 +417,10 @@ class Database:
             await self._connection.execute(
                 "CREATE INDEX IF NOT EXISTS idx_projects_updated ON projects(updated_at)"
             )
+            # 一覧は (project_id, sort_key) のインデックス順で返す（project_id 単独のインデックスは不要）
+            await self._connection.execute("DROP INDEX IF EXISTS idx_topics_project")
             await self._connection.execute(
-                "CREATE INDEX IF NOT EXISTS idx_topics_project ON topics(project_id)"
+                "CREATE INDEX IF NOT EXISTS idx_topics_project_sort ON topics(project_id, sort_key)"
             )
             await self._connection.execute(
                 "CREATE INDEX IF NOT EXISTS idx_topics_base_name ON topics(project_id, base_name)"
@@ -253,6 +434,15 @@ class Database:
             await self._connection.execute(
                 "CREATE INDEX IF NOT EXISTS idx_rag_indexes_project ON rag_indexes(project_id)"
             )
+            await self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_file_hashes_updated ON file_hashes(updated_at)"
+            )
+            await self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_audio_metadata_updated ON audio_metadata(updated_at)"
+            )
+
+            # フィンガープリント未計算のプロジェクトを計算（マイグレーション直後のみ）
+            await self._backfill_fingerprints()
 
             logger.info("Database tables initialized with optimized indexes")
 
@@ -331,9 +521,43 @@ class Database:
             )
             logger.info("Added has_rag_chunks column to projects table")
 
+        # last_scan_duration_ms カラム（スキャンスケジューラーのコスト見積もり用）
+        if 'last_scan_duration_ms' not in columns:
+            await self._connection.execute(
+                "ALTER TABLE projects ADD COLUMN last_scan_duration_ms INTEGER"
+            )
+            logger.info("Added last_scan_duration_ms column to projects table")
+
+        # コンテンツフィンガープリントのルートハッシュ（最新・公開時点・RAG構築時点）
+        for hash_col in ('root_hash', 'published_root_hash', 'rag_indexed_root_hash'):
+            if hash_col not in columns:
+                await self._connection.execute(
+                    f"ALTER TABLE projects ADD COLUMN {hash_col} TEXT"
+                )
+                logger.info(f"Added {hash_col} column to projects table")
+
+        # WBS.json / rag_chunks.json の stat シグネチャ（ディレクトリ mtime 枝刈り用）
+        for sig_col in ('wbs_sig', 'rag_chunks_sig'):
+            if sig_col not in columns:
+                await self._connection.execute(
+                    f"ALTER TABLE projects ADD COLUMN {sig_col} TEXT"
+                )
+                logger.info(f"Added {sig_col} column to projects table")
+
         # topicsテーブルのマイグレーション（UNIQUE制約の変更を含む）
         await self._migrate_topics_table()
 
+    async def _migrate_rag_indexes_table(self) -> None:
+        """既存のrag_indexesテーブルに外部ビルド進捗カラムを追加（マイグレーション）"""
+        cursor = await self._connection.execute("PRAGMA table_info(rag_indexes)")
+        columns = [row[1] for row in await cursor.fetchall()]
+        for col, col_type in (('build_phase', 'TEXT'), ('build_message', 'TEXT'), ('build_percent', 'INTEGER')):
+            if col not in columns:
+                await self._connection.execute(
+                    f"ALTER TABLE rag_indexes ADD COLUMN {col} {col_type}"
+                )
+                logger.info(f"Added {col} column to rag_indexes table")
+
     async def _migrate_topics_table(self) -> None:
         """topicsテーブルのマイグレーション（UNIQUE制約変更対応）"""
         # テーブルが存在するか確認
@@ -403,6 +627,49 @@ class Database:
             )
             logger.info("Added mp3_duration_ms column to topics table")
 
+        # ファイル stat シグネチャ（size:mtime_ns:inode）カラムが存在しない場合は追加
+        for sig_col in ('html_sig', 'txt_sig', 'mp3_sig', 'ssml_sig'):
+            if sig_col not in topic_cols:
+                await self._connection.execute(
+                    f"ALTER TABLE topics ADD COLUMN {sig_col} TEXT"
+                )
+                logger.info(f"Added {sig_col} column to topics table")
+
+        # MP3メタデータカラム（NULL = 未解析）が存在しない場合は追加
+        for meta_col in ('mp3_bitrate', 'mp3_sample_rate', 'mp3_channels'):
+            if meta_col not in topic_cols:
+                await self._connection.execute(
+                    f"ALTER TABLE topics ADD COLUMN {meta_col} INTEGER"
+                )
+                logger.info(f"Added {meta_col} column to topics table")
+
+        # トピックのコンテンツハッシュ（成果物ハッシュから計算、Merkle ツリーの葉）
+        if 'content_hash' not in topic_cols:
+            await self._connection.execute(
+                "ALTER TABLE topics ADD COLUMN content_hash TEXT"
+            )
+            cursor = await self._connection.execute(
+                "SELECT id, html_hash, txt_hash, mp3_hash, ssml_hash FROM topics"
+            )
+            await self._connection.executemany(
+                "UPDATE topics SET content_hash = ? WHERE id = ?",
+                [(topic_content_hash(dict(row)), row['id']) for row in await cursor.fetchall()]
+            )
+            logger.info("Added content_hash column to topics table")
+
+        # 表示順のソートキー（レベル→章→話、filename_grammar で計算）
+        if 'sort_key' not in topic_cols:
+            await self._connection.execute(
+                "ALTER TABLE topics ADD COLUMN sort_key TEXT"
+            )
+            cursor = await self._connection.execute("SELECT id, base_name, subfolder FROM topics")
+            await self._connection.executemany(
+                "UPDATE topics SET sort_key = ? WHERE id = ?",
+                [(topic_sort_key(row['base_name'], row['subfolder']), row['id'])
+                 for row in await cursor.fetchall()]
+            )
+            logger.info("Added sort_key column to topics table")
+
     # ========== 納品先マスター操作 ==========
 
     async def get_all_destinations(self) -> List[Dict[str, Any]]:
@@ -679,6 +946,89 @@ class Database:
         rows = await cursor.fetchall()
         return [dict(row) for row in rows]
 
+    async def get_project_scan_costs(self) -> Dict[str, Tuple[int, Optional[int]]]:
+        """プロジェクトパス → (total_topics, last_scan_duration_ms)（スキャン順序の見積もり用）"""
+        cursor = await self._connection.execute(
+            "SELECT path, total_topics, last_scan_duration_ms FROM projects"
+        )
+        rows = await cursor.fetchall()
+        return {
+            row['path']: (row['total_topics'] or 0, row['last_scan_duration_ms'])
+            for row in rows
+        }
+
+    async def get_project_dir_states(self, path: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """プロジェクトパス → 前回スキャン時のディレクトリ状態と統計（path 指定時はその1件のみ）
+
+        Returns:
+            {path: {'id', 'name', 統計値..., 'wbs_sig', 'rag_chunks_sig', 'dirs': {subfolder: mtime_ns}}}
+        """
+        where, params = ("WHERE path = ?", (path,)) if path is not None else ("", ())
+        cursor = await self._connection.execute(f"""
+            SELECT id, name, path, total_topics, completed_topics, html_count, txt_count,
+                   mp3_count, mp3_total_duration_ms, wbs_sig, rag_chunks_sig
+            FROM projects {where}
+        """, params)
+        states = {}
+        by_id = {}
+        for row in await cursor.fetchall():
+            state = dict(row)
+            state['dirs'] = {}
+            states[row['path']] = by_id[row['id']] = state
+        if not states:
+            return states
+
+        if path is not None:
+            cursor = await self._connection.execute(
+                "SELECT project_id, subfolder, mtime_ns FROM project_dir_mtimes WHERE project_id = ?",
+                (next(iter(by_id)),)
+            )
+        else:
+            cursor = await self._connection.execute(
+                "SELECT project_id, subfolder, mtime_ns FROM project_dir_mtimes"
+            )
+        for row in await cursor.fetchall():
+            state = by_id.get(row['project_id'])
+            if state is not None:
+                state['dirs'][row['subfolder']] = row['mtime_ns']
+        return states
+
+    async def save_project_dir_state(self, project_id: int, dir_state: Dict[str, Any]) -> None:
+        """ディレクトリ状態を保存（ProjectDirState.settled() の値）"""
+        async with self._lock:
+            await self._connection.execute("BEGIN")
+            try:
+                await self._save_project_dir_state_locked(project_id, dir_state)
+                await self._connection.execute("COMMIT")
+            except Exception:
+                await self._connection.execute("ROLLBACK")
+                raise
+
+    async def _save_project_dir_state_locked(self, project_id: int, dir_state: Dict[str, Any]) -> None:
+        """ディレクトリ状態を保存（呼び出し元が _lock を保持しトランザクションを管理）"""
+        await self._connection.execute(
+            "DELETE FROM project_dir_mtimes WHERE project_id = ?", (project_id,)
+        )
+        await self._connection.executemany(
+            "INSERT INTO project_dir_mtimes (project_id, subfolder, mtime_ns) VALUES (?, ?, ?)",
+            [(project_id, sub, mtime) for sub, mtime in dir_state['dirs'].items()]
+        )
+        await self._connection.execute(
+            "UPDATE projects SET wbs_sig = ?, rag_chunks_sig = ? WHERE id = ?",
+            (dir_state['wbs_sig'], dir_state['rag_chunks_sig'], project_id)
+        )
+
+    async def mark_projects_scanned(self, project_ids: List[int]) -> None:
+        """変更なしと判定したプロジェクトのスキャン日時のみ更新（1文）"""
+        if not project_ids:
+            return
+        placeholders = ','.join('?' * len(project_ids))
+        async with self._lock:
+            await self._connection.execute(
+                f"UPDATE projects SET last_scanned_at = datetime('now') WHERE id IN ({placeholders})",
+                project_ids
+            )
+
     async def get_project(self, project_id: int) -> Optional[Dict[str, Any]]:
         """プロジェクト単体取得（納品先・音声変換エンジン・公開状態・チェック進捗名・RAG情報含む）"""
         cursor = await self._connection.execute("""
@@ -714,17 +1064,32 @@ class Database:
     async def upsert_project(self, name: str, path: str, wbs_format: Optional[str] = None) -> int:
         """プロジェクトをUPSERT"""
         async with self._lock:
-            cursor = await self._connection.execute("""
-                INSERT INTO projects (name, path, wbs_format)
-                VALUES (?, ?, ?)
-                ON CONFLICT(name) DO UPDATE SET
-                    path = excluded.path,
-                    wbs_format = COALESCE(excluded.wbs_format, wbs_format),
-                    updated_at = datetime('now')
-                RETURNING id
-            """, (name, path, wbs_format))
+            return await self._upsert_project_locked(name, path, wbs_format)
+
+    async def _upsert_project_locked(self, name: str, path: str, wbs_format: Optional[str] = None) -> int:
+        """プロジェクトをUPSERT（呼び出し元が _lock を保持）
+
+        path・wbs_format が変わらない場合は書き込まない（updated_at も更新しない）。
+        """
+        cursor = await self._connection.execute("""
+            INSERT INTO projects (name, path, wbs_format)
+            VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                path = excluded.path,
+                wbs_format = COALESCE(excluded.wbs_format, projects.wbs_format),
+                updated_at = datetime('now')
+            WHERE projects.path IS NOT excluded.path
+                OR projects.wbs_format IS NOT COALESCE(excluded.wbs_format, projects.wbs_format)
+            RETURNING id
+        """, (name, path, wbs_format))
+        row = await cursor.fetchone()
+        if row is None:
+            # 変更なし（RETURNING は更新しなかった行を返さない）
+            cursor = await self._connection.execute(
+                "SELECT id FROM projects WHERE name = ?", (name,)
+            )
             row = await cursor.fetchone()
-            return row[0]
+        return row[0]
 
     async def update_project_stats(
         self,
@@ -734,18 +1099,78 @@ class Database:
         html_count: int,
         txt_count: int,
         mp3_count: int,
-        mp3_total_duration_ms: int = 0
+        mp3_total_duration_ms: int = 0,
+        last_scan_duration_ms: Optional[int] = None
     ) -> None:
         """プロジェクト統計を更新"""
         async with self._lock:
+            await self._update_project_stats_locked(
+                project_id, total_topics, completed_topics, html_count,
+                txt_count, mp3_count, mp3_total_duration_ms, last_scan_duration_ms
+            )
+
+    async def _update_project_stats_locked(
+        self,
+        project_id: int,
+        total_topics: int,
+        completed_topics: int,
+        html_count: int,
+        txt_count: int,
+        mp3_count: int,
+        mp3_total_duration_ms: int = 0,
+        last_scan_duration_ms: Optional[int] = None
+    ) -> None:
+        """プロジェクト統計を更新（呼び出し元が _lock を保持）
+
+        last_scanned_at は常に更新し、updated_at は統計値が変わった場合のみ更新する。
+        """
+        stats = (total_topics, completed_topics, html_count, txt_count, mp3_count, mp3_total_duration_ms)
+        await self._connection.execute("""
+            UPDATE projects SET
+                updated_at = CASE WHEN
+                    total_topics IS NOT ? OR completed_topics IS NOT ? OR
+                    html_count IS NOT ? OR txt_count IS NOT ? OR mp3_count IS NOT ? OR
+                    mp3_total_duration_ms IS NOT ?
+                    THEN datetime('now') ELSE updated_at END,
+                total_topics = ?,
+                completed_topics = ?,
+                html_count = ?,
+                txt_count = ?,
+                mp3_count = ?,
+                mp3_total_duration_ms = ?,
+                last_scan_duration_ms = COALESCE(?, last_scan_duration_ms),
+                last_scanned_at = datetime('now')
+            WHERE id = ?
+        """, (*stats, *stats, last_scan_duration_ms, project_id))
+
+    async def apply_project_stats_delta(
+        self,
+        project_id: int,
+        total_topics: int = 0,
+        completed_topics: int = 0,
+        html_count: int = 0,
+        txt_count: int = 0,
+        mp3_count: int = 0,
+        mp3_total_duration_ms: int = 0
+    ) -> None:
+        """プロジェクト統計を差分で更新（インクリメンタルスキャン用）"""
+        deltas = (total_topics, completed_topics, html_count, txt_count, mp3_count, mp3_total_duration_ms)
+        async with self._lock:
+            if not any(deltas):
+                # 統計値に変化なし: スキャン日時のみ更新
+                await self._connection.execute(
+                    "UPDATE projects SET last_scanned_at = datetime('now') WHERE id = ?",
+                    (project_id,)
+                )
+                return
             await self._connection.execute("""
                 UPDATE projects SET
-                    total_topics = ?,
-                    completed_topics = ?,
-                    html_count = ?,
-                    txt_count = ?,
-                    mp3_count = ?,
-                    mp3_total_duration_ms = ?,
+                    total_topics = MAX(total_topics + ?, 0),
+                    completed_topics = MAX(completed_topics + ?, 0),
+                    html_count = MAX(html_count + ?, 0),
+                    txt_count = MAX(txt_count + ?, 0),
+                    mp3_count = MAX(mp3_count + ?, 0),
+                    mp3_total_duration_ms = MAX(COALESCE(mp3_total_duration_ms, 0) + ?, 0),
                     last_scanned_at = datetime('now'),
                     updated_at = datetime('now')
                 WHERE id = ?
@@ -775,29 +1200,56 @@ class Database:
             return True
 
     async def delete_project(self, project_id: int) -> bool:
-        """プロジェクトを削除（関連トピックも削除）"""
+        """プロジェクトを削除（関連トピック等も削除）"""
+        return await self.delete_projects([project_id]) > 0
+
+    async def delete_projects(self, project_ids: List[int]) -> int:
+        """複数プロジェクトを関連行（トピック・スキャン履歴・RAG等）ごと1トランザクションで削除"""
+        if not project_ids:
+            return 0
+        placeholders = ','.join('?' * len(project_ids))
         async with self._lock:
-            # トピックを先に削除（ON DELETE CASCADEがあるが明示的に）
-            await self._connection.execute(
-                "DELETE FROM topics WHERE project_id = ?",
-                (project_id,)
-            )
-            # プロジェクトを削除
-            await self._connection.execute(
-                "DELETE FROM projects WHERE id = ?",
-                (project_id,)
-            )
-            logger.info(f"Deleted project id={project_id}")
-            return True
+            await self._connection.execute("BEGIN")
+            try:
+                for table in _PROJECT_CHILD_TABLES:
+                    await self._connection.execute(
+                        f"DELETE FROM {table} WHERE project_id IN ({placeholders})",
+                        project_ids
+                    )
+                # プロジェクト配下のハッシュキャッシュ（パスの前方一致を主キーの範囲検索で削除）
+                path_cursor = await self._connection.execute(
+                    f"SELECT path FROM projects WHERE id IN ({placeholders})",
+                    project_ids
+                )
+                await self._connection.executemany(
+                    "DELETE FROM file_hashes WHERE path >= ? AND path < ?",
+                    [_path_prefix_range(row['path']) for row in await path_cursor.fetchall()]
+                )
+                cursor = await self._connection.execute(
+                    f"DELETE FROM projects WHERE id IN ({placeholders})",
+                    project_ids
+                )
+                await self._connection.execute("COMMIT")
+            except Exception:
+                await self._connection.execute("ROLLBACK")
+                raise
+        logger.info(f"Deleted {cursor.rowcount} projects: ids={project_ids}")
+        return cursor.rowcount
+
+    async def get_project_paths(self) -> List[Dict[str, Any]]:
+        """全プロジェクトの id・名前・パス（集計の JOIN なし）"""
+        cursor = await self._connection.execute("SELECT id, name, path FROM projects ORDER BY id")
+        rows = await cursor.fetchall()
+        return [dict(row) for row in rows]
 
     # ========== トピック操作 ==========
 
     async def get_topics_by_project(self, project_id: int) -> List[Dict[str, Any]]:
-        """プロジェクトのトピック一覧取得"""
+        """プロジェクトのトピック一覧取得（レベル→章→話の順、idx_topics_project_sort を使用）"""
         cursor = await self._connection.execute("""
             SELECT * FROM topics
             WHERE project_id = ?
-            ORDER BY subfolder, base_name
+            ORDER BY sort_key
         """, (project_id,))
         rows = await cursor.fetchall()
         return [dict(row) for row in rows]
@@ -818,39 +1270,39 @@ class Database:
         txt_hash: Optional[str] = None,
         mp3_hash: Optional[str] = None,
         ssml_hash: Optional[str] = None,
-        mp3_duration_ms: int = 0
+        mp3_duration_ms: int = 0,
+        html_sig: Optional[str] = None,
+        txt_sig: Optional[str] = None,
+        mp3_sig: Optional[str] = None,
+        ssml_sig: Optional[str] = None,
+        mp3_bitrate: Optional[int] = None,
+        mp3_sample_rate: Optional[int] = None,
+        mp3_channels: Optional[int] = None
     ) -> int:
         """トピックをUPSERT"""
+        params = _topic_params(project_id, {
+            'base_name': base_name, 'topic_id': topic_id, 'chapter': chapter, 'title': title,
+            'subfolder': subfolder, 'has_html': has_html, 'has_txt': has_txt,
+            'has_mp3': has_mp3, 'has_ssml': has_ssml, 'html_hash': html_hash,
+            'txt_hash': txt_hash, 'mp3_hash': mp3_hash, 'ssml_hash': ssml_hash,
+            'mp3_duration_ms': mp3_duration_ms, 'html_sig': html_sig, 'txt_sig': txt_sig,
+            'mp3_sig': mp3_sig, 'ssml_sig': ssml_sig, 'mp3_bitrate': mp3_bitrate,
+            'mp3_sample_rate': mp3_sample_rate, 'mp3_channels': mp3_channels,
+        })
         async with self._lock:
-            cursor = await self._connection.execute("""
-                INSERT INTO topics (
-                    project_id, base_name, topic_id, chapter, title, subfolder,
-                    has_html, has_txt, has_mp3, has_ssml, html_hash, txt_hash, mp3_hash, ssml_hash,
-                    mp3_duration_ms
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(project_id, base_name, subfolder) DO UPDATE SET
-                    topic_id = COALESCE(excluded.topic_id, topic_id),
-                    chapter = COALESCE(excluded.chapter, chapter),
-                    title = COALESCE(excluded.title, title),
-                    has_html = excluded.has_html,
-                    has_txt = excluded.has_txt,
-                    has_mp3 = excluded.has_mp3,
-                    has_ssml = excluded.has_ssml,
-                    html_hash = excluded.html_hash,
-                    txt_hash = excluded.txt_hash,
-                    mp3_hash = excluded.mp3_hash,
-                    ssml_hash = excluded.ssml_hash,
-                    mp3_duration_ms = excluded.mp3_duration_ms,
-                    updated_at = datetime('now')
-                RETURNING id
-            """, (
-                project_id, base_name, topic_id, chapter, title, subfolder or "",
-                int(has_html), int(has_txt), int(has_mp3), int(has_ssml),
-                html_hash, txt_hash, mp3_hash, ssml_hash,
-                mp3_duration_ms
-            ))
+            cursor = await self._connection.execute(
+                _TOPIC_UPSERT_SQL + " RETURNING id", params
+            )
             row = await cursor.fetchone()
+            if row is None:
+                # 変更なしで書き込みをスキップした場合
+                cursor = await self._connection.execute("""
+                    SELECT id FROM topics
+                    WHERE project_id = ? AND base_name = ? AND COALESCE(subfolder, '') = ?
+                """, (project_id, base_name, subfolder or ""))
+                row = await cursor.fetchone()
+            else:
+                await self._refresh_fingerprints_locked(project_id, [subfolder or ""])
             return row[0]
 
     async def get_topic_by_base_name(
@@ -864,6 +1316,57 @@ class Database:
         row = await cursor.fetchone()
         return dict(row) if row else None
 
+    async def get_topic_file_states(
+        self, project_id: int
+    ) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """プロジェクトの全トピックのファイル状態を (base_name, subfolder) キーで取得
+
+        スキャナーが stat シグネチャ一致時に保存済みハッシュを再利用するために使用。
+        """
+        cursor = await self._connection.execute(
+            f"SELECT {_TOPIC_STATE_COLUMNS} FROM topics WHERE project_id = ?",
+            (project_id,)
+        )
+        rows = await cursor.fetchall()
+        return {(row['base_name'], row['subfolder'] or ''): dict(row) for row in rows}
+
+    async def get_all_topic_file_states(self) -> Dict[str, Dict[Tuple[str, str], Dict[str, Any]]]:
+        """全プロジェクトのトピックファイル状態をプロジェクト名 → (base_name, subfolder) キーで取得"""
+        columns = ", ".join(f"t.{c.strip()}" for c in _TOPIC_STATE_COLUMNS.split(','))
+        cursor = await self._connection.execute(f"""
+            SELECT p.name AS project_name, {columns}
+            FROM topics t JOIN projects p ON t.project_id = p.id
+        """)
+        states: Dict[str, Dict[Tuple[str, str], Dict[str, Any]]] = {}
+        for row in await cursor.fetchall():
+            data = dict(row)
+            project_name = data.pop('project_name')
+            states.setdefault(project_name, {})[(data['base_name'], data['subfolder'] or '')] = data
+        return states
+
+    async def get_topic(
+        self, project_id: int, base_name: str, subfolder: str = ""
+    ) -> Optional[Dict[str, Any]]:
+        """トピックを (base_name, subfolder) で取得"""
+        cursor = await self._connection.execute("""
+            SELECT * FROM topics
+            WHERE project_id = ? AND base_name = ? AND COALESCE(subfolder, '') = ?
+        """, (project_id, base_name, subfolder or ""))
+        row = await cursor.fetchone()
+        return dict(row) if row else None
+
+    async def delete_topic(self, project_id: int, base_name: str, subfolder: str = "") -> int:
+        """トピックを (base_name, subfolder) で削除"""
+        async with self._lock:
+            cursor = await self._connection.execute("""
+                DELETE FROM topics
+                WHERE project_id = ? AND base_name = ? AND COALESCE(subfolder, '') = ?
+            """, (project_id, base_name, subfolder or ""))
+            deleted = cursor.rowcount
+            if deleted:
+                await self._refresh_fingerprints_locked(project_id, [subfolder or ""])
+            return deleted
+
     async def delete_topics_by_project(self, project_id: int) -> int:
         """プロジェクトのトピックを全削除"""
         async with self._lock:
@@ -871,6 +1374,7 @@ class Database:
                 "DELETE FROM topics WHERE project_id = ?",
                 (project_id,)
             )
+            await self._refresh_fingerprints_locked(project_id)
             return cursor.rowcount
 
     async def delete_stale_topics(
@@ -886,33 +1390,293 @@ class Database:
         Returns:
             削除された行数
         """
+        async with self._lock:
+            deleted = await self._delete_stale_topics_locked(project_id, active_keys)
+            if deleted:
+                await self._refresh_fingerprints_locked(project_id)
+            return deleted
+
+    async def _delete_stale_topics_locked(
+        self,
+        project_id: int,
+        active_keys: List[Tuple[str, str]]
+    ) -> int:
+        """stale トピック削除（呼び出し元が _lock を保持）"""
         if not active_keys:
             # トピックが0件なら全削除
-            return await self.delete_topics_by_project(project_id)
-
-        async with self._lock:
-            # 現在のDB内トピックを取得
             cursor = await self._connection.execute(
-                "SELECT id, base_name, subfolder FROM topics WHERE project_id = ?",
+                "DELETE FROM topics WHERE project_id = ?",
                 (project_id,)
             )
-            rows = await cursor.fetchall()
+            return cursor.rowcount
+
+        # 現在のDB内トピックを取得
+        cursor = await self._connection.execute(
+            "SELECT id, base_name, subfolder FROM topics WHERE project_id = ?",
+            (project_id,)
+        )
+        rows = await cursor.fetchall()
+
+        active_set = {(bn, sf) for bn, sf in active_keys}
+        stale_ids = [
+            row['id'] for row in rows
+            if (row['base_name'], row['subfolder'] or '') not in active_set
+        ]
+
+        if not stale_ids:
+            return 0
+
+        placeholders = ','.join('?' * len(stale_ids))
+        cursor = await self._connection.execute(
+            f"DELETE FROM topics WHERE id IN ({placeholders})",
+            stale_ids
+        )
+        return cursor.rowcount
+
+    async def bulk_upsert_topics(
+        self,
+        project_id: int,
+        topics: List[Dict[str, Any]],
+        active_keys: Optional[List[Tuple[str, str]]] = None,
+        stats: Optional[Dict[str, int]] = None,
+        dir_state: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, int]:
+        """トピックを一括UPSERT（1トランザクション、変更のない行は書き込まない）
+
+        Args:
+            project_id: プロジェクトID
+            topics: スキャン結果のトピック辞書リスト
+            active_keys: 指定時、含まれない (base_name, subfolder) のトピックを同じ
+                         トランザクション内で削除する
+            stats: 指定時、update_project_stats と同じキーでプロジェクト統計も更新する
+            dir_state: 指定時、ディレクトリ状態も保存する（save_project_dir_state と同じ値）
+        Returns:
+            {'inserted', 'updated', 'unchanged', 'deleted'} の件数
+        """
+        async with self._lock:
+            await self._connection.execute("BEGIN")
+            try:
+                counts = await self._bulk_upsert_topics_locked(project_id, topics, active_keys, stats)
+                if dir_state is not None:
+                    await self._save_project_dir_state_locked(project_id, dir_state)
+                await self._connection.execute("COMMIT")
+            except Exception:
+                await self._connection.execute("ROLLBACK")
+                raise
+        return counts
+
+    async def bulk_apply_project_scans(self, scans: List[Dict[str, Any]]) -> List[Tuple[int, Dict[str, int]]]:
+        """複数プロジェクトのスキャン結果を1トランザクションで反映（シャード並列スキャン用）
 
-            active_set = {(bn, sf) for bn, sf in active_keys}
-            stale_ids = [
-                row['id'] for row in rows
-                if (row['base_name'], row['subfolder'] or '') not in active_set
-            ]
+        Args:
+            scans: {'name', 'path', 'wbs_format', 'topics', 'active_keys', 'stats', 'dir_state'} のリスト
+        Returns:
+            scans と同じ順序の (project_id, 件数) リスト
+        """
+        applied = []
+        async with self._lock:
+            await self._connection.execute("BEGIN")
+            try:
+                for scan in scans:
+                    project_id = await self._upsert_project_locked(
+                        scan['name'], scan['path'], scan.get('wbs_format')
+                    )
+                    counts = await self._bulk_upsert_topics_locked(
+                        project_id, scan['topics'], scan.get('active_keys'), scan.get('stats')
+                    )
+                    if scan.get('dir_state') is not None:
+                        await self._save_project_dir_state_locked(project_id, scan['dir_state'])
+                    applied.append((project_id, counts))
+                await self._connection.execute("COMMIT")
+            except Exception:
+                await self._connection.execute("ROLLBACK")
+                raise
+        return applied
 
-            if not stale_ids:
-                return 0
+    async def _bulk_upsert_topics_locked(
+        self,
+        project_id: int,
+        topics: List[Dict[str, Any]],
+        active_keys: Optional[List[Tuple[str, str]]] = None,
+        stats: Optional[Dict[str, int]] = None
+    ) -> Dict[str, int]:
+        """一括UPSERT本体（呼び出し元が _lock を保持しトランザクションを管理）"""
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0}
+        if active_keys is not None:
+            counts['deleted'] = await self._delete_stale_topics_locked(project_id, active_keys)
+
+        cursor = await self._connection.execute(
+            f"SELECT {_TOPIC_STATE_COLUMNS} FROM topics WHERE project_id = ?", (project_id,)
+        )
+        existing = {
+            (row['base_name'], row['subfolder'] or ''): dict(row)
+            for row in await cursor.fetchall()
+        }
+
+        upserts = []
+        sig_updates = []
+        for topic in topics:
+            row = existing.get((topic['base_name'], topic.get('subfolder') or ''))
+            change = _classify_topic_change(row, topic)
+            if change in ('inserted', 'updated'):
+                counts[change] += 1
+                upserts.append(_topic_params(project_id, topic))
+            else:
+                counts['unchanged'] += 1
+                if change == 'sig':
+                    sig_updates.append(
+                        tuple(topic.get(f) for f in _TOPIC_SIG_FIELDS) + (row['id'],)
+                    )
+
+        if upserts:
+            await self._connection.executemany(_TOPIC_UPSERT_SQL, upserts)
+        if sig_updates:
+            await self._connection.executemany(_TOPIC_SIG_UPDATE_SQL, sig_updates)
+        if stats is not None:
+            await self._update_project_stats_locked(project_id, **stats)
+
+        # 内容が変わったサブフォルダのみフィンガープリントを再計算（削除時・未計算時は全体）
+        if counts['deleted'] or not existing:
+            await self._refresh_fingerprints_locked(project_id)
+        elif upserts:
+            await self._refresh_fingerprints_locked(project_id, sorted({params[5] for params in upserts}))
+        return counts
+
+    # ========== コンテンツフィンガープリント ==========
+
+    async def _backfill_fingerprints(self) -> None:
+        """ルートハッシュ未計算のプロジェクトのフィンガープリントを計算"""
+        cursor = await self._connection.execute("SELECT id FROM projects WHERE root_hash IS NULL")
+        project_ids = [row['id'] for row in await cursor.fetchall()]
+        for project_id in project_ids:
+            await self._refresh_fingerprints_locked(project_id)
+        if project_ids:
+            logger.info(f"Computed content fingerprints for {len(project_ids)} projects")
+
+    async def _refresh_fingerprints_locked(
+        self,
+        project_id: int,
+        subfolders: Optional[List[str]] = None
+    ) -> str:
+        """トピックのコンテンツハッシュからサブフォルダ・ルートのハッシュを再計算（呼び出し元が _lock を保持）
 
-            placeholders = ','.join('?' * len(stale_ids))
+        subfolders 指定時はそのサブフォルダのみ再計算し、他は保存済みの値からルートを求める。
+
+        Returns:
+            ルートハッシュ
+        """
+        if subfolders is None:
             cursor = await self._connection.execute(
-                f"DELETE FROM topics WHERE id IN ({placeholders})",
-                stale_ids
+                "SELECT subfolder, base_name, content_hash FROM topics WHERE project_id = ?",
+                (project_id,)
             )
-            return cursor.rowcount
+            await self._connection.execute(
+                "DELETE FROM subfolder_fingerprints WHERE project_id = ? AND scope = 'current'",
+                (project_id,)
+            )
+        else:
+            placeholders = ','.join('?' * len(subfolders))
+            cursor = await self._connection.execute(f"""
+                SELECT subfolder, base_name, content_hash FROM topics
+                WHERE project_id = ? AND COALESCE(subfolder, '') IN ({placeholders})
+            """, (project_id, *subfolders))
+            await self._connection.execute(f"""
+                DELETE FROM subfolder_fingerprints
+                WHERE project_id = ? AND scope = 'current' AND subfolder IN ({placeholders})
+            """, (project_id, *subfolders))
+
+        computed = subfolder_hashes(
+            (row['subfolder'], row['base_name'], row['content_hash']) for row in await cursor.fetchall()
+        )
+        if computed:
+            await self._connection.executemany("""
+                INSERT INTO subfolder_fingerprints (project_id, scope, subfolder, hash, topic_count)
+                VALUES (?, 'current', ?, ?, ?)
+            """, [(project_id, sub, h, count) for sub, (h, count) in computed.items()])
+
+        current = await self._get_subfolder_fingerprints(project_id, 'current')
+        new_root = root_hash(current)
+        await self._connection.execute(
+            "UPDATE projects SET root_hash = ? WHERE id = ?", (new_root, project_id)
+        )
+        return new_root
+
+    async def _get_subfolder_fingerprints(self, project_id: int, scope: str) -> Dict[str, str]:
+        cursor = await self._connection.execute(
+            "SELECT subfolder, hash FROM subfolder_fingerprints WHERE project_id = ? AND scope = ?",
+            (project_id, scope)
+        )
+        return {row['subfolder']: row['hash'] for row in await cursor.fetchall()}
+
+    async def get_fingerprint_status(self, project_id: int) -> Optional[Dict[str, Any]]:
+        """ルートハッシュと公開・RAG構築時点からの変更有無（1行の読み込みのみ）"""
+        cursor = await self._connection.execute("""
+            SELECT root_hash, published_root_hash, rag_indexed_root_hash
+            FROM projects WHERE id = ?
+        """, (project_id,))
+        row = await cursor.fetchone()
+        if row is None:
+            return None
+        return {
+            'root_hash': row['root_hash'],
+            'published_root_hash': row['published_root_hash'],
+            'rag_indexed_root_hash': row['rag_indexed_root_hash'],
+            'changed_since_publish': row['root_hash'] != row['published_root_hash'],
+            'changed_since_rag_index': row['root_hash'] != row['rag_indexed_root_hash'],
+        }
+
+    async def get_changed_subfolders(self, project_id: int, scope: str) -> List[str]:
+        """スナップショット（published / rag_indexed）からハッシュが変わったサブフォルダ"""
+        if scope not in FINGERPRINT_SCOPES:
+            raise ValueError(f"Unknown fingerprint scope: {scope}")
+        current = await self._get_subfolder_fingerprints(project_id, 'current')
+        snapshot = await self._get_subfolder_fingerprints(project_id, scope)
+        return changed_subfolders(current, snapshot)
+
+    async def snapshot_fingerprint(
+        self,
+        project_id: int,
+        scope: str,
+        expected_root_hash: Optional[str] = None
+    ) -> bool:
+        """現在のフィンガープリントを公開・RAG構築時点として記録
+
+        Args:
+            expected_root_hash: 指定時、現在のルートハッシュが一致する場合のみ記録する
+                                （処理中にコンテンツが変わった場合は未反映のまま残す）
+        Returns:
+            記録したか
+        """
+        if scope not in FINGERPRINT_SCOPES:
+            raise ValueError(f"Unknown fingerprint scope: {scope}")
+        async with self._lock:
+            await self._connection.execute("BEGIN")
+            try:
+                cursor = await self._connection.execute(
+                    "SELECT root_hash FROM projects WHERE id = ?", (project_id,)
+                )
+                row = await cursor.fetchone()
+                if row is None or (expected_root_hash is not None and row['root_hash'] != expected_root_hash):
+                    await self._connection.execute("ROLLBACK")
+                    return False
+                await self._connection.execute(
+                    "DELETE FROM subfolder_fingerprints WHERE project_id = ? AND scope = ?",
+                    (project_id, scope)
+                )
+                await self._connection.execute("""
+                    INSERT INTO subfolder_fingerprints (project_id, scope, subfolder, hash, topic_count)
+                    SELECT project_id, ?, subfolder, hash, topic_count
+                    FROM subfolder_fingerprints WHERE project_id = ? AND scope = 'current'
+                """, (scope, project_id))
+                await self._connection.execute(
+                    f"UPDATE projects SET {scope}_root_hash = root_hash WHERE id = ?",
+                    (project_id,)
+                )
+                await self._connection.execute("COMMIT")
+            except Exception:
+                await self._connection.execute("ROLLBACK")
+                raise
+        return True
 
     # ========== スキャン履歴操作 ==========
 
@@ -954,6 +1718,98 @@ class Database:
                 WHERE scan_id = ?
             """, (status, projects_scanned, files_scanned, changes_detected, error_message, scan_id))
 
+    # ========== ハッシュキャッシュ永続化 ==========
+
+    async def load_file_hashes(self, limit: int) -> List[Tuple[str, str, Optional[str]]]:
+        """永続化済みハッシュキャッシュを取得（新しい順に最大 limit 件、古い順で返す）
+
+        行の新しさは rowid で判定する（保存のたびに行を置き換えるため書き込み順に単調増加）。
+        """
+        cursor = await self._connection.execute("""
+            SELECT path, hash, sig FROM (
+                SELECT rowid, path, hash, sig FROM file_hashes
+                ORDER BY rowid DESC
+                LIMIT ?
+            ) ORDER BY rowid
+        """, (limit,))
+        rows = await cursor.fetchall()
+        return [(row['path'], row['hash'], row['sig']) for row in rows]
+
+    async def save_file_hashes(
+        self,
+        entries: List[Tuple[str, str, Optional[str]]],
+        keep: int
+    ) -> None:
+        """ハッシュキャッシュを一括保存し、新しい順に keep 件を超える行を削除
+
+        entries は古い順に渡すこと。REPLACE で行を置き換えて新しい rowid を割り当てるため、
+        rowid が書き込み順の単調なキーになる（updated_at は秒精度で同一秒内の順序が決まらない）。
+        """
+        if not entries:
+            return
+
+        async with self._lock:
+            await self._connection.execute("BEGIN")
+            try:
+                await self._connection.executemany("""
+                    INSERT OR REPLACE INTO file_hashes (path, hash, sig, updated_at)
+                    VALUES (?, ?, ?, datetime('now'))
+                """, entries)
+                await self._connection.execute("""
+                    DELETE FROM file_hashes WHERE rowid <= (
+                        SELECT rowid FROM file_hashes ORDER BY rowid DESC LIMIT 1 OFFSET ?
+                    )
+                """, (keep,))
+                await self._connection.execute("COMMIT")
+            except Exception:
+                await self._connection.execute("ROLLBACK")
+                raise
+
+    async def load_audio_metadata(self, limit: int) -> List[Tuple[str, int, int, int, int]]:
+        """永続化済みMP3メタデータを取得（新しい順に最大 limit 件、古い順で返す）
+
+        行の新しさは rowid で判定する（save_file_hashes と同様、保存のたびに行を置き換える）。
+        """
+        cursor = await self._connection.execute("""
+            SELECT hash, duration_ms, bitrate, sample_rate, channels FROM (
+                SELECT rowid, * FROM audio_metadata
+                ORDER BY rowid DESC
+                LIMIT ?
+            ) ORDER BY rowid
+        """, (limit,))
+        rows = await cursor.fetchall()
+        return [tuple(row) for row in rows]
+
+    async def save_audio_metadata(
+        self,
+        entries: List[Tuple[str, int, int, int, int]],
+        keep: int
+    ) -> None:
+        """MP3メタデータを一括保存し、新しい順に keep 件を超える行を削除
+
+        entries は古い順に渡すこと（REPLACE で新しい rowid を割り当て、rowid 順で刈り込む）。
+        """
+        if not entries:
+            return
+
+        async with self._lock:
+            await self._connection.execute("BEGIN")
+            try:
+                await self._connection.executemany("""
+                    INSERT OR REPLACE INTO audio_metadata
+                        (hash, duration_ms, bitrate, sample_rate, channels, updated_at)
+                    VALUES (?, ?, ?, ?, ?, datetime('now'))
+                """, entries)
+                await self._connection.execute("""
+                    DELETE FROM audio_metadata WHERE rowid <= (
+                        SELECT rowid FROM audio_metadata ORDER BY rowid DESC LIMIT 1 OFFSET ?
+                    )
+                """, (keep,))
+                await self._connection.execute("COMMIT")
+            except Exception:
+                await self._connection.execute("ROLLBACK")
+                raise
+
     # ========== 統計操作 ==========
 
     async def get_stats(self) -> Dict[str, Any]:
@@ -1020,6 +1876,65 @@ class Database:
             row = await cursor.fetchone()
             return row[0]
 
+    async def record_rag_chunks(self, project_id: int, chunk_count: int) -> bool:
+        """スキャンで検出したチャンク数を記録
+
+        chunk_count は常に更新する。'indexing' / 'indexed' の行はステータス・エラーを変更しない
+        （構築中・構築済みの状態をスキャンで上書きしない）。
+
+        Returns:
+            行を追加・更新した場合 True（チャンク数・ステータスとも変わらなければ False）
+        """
+        async with self._lock:
+            cursor = await self._connection.execute("""
+                INSERT INTO rag_indexes (project_id, status, chunk_count)
+                VALUES (?, 'chunks_ready', ?)
+                ON CONFLICT(project_id) DO UPDATE SET
+                    status = CASE WHEN rag_indexes.status IN ('indexing', 'indexed')
+                        THEN rag_indexes.status ELSE 'chunks_ready' END,
+                    chunk_count = excluded.chunk_count,
+                    error_message = CASE WHEN rag_indexes.status IN ('indexing', 'indexed')
+                        THEN rag_indexes.error_message ELSE NULL END,
+                    updated_at = datetime('now')
+                WHERE rag_indexes.chunk_count IS NOT excluded.chunk_count
+                    OR rag_indexes.status NOT IN ('chunks_ready', 'indexing', 'indexed')
+            """, (project_id, chunk_count))
+            return cursor.rowcount > 0
+
+    async def update_rag_build_progress(
+        self,
+        project_id: int,
+        status: str,
+        build_phase: str = '',
+        build_message: str = '',
+        build_percent: int = 0,
+        chunk_count: Optional[int] = None
+    ) -> None:
+        """外部ビルド（rag_build_progress.json）の進捗を1文で反映
+
+        chunk_count が None の場合は既存のチャンク数を保持する。
+        """
+        async with self._lock:
+            await self._connection.execute("""
+                INSERT INTO rag_indexes (
+                    project_id, status, chunk_count, build_phase, build_message, build_percent
+                )
+                VALUES (?, ?, COALESCE(?, 0), ?, ?, ?)
+                ON CONFLICT(project_id) DO UPDATE SET
+                    status = excluded.status,
+                    chunk_count = COALESCE(?, rag_indexes.chunk_count),
+                    build_phase = excluded.build_phase,
+                    build_message = excluded.build_message,
+                    build_percent = excluded.build_percent,
+                    error_message = CASE WHEN excluded.status = 'failed'
+                        THEN excluded.build_message ELSE NULL END,
+                    index_built_at = CASE WHEN excluded.status = 'indexed' AND rag_indexes.status != 'indexed'
+                        THEN datetime('now') ELSE rag_indexes.index_built_at END,
+                    updated_at = datetime('now')
+            """, (
+                project_id, status, chunk_count, build_phase, build_message, build_percent, chunk_count
+            ))
+
     async def update_rag_index_status(
         self,
         project_id: int,
@@ -1047,11 +1962,12 @@ class Database:
             return True
 
     async def update_project_has_rag_chunks(self, project_id: int, has_rag_chunks: bool) -> None:
-        """プロジェクトのhas_rag_chunksを更新"""
+        """プロジェクトのhas_rag_chunksを更新（値が変わらない場合は書き込まない）"""
         async with self._lock:
             await self._connection.execute(
-                "UPDATE projects SET has_rag_chunks = ?, updated_at = datetime('now') WHERE id = ?",
-                (int(has_rag_chunks), project_id)
+                "UPDATE projects SET has_rag_chunks = ?, updated_at = datetime('now') "
+                "WHERE id = ? AND has_rag_chunks IS NOT ?",
+                (int(has_rag_chunks), project_id, int(has_rag_chunks))
             )
 
 
@@ -0,0 +1,207 @@
+"""
+ディレクトリインデックス
+パフォーマンス最適化: os.scandir による単一パス走査、stat 結果のキャッシュ、
+ディレクトリ mtime による未変更サブツリーの枝刈り
+"""
+
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 走査対象外のフォルダ（隠しフォルダは別途除外）
+EXCLUDED_DIRS = frozenset({'__pycache__', 'node_modules', 'old'})
+
+# 記録時刻からこの時間内の mtime は信用しない（同一タイムスタンプ内の後続変更を見逃さないため、
+# 永続化時に「不一致」扱いの値へ置き換える）
+RACY_MTIME_NS = 2_000_000_000
+
+
+def stat_signature(st: os.stat_result) -> str:
+    """stat 結果から変更検出用シグネチャ（size:mtime_ns:inode）を生成"""
+    return f"{st.st_size}:{st.st_mtime_ns}:{st.st_ino}"
+
+
+def _file_signature(path: Path) -> Optional[str]:
+    """ファイルの stat シグネチャ（存在しなければ None）"""
+    try:
+        return stat_signature(path.stat())
+    except OSError:
+        return None
+
+
+def snapshot_dir_mtimes(root: Path, previous: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """root 以下の全ディレクトリの mtime（ns）を subfolder キー（root は ''）で取得
+
+    ディレクトリの mtime はエントリの追加・削除・リネームで更新される。previous と
+    mtime が一致するディレクトリは子ディレクトリ構成も同じなので scandir せず
+    previous の子を辿る（未変更のツリーはディレクトリ1つにつき stat 1回）。
+    除外条件は DirectoryIndex と同じ。
+    """
+    previous = previous or {}
+    children: Dict[str, List[str]] = {}
+    for subfolder in previous:
+        if subfolder:
+            children.setdefault(subfolder.rpartition('/')[0], []).append(subfolder)
+
+    mtimes: Dict[str, int] = {}
+    stack: List[Tuple[str, str]] = [("", str(root))]
+    while stack:
+        subfolder, dir_path = stack.pop()
+        try:
+            mtime = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            continue
+        mtimes[subfolder] = mtime
+
+        if previous.get(subfolder) == mtime:
+            stack.extend((child, os.path.join(str(root), child)) for child in children.get(subfolder, ()))
+            continue
+        try:
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    if entry.name.startswith('.') or entry.name in EXCLUDED_DIRS:
+                        continue
+                    try:
+                        if not entry.is_dir():
+                            continue
+                    except OSError:
+                        continue
+                    child = f"{subfolder}/{entry.name}" if subfolder else entry.name
+                    stack.append((child, entry.path))
+        except OSError as e:
+            logger.warning(f"Failed to scan directory {dir_path}: {e}")
+    return mtimes
+
+
+@dataclass
+class ProjectDirState:
+    """プロジェクトの変更検出用スナップショット
+
+    content/ 配下のディレクトリ mtime と、トピック構成に関わる WBS.json・
+    RAG 状態に関わる rag_chunks.json の stat シグネチャを別々に持つ。
+    """
+    dirs: Dict[str, int]
+    wbs_sig: Optional[str]
+    rag_chunks_sig: Optional[str]
+    taken_at_ns: int
+
+    @classmethod
+    def capture(cls, project_path: Path, stored: Optional[Dict[str, Any]] = None) -> "ProjectDirState":
+        """現在の状態を取得（ブロッキング）。stored は前回保存値（未変更ディレクトリの再走査を省く）"""
+        taken_at_ns = time.time_ns()
+        previous = stored.get('dirs') if stored else None
+        return cls(
+            dirs=snapshot_dir_mtimes(project_path / 'content', previous),
+            wbs_sig=_file_signature(project_path / 'WBS.json'),
+            rag_chunks_sig=_file_signature(project_path / 'rag_chunks.json'),
+            taken_at_ns=taken_at_ns,
+        )
+
+    def topics_unchanged(self, stored: Optional[Dict[str, Any]]) -> bool:
+        """トピック構成・ファイルに影響する変更がないか（ディレクトリ構成 + WBS.json）"""
+        return bool(stored) and stored['wbs_sig'] == self.wbs_sig and stored['dirs'] == self.dirs
+
+    def rag_chunks_unchanged(self, stored: Optional[Dict[str, Any]]) -> bool:
+        """rag_chunks.json に変更がないか"""
+        return bool(stored) and stored['rag_chunks_sig'] == self.rag_chunks_sig
+
+    def settled(self) -> Dict[str, Any]:
+        """永続化用の値（取得直前に更新された mtime は次回必ず不一致になる値に置き換える）"""
+        racy_after = self.taken_at_ns - RACY_MTIME_NS
+
+        def settle_sig(sig: Optional[str]) -> Optional[str]:
+            if not sig:
+                return sig
+            mtime_ns = int(sig.split(':')[1])
+            return '' if mtime_ns > racy_after else sig
+
+        return {
+            'dirs': {sub: (0 if mtime > racy_after else mtime) for sub, mtime in self.dirs.items()},
+            'wbs_sig': settle_sig(self.wbs_sig),
+            'rag_chunks_sig': settle_sig(self.rag_chunks_sig),
+        }
+
+
+class DirectoryIndex:
+    """content/ 配下のファイル一覧インデックス
+
+    1回の os.scandir 走査で subfolder → {ファイル名: DirEntry} を構築する。
+    スキャナーの各フェーズ（トピック検出・base_name 解決・ファイル状態取得）は
+    ファイルシステムを再走査せずこのインデックスを参照する。
+    stat は DirEntry がキャッシュするため、1ファイルにつき最大1回となる。
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._dirs: Dict[str, Dict[str, os.DirEntry]] = {}
+
+    @classmethod
+    def build(cls, root: Path) -> "DirectoryIndex":
+        """root 以下を走査してインデックスを構築（root が無ければ空）"""
+        index = cls(root)
+        if root.is_dir():
+            index._walk(str(root), "")
+        return index
+
+    def _walk(self, dir_path: str, subfolder: str) -> None:
+        files: Dict[str, os.DirEntry] = {}
+        child_dirs: List[Tuple[str, str]] = []
+
+        try:
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        continue
+                    if is_dir:
+                        if entry.name.startswith('.') or entry.name in EXCLUDED_DIRS:
+                            continue
+                        new_sub = f"{subfolder}/{entry.name}" if subfolder else entry.name
+                        child_dirs.append((entry.path, new_sub))
+                    else:
+                        files[entry.name] = entry
+        except OSError as e:
+            logger.warning(f"Failed to scan directory {dir_path}: {e}")
+            return
+
+        self._dirs[subfolder] = files
+        for child_path, child_sub in child_dirs:
+            self._walk(child_path, child_sub)
+
+    @property
+    def subfolders(self) -> List[str]:
+        """走査済みサブフォルダ一覧（root は ''）"""
+        return list(self._dirs)
+
+    def files(self, subfolder: str = "") -> Dict[str, os.DirEntry]:
+        """サブフォルダ直下のファイル {名前: DirEntry}"""
+        return self._dirs.get(subfolder or "", {})
+
+    def iter_files(self) -> Iterator[Tuple[str, str]]:
+        """全ファイルを (subfolder, ファイル名) で列挙"""
+        for subfolder, files in self._dirs.items():
+            for name in files:
+                yield subfolder, name
+
+    def exists(self, subfolder: str, name: str) -> bool:
+        """ファイルが存在するか（syscall なし）"""
+        return name in self._dirs.get(subfolder or "", {})
+
+    def stat(self, subfolder: str, name: str) -> Optional[os.stat_result]:
+        """ファイルの stat 結果（DirEntry キャッシュ利用、存在しなければ None）"""
+        entry = self._dirs.get(subfolder or "", {}).get(name)
+        if entry is None:
+            return None
+        try:
+            return entry.stat()
+        except OSError:
+            return None
+
+    def __len__(self) -> int:
+        return sum(len(files) for files in self._dirs.values())
@@ -0,0 +1,27 @@
+"""
+ファイルイベント
+ウォッチャー・スキャンコーディネーター・スキャナー間で受け渡すイベント種別（watchdog に依存しない）
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+FILE_EVENT_TYPES = ('created', 'modified', 'deleted', 'moved')
+
+
+@dataclass(frozen=True, slots=True)
+class FileEvent:
+    """ウォッチャーが通知するファイルイベント
+
+    moved の場合のみ dest_path を持つ。is_directory はフォルダの作成・削除・移動
+    （中のファイルは個別に通知されない場合がある）。
+    """
+    event_type: str
+    path: str
+    dest_path: Optional[str] = None
+    is_directory: bool = False
+
+    @property
+    def paths(self) -> Tuple[str, ...]:
+        """イベントに関わるパス（移動元・移動先）"""
+        return (self.path, self.dest_path) if self.dest_path else (self.path,)
@@ -0,0 +1,150 @@
+"""
+ファイル名文法（base_name の解釈）
+パフォーマンス最適化: 正規表現はコンパイル済み、base_name ごとの解釈結果はメモ化してスキャナー・公開処理で共有
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
+
+# base_name の解釈結果のキャッシュ数（全プロジェクトのトピック数程度）
+MAX_TOPIC_NAME_CACHE_SIZE = 65536
+
+# DBに保存するソートキーの数値桁数（文字列比較で数値順になるようゼロ埋め）
+SORT_KEY_DIGITS = 10
+
+# レベルプレフィックスの順序マッピング
+# intro/beginner(入門) → basic/elementary(初級) → intermediate(中級) → advanced(上級)
+LEVEL_ORDER = {
+    'intro': 0, 'introduction': 0, 'beginner': 0,
+    'basic': 1, 'elementary': 1,
+    'intermediate': 2,
+    'advanced': 3,
+}
+
+# 数値-数値または数値_数値パターン（例: 1-1, 01-02, 2-3, 1_1, 10_2）
+TOPIC_PATTERN = re.compile(r'\d+[-_]\d+')
+
+# ソート・エピソード番号用
+# A: レベルプレフィックス "intro-1-1", "advanced_2-3"
+_LEVEL_PREFIXED = re.compile(r'^([a-zA-Z]+)[-_](\d+)[-_](\d+)')
+# D: 3階層数値 "1-1-1_title"
+_THREE_LEVEL = re.compile(r'^(\d+)[-_](\d+)[-_](\d+)')
+# C: 2階層数値 "01-01_title"
+_TWO_LEVEL = re.compile(r'^(\d+)[-_](\d+)')
+
+# WBS base_name と実ファイルの照合用（3階層目は同じセパレータの場合のみ許可）
+_MATCH_PREFIXED = re.compile(r'^([a-zA-Z]+)[-_](\d{1,3})([-_])(\d{1,3})(?:(\3)(\d{1,3}))?(?:[-_]|$)')
+_MATCH_PLAIN = re.compile(r'^(\d{1,3})([-_])(\d{1,3})(?:(\2)(\d{1,3}))?(?:[-_]|$)')
+
+
+@dataclass(frozen=True, slots=True)
+class TopicName:
+    """base_name の解釈結果
+
+    対応パターン:
+      A: intro-1-1, basic-2-3, advanced_1-1  (レベルプレフィックス)
+      B: beginner/0-1_intro (レベルサブフォルダ、sort_key の subfolder で判定)
+      C: 01-01_xxx (2階層数値)
+      D: 1-1-1_xxx (3階層数値)
+    """
+    base_name: str
+    level: str = ''                      # レベルプレフィックス（小文字、パターンA のみ）
+    numbers: Tuple[int, ...] = ()        # 番号（パターンA/C: 章・話、D: 3階層）
+    topic_id: Optional[str] = None       # 最初の "数値-数値" 部分（無ければトピック対象外）
+    match_prefix: str = ''               # WBS 照合用の接頭語
+    match_episode: Optional[str] = None  # WBS 照合用のエピソード番号（ゼロ埋めを保持、例: "01-01"）
+
+    @property
+    def depth(self) -> int:
+        """番号の階層数（0: 番号なし）"""
+        return len(self.numbers)
+
+    @property
+    def chapter(self) -> Optional[int]:
+        return self.numbers[-2] if self.numbers else None
+
+    @property
+    def episode(self) -> Optional[int]:
+        return self.numbers[-1] if self.numbers else None
+
+    @property
+    def episode_number(self) -> Optional[str]:
+        """公開用のエピソード番号（"intro-1-1", "1-2", "1-1-1" 等）"""
+        if not self.numbers:
+            return None
+        numbers = '-'.join(str(n) for n in self.numbers)
+        return f"{self.level}-{numbers}" if self.level else numbers
+
+    def sort_key(self, subfolder: str = '') -> tuple:
+        """ソートキー（レベル→章→話の順）"""
+        if self.level:
+            return (LEVEL_ORDER.get(self.level, 99), *self.numbers, self.base_name)
+        if self.depth == 3:
+            return (*self.numbers, self.base_name)
+        if self.depth == 2:
+            return (folder_level_order(subfolder), *self.numbers, self.base_name)
+        return (99, 0, 0, self.base_name)
+
+    def sort_key_text(self, subfolder: str = '') -> str:
+        """DB保存用のソートキー（文字列比較で sort_key と同じ順序、同名はサブフォルダ順）"""
+        *numbers, base_name = self.sort_key(subfolder)
+        limit = 10 ** SORT_KEY_DIGITS - 1
+        digits = '.'.join(str(min(n, limit)).zfill(SORT_KEY_DIGITS) for n in numbers)
+        return f"{digits}.{base_name}\x1f{subfolder}"
+
+
+@lru_cache(maxsize=256)
+def folder_level_order(subfolder: str) -> int:
+    """サブフォルダ名（末尾）からレベル順序を判定（パターンB）"""
+    if not subfolder:
+        return 0
+    return LEVEL_ORDER.get(subfolder.split('/')[-1].lower(), 0)
+
+
+@lru_cache(maxsize=MAX_TOPIC_NAME_CACHE_SIZE)
+def parse_topic_name(base_name: str) -> TopicName:
+    """base_name を解釈（メモ化、同じ base_name の正規表現は1回だけ実行）"""
+    level = ''
+    numbers: Tuple[int, ...] = ()
+    m = _LEVEL_PREFIXED.match(base_name)
+    if m:
+        level = m.group(1).lower()
+        numbers = (int(m.group(2)), int(m.group(3)))
+    else:
+        m = _THREE_LEVEL.match(base_name) or _TWO_LEVEL.match(base_name)
+        if m:
+            numbers = tuple(int(g) for g in m.groups())
+
+    match_prefix = ''
+    match_episode = None
+    m = _MATCH_PREFIXED.match(base_name)
+    if m:
+        match_prefix = m.group(1).lower()
+        match_episode = f"{m.group(2)}-{m.group(4)}" + (f"-{m.group(6)}" if m.group(6) else '')
+    else:
+        m = _MATCH_PLAIN.match(base_name)
+        if m:
+            match_episode = f"{m.group(1)}-{m.group(3)}" + (f"-{m.group(5)}" if m.group(5) else '')
+
+    topic_match = TOPIC_PATTERN.search(base_name)
+    return TopicName(
+        base_name=base_name,
+        level=level,
+        numbers=numbers,
+        topic_id=topic_match.group(0) if topic_match else None,
+        match_prefix=match_prefix,
+        match_episode=match_episode,
+    )
+
+
+def topic_sort_key(base_name: str, subfolder: Optional[str] = None) -> str:
+    """トピックのDB保存用ソートキー（topics.sort_key）"""
+    return parse_topic_name(base_name).sort_key_text(subfolder or '')
+
+
+def clear_topic_name_cache() -> None:
+    """解釈結果のキャッシュをクリア"""
+    parse_topic_name.cache_clear()
+    folder_level_order.cache_clear()
@@ -0,0 +1,57 @@
+"""
+コンテンツフィンガープリント（Merkle ツリー）
+パフォーマンス最適化: 成果物ハッシュ → トピック → サブフォルダ → プロジェクトルートの階層ハッシュで、
+「前回から変わったか」はルート1つの比較、変わった部分木の特定はサブフォルダ単位の比較で行う
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import xxhash
+
+# トピックハッシュに含める成果物（順序固定）
+ARTIFACT_KINDS = ('html', 'txt', 'mp3', 'ssml')
+
+# フィンガープリントのスナップショット種別
+FINGERPRINT_SCOPES = ('published', 'rag_indexed')
+
+
+def topic_content_hash(topic: Mapping[str, Any]) -> str:
+    """成果物ハッシュからトピックのハッシュを計算（存在しない成果物は空として扱う）"""
+    hasher = xxhash.xxh64()
+    for kind in ARTIFACT_KINDS:
+        hasher.update((topic.get(f'{kind}_hash') or '').encode('utf-8'))
+        hasher.update(b'\0')
+    return hasher.hexdigest()
+
+
+def combine_hashes(entries: Iterable[Tuple[str, str]]) -> str:
+    """(キー, 子ハッシュ) をキー順に連結したハッシュ（子の並び順に依存しない）"""
+    hasher = xxhash.xxh64()
+    for key, child_hash in sorted(entries):
+        hasher.update(key.encode('utf-8'))
+        hasher.update(b'\0')
+        hasher.update(child_hash.encode('utf-8'))
+        hasher.update(b'\n')
+    return hasher.hexdigest()
+
+
+def subfolder_hashes(rows: Iterable[Tuple[str, str, Optional[str]]]) -> Dict[str, Tuple[str, int]]:
+    """トピック行 (subfolder, base_name, content_hash) からサブフォルダごとの (ハッシュ, トピック数)"""
+    grouped: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+    for subfolder, base_name, content_hash in rows:
+        grouped[subfolder or ''].append((base_name, content_hash or ''))
+    return {sub: (combine_hashes(entries), len(entries)) for sub, entries in grouped.items()}
+
+
+def root_hash(subfolders: Mapping[str, str]) -> str:
+    """サブフォルダのハッシュからプロジェクトのルートハッシュ"""
+    return combine_hashes(subfolders.items())
+
+
+def changed_subfolders(current: Mapping[str, str], snapshot: Mapping[str, str]) -> List[str]:
+    """スナップショットからハッシュが変わった（追加・削除を含む）サブフォルダ"""
+    return sorted(
+        sub for sub in set(current) | set(snapshot)
+        if current.get(sub) != snapshot.get(sub)
+    )
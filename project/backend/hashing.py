@@ -0,0 +1,170 @@
+"""
+ファイルハッシュエンジン
+パフォーマンス最適化: 1ファイル1回のワーカー呼び出し、readinto 再利用バッファ、mmap、サンプリング
+"""
+
+import mmap
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional
+import logging
+
+import xxhash
+
+logger = logging.getLogger(__name__)
+
+# 対応アルゴリズム
+HASH_ALGORITHMS: Dict[str, Callable] = {
+    'xxh64': xxhash.xxh64,
+    'xxh3_64': xxhash.xxh3_64,
+    'xxh3_128': xxhash.xxh3_128,
+}
+HASH_MODES = ('auto', 'full', 'mmap', 'sampled')
+
+DEFAULT_ALGORITHM = 'xxh64'
+READ_BUFFER_SIZE = 1024 * 1024       # readinto 用バッファ
+MMAP_THRESHOLD = 8 * 1024 * 1024     # auto モードでこのサイズ以上は mmap
+SAMPLE_SIZE = 1024 * 1024            # sampled モードの先頭・末尾サンプル長
+
+# 例: "mp3=xxh3_64:sampled,html=xxh3_64,*=xxh64:auto"
+HASH_STRATEGY_SPEC = os.environ.get("SCAN_HASH_STRATEGY", "")
+
+
+@dataclass(frozen=True)
+class HashStrategy:
+    """ハッシュ戦略（アルゴリズム + 読み込みモード）
+
+    mode:
+        auto    : MMAP_THRESHOLD 未満は readinto、以上は mmap
+        full    : readinto で全体を読む
+        mmap    : mmap で全体をハッシュ
+        sampled : サイズ + 先頭 + 末尾のみをハッシュ（巨大音声ファイル向け。
+                  中間だけの変更は検出できないため stat シグネチャと併用する）
+    """
+    algorithm: str = DEFAULT_ALGORITHM
+    mode: str = 'auto'
+
+    def __post_init__(self):
+        if self.algorithm not in HASH_ALGORITHMS:
+            raise ValueError(f"Unknown hash algorithm: {self.algorithm}")
+        if self.mode not in HASH_MODES:
+            raise ValueError(f"Unknown hash mode: {self.mode}")
+
+    @property
+    def tag(self) -> str:
+        """ハッシュ値の種別タグ（全体ハッシュはモードに依らず同一値になる）"""
+        if self.mode == 'sampled':
+            return f"{self.algorithm}~sampled"
+        return self.algorithm
+
+
+def parse_strategy_spec(spec: str) -> Dict[str, HashStrategy]:
+    """"ext=algorithm[:mode],..." 形式の設定をパース（'*' はデフォルト）"""
+    strategies: Dict[str, HashStrategy] = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        ext, _, value = item.partition('=')
+        algorithm, _, mode = value.partition(':')
+        key = ext.strip().lower().lstrip('.')
+        strategies[key] = HashStrategy(algorithm.strip() or DEFAULT_ALGORITHM, mode.strip() or 'auto')
+    return strategies
+
+
+class HashEngine:
+    """拡張子ごとに戦略を切り替えるファイルハッシュエンジン
+
+    1ファイルのハッシュ計算は呼び出し元スレッドで完結する（エグゼキューター1ホップ）。
+    readinto 用バッファはスレッドごとに再利用する。
+
+    ハッシュ値は既定戦略（xxh64 全体）ではタグなしの16進文字列、それ以外は
+    "tag:hex" 形式になり、設定変更後に異なる戦略の保存値を誤って再利用しない。
+    """
+
+    def __init__(
+        self,
+        strategies: Optional[Dict[str, HashStrategy]] = None,
+        default: Optional[HashStrategy] = None
+    ):
+        self._strategies = dict(strategies or {})
+        self._default = default or self._strategies.pop('*', None) or HashStrategy()
+        self._local = threading.local()
+
+    def __getstate__(self) -> Dict:
+        # スレッドローカルバッファはプロセス間で共有しない（ProcessPoolExecutor 用）
+        return {'_strategies': self._strategies, '_default': self._default}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    @classmethod
+    def from_spec(cls, spec: str = HASH_STRATEGY_SPEC) -> "HashEngine":
+        """設定文字列からエンジンを生成"""
+        return cls(parse_strategy_spec(spec))
+
+    def strategy_for(self, path: Path) -> HashStrategy:
+        """ファイルに適用する戦略"""
+        name = path.name.lower()
+        ext = name.rsplit('.', 1)[-1] if '.' in name else ''
+        return self._strategies.get(ext, self._default)
+
+    def is_compatible(self, hash_value: Optional[str], path: Path) -> bool:
+        """保存済みハッシュ値が現在の戦略で計算されたものか"""
+        if not hash_value:
+            return False
+        tag = self.strategy_for(path).tag
+        if tag == DEFAULT_ALGORITHM:
+            return ':' not in hash_value
+        return hash_value.startswith(f"{tag}:")
+
+    def hash_file(self, path: Path, size: Optional[int] = None) -> str:
+        """ファイルのハッシュを計算（ブロッキング）"""
+        strategy = self.strategy_for(path)
+        hasher = HASH_ALGORITHMS[strategy.algorithm]()
+
+        with open(path, 'rb') as f:
+            if size is None:
+                size = os.fstat(f.fileno()).st_size
+
+            mode = strategy.mode
+            if mode == 'auto':
+                mode = 'mmap' if size >= MMAP_THRESHOLD else 'full'
+
+            if mode == 'sampled':
+                self._hash_sampled(f, size, hasher)
+            elif mode == 'mmap' and size > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    hasher.update(mm)
+            else:
+                self._hash_readinto(f, hasher)
+
+        digest = hasher.hexdigest()
+        if strategy.tag == DEFAULT_ALGORITHM:
+            return digest
+        return f"{strategy.tag}:{digest}"
+
+    def _buffer(self) -> memoryview:
+        """スレッドごとの再利用バッファ"""
+        view = getattr(self._local, 'view', None)
+        if view is None:
+            view = memoryview(bytearray(READ_BUFFER_SIZE))
+            self._local.view = view
+        return view
+
+    def _hash_readinto(self, f, hasher) -> None:
+        view = self._buffer()
+        while True:
+            n = f.readinto(view)
+            if not n:
+                break
+            hasher.update(view[:n])
+
+    def _hash_sampled(self, f, size: int, hasher) -> None:
+        hasher.update(size.to_bytes(8, 'little'))
+        if size <= SAMPLE_SIZE * 2:
+            self._hash_readinto(f, hasher)
+            return
+        hasher.update(f.read(SAMPLE_SIZE))
+        f.seek(size - SAMPLE_SIZE)
+        hasher.update(f.read(SAMPLE_SIZE))
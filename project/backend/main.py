@@ -4,11 +4,10 @@ FastAPIメインアプリケーション
 """
 
 import asyncio
-import json
 import os
 from pathlib import Path
 from contextlib import asynccontextmanager
-from datetime import datetime
+from typing import List
 import logging
 import sys
 
@@ -18,7 +17,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 
 from .database import get_database, close_database
-from .scanner import AsyncScanner
+from .file_events import FileEvent
+from .rag_progress import handle_rag_build_progress
+from .scanner import AsyncScanner, get_scanner
+from .scan_coordinator import ScanCoordinator, get_scan_coordinator
 from .watcher import MultiProjectWatcher
 from .websocket import get_connection_manager
 from .api import router as api_router
@@ -37,16 +39,19 @@ logger = logging.getLogger(__name__)
 BASE_DIR = Path(__file__).parent.parent
 FRONTEND_DIR = BASE_DIR / "frontend"
 DEFAULT_CONTENT_PATH = Path(os.environ.get("CONTENT_PATH", str(Path.home() / "Learning-Curricula")))
+# 1 の場合は stat シグネチャを信用せず常に全ファイルをハッシュ計算
+SCAN_PARANOID = os.environ.get("SCAN_PARANOID", "0") == "1"
 
 # グローバル状態
 _watcher: MultiProjectWatcher = None
 _scanner: AsyncScanner = None
+_coordinator: ScanCoordinator = None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """アプリケーションライフサイクル管理"""
-    global _watcher, _scanner
+    global _watcher, _scanner, _coordinator
 
     logger.info("Starting application...")
 
@@ -55,98 +60,64 @@ async def lifespan(app: FastAPI):
     logger.info("Database initialized")
 
     # スキャナー初期化
-    _scanner = AsyncScanner(db, DEFAULT_CONTENT_PATH)
+    _scanner = get_scanner(db, DEFAULT_CONTENT_PATH, paranoid=SCAN_PARANOID)
+    try:
+        await _scanner.load_hash_cache()
+    except Exception as e:
+        logger.warning(f"Failed to warm hash cache: {e}")
+    # スキャン要求の合流・直列化
+    _coordinator = get_scan_coordinator(_scanner, db)
 
     # ファイルウォッチャー初期化
     ws = get_connection_manager()
 
-    async def on_file_change(project_name: str, paths: list):
-        """ファイル変更時のコールバック"""
-        logger.info(f"File change detected in {project_name}: {len(paths)} files")
+    async def on_file_change(project_name: str, events: List[FileEvent]):
+        """content/ 配下のファイル変更時のコールバック"""
+        logger.info(f"File change detected in {project_name}: {len(events)} events")
 
-        # rag_build_progress.json のみの変更ならファストパス
-        rag_progress_paths = [p for p in paths if Path(p).name == 'rag_build_progress.json']
-        non_rag_paths = [p for p in paths if Path(p).name != 'rag_build_progress.json']
+        # 削除・移動はDBのみ更新、作成・変更は該当トピックのみインクリメンタルスキャン
+        # （同一プロジェクトのスキャン中は後続スキャン1回にイベントを合算、完了時にWebSocket通知）
+        project = await db.get_project_by_name(project_name)
+        if project:
+            ticket = _coordinator.request_file_events(Path(project['path']), events)
+            try:
+                await ticket.wait()
+            except Exception as e:
+                logger.warning(f"Incremental scan failed for {project_name}: {e}")
 
-        if rag_progress_paths and not non_rag_paths:
-            # ファストパス: フルスキャンせずJSONを直接読み、DB更新 + WebSocket broadcast
-            await _handle_rag_progress_fast(project_name, rag_progress_paths[0])
-            return
+    async def on_wbs_change(project_name: str, events: List[FileEvent]):
+        """WBS.json 変更時: 再パースしてトピック集合の差分のみ反映（完了時にWebSocket通知）"""
+        project = await db.get_project_by_name(project_name)
+        if project:
+            ticket = _coordinator.request_wbs_change(Path(project['path']))
+            try:
+                await ticket.wait()
+            except Exception as e:
+                logger.warning(f"WBS update failed for {project_name}: {e}")
 
-        # 通常のファイル変更はフルスキャン
+    async def on_rag_chunks_change(project_name: str, events: List[FileEvent]):
+        """rag_chunks.json 変更時: チャンク数のみプローブして反映（完了時にWebSocket通知）"""
         project = await db.get_project_by_name(project_name)
         if project:
-            project_path = Path(project['path'])
-            result = await _scanner.scan_project(project_path)
-
-            # WebSocket通知
-            updated_project = await db.get_project_by_name(project_name)
-            if updated_project:
-                await ws.broadcast_project_update(dict(updated_project))
-
-    async def _handle_rag_progress_fast(project_name: str, progress_path: str):
-        """rag_build_progress.json のファストパス処理"""
-        try:
-            p = Path(progress_path)
-            if not p.exists():
-                return
-
-            # スタル判定: 10分以上更新がないファイルはスキップ
-            mtime = p.stat().st_mtime
-            if (datetime.now().timestamp() - mtime) > 600:
-                return
-
-            with open(p, 'r', encoding='utf-8') as f:
-                progress_data = json.load(f)
-
-            project = await db.get_project_by_name(project_name)
-            if not project:
-                return
-
-            project_id = project['id']
-            ext_status = progress_data.get('status', '')
-
-            # ステータスマッピング
-            status_map = {
-                'chunking': 'chunks_ready',
-                'embedding': 'indexing',
-                'testing': 'indexing',
-                'completed': 'indexed',
-                'failed': 'failed',
-            }
-            mapped_status = status_map.get(ext_status, 'indexing')
-
-            # エージェントが明示的に書いた進捗は常に信頼する
-            await db.update_rag_build_progress(
-                project_id=project_id,
-                status=mapped_status,
-                build_phase=progress_data.get('phase', ''),
-                build_message=progress_data.get('message', ''),
-                build_percent=progress_data.get('progress_percent', 0),
-                chunk_count=progress_data.get('details', {}).get('chunk_count', 0)
-            )
-
-            # WebSocket broadcast（軽量イベント）
-            await ws.broadcast("rag_external_progress", {
-                "project_id": project_id,
-                "project_name": project_name,
-                "status": ext_status,
-                "phase": progress_data.get('phase', ''),
-                "message": progress_data.get('message', ''),
-                "progress_percent": progress_data.get('progress_percent', 0),
-                "details": progress_data.get('details', {}),
-                "mapped_status": mapped_status
-            })
-
-            logger.info(f"RAG progress fast-path: {project_name} ({ext_status}, {progress_data.get('progress_percent', 0)}%)")
-
-        except Exception as e:
-            logger.warning(f"RAG progress fast-path error for {project_name}: {e}")
+            ticket = _coordinator.request_rag_chunks_refresh(Path(project['path']))
+            try:
+                await ticket.wait()
+            except Exception as e:
+                logger.warning(f"RAG chunks update failed for {project_name}: {e}")
+
+    async def on_rag_progress_change(project_name: str, events: List[FileEvent]):
+        """rag_build_progress.json 変更時: フルスキャンせずJSONを直接読み、DB更新 + WebSocket broadcast"""
+        await handle_rag_build_progress(db, ws, project_name, events[-1].path)
 
     _watcher = MultiProjectWatcher(
         DEFAULT_CONTENT_PATH,
         on_file_change,
-        debounce_ms=100
+        debounce_ms=100,
+        handlers={
+            'wbs': on_wbs_change,
+            'rag_chunks': on_rag_chunks_change,
+            'rag_progress': on_rag_progress_change,
+        }
     )
     await _watcher.start()
     logger.info("File watcher started")
@@ -159,27 +130,22 @@ async def lifespan(app: FastAPI):
     # シャットダウン
     logger.info("Shutting down...")
     await _watcher.stop()
+    await _coordinator.shutdown()
+    try:
+        await _scanner.flush_hash_cache()
+    except Exception as e:
+        logger.warning(f"Failed to flush hash cache: {e}")
+    _scanner.close()
     await close_database()
     logger.info("Shutdown complete")
 
 
 async def _initial_scan():
-    """初回フルスキャン"""
-    global _scanner
+    """初回フルスキャン（開始・進捗・完了の通知はコーディネーターが行う）"""
     try:
         logger.info("Starting initial scan...")
-        start_time = datetime.now()
-        results = await _scanner.scan_all_projects()
-        duration = (datetime.now() - start_time).total_seconds()
-        logger.info(f"Initial scan completed: {len(results)} projects in {duration:.2f}s")
-
-        # WebSocket通知
-        ws = get_connection_manager()
-        await ws.broadcast("scan_completed", {
-            "type": "initial",
-            "projects_scanned": len(results),
-            "duration_seconds": duration
-        })
+        results = await _coordinator.request_full_scan(scan_type="initial").wait()
+        logger.info(f"Initial scan completed: {len(results)} projects")
 
     except Exception as e:
         logger.error(f"Initial scan error: {e}")
@@ -267,12 +233,13 @@ if FRONTEND_DIR.exists():
 @app.post("/api/force-scan")
 async def force_scan():
     """強制フルスキャン（開発用）"""
-    global _scanner
     if _scanner:
         _scanner.clear_cache()
-        results = await _scanner.scan_all_projects()
+        ticket = _coordinator.request_full_scan(paranoid=True)
+        results = await ticket.wait()
         return {
             "status": "completed",
+            "scan_id": ticket.scan_id,
             "projects_scanned": len(results),
             "results": [
                 {
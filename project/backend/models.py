@@ -34,6 +34,10 @@ class TopicStatus(BaseModel):
     html_hash: Optional[str] = None
     txt_hash: Optional[str] = None
     mp3_hash: Optional[str] = None
+    mp3_duration_ms: int = 0
+    mp3_bitrate: Optional[int] = None
+    mp3_sample_rate: Optional[int] = None
+    mp3_channels: Optional[int] = None
     updated_at: Optional[str] = None
 
     @property
@@ -0,0 +1,75 @@
+"""
+パフォーマンス計測ユーティリティ
+イベントループ遅延（ループラグ）の計測
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ループラグのサンプリング間隔
+LOOP_LAG_INTERVAL_MS = 50
+
+
+class LoopLagMonitor:
+    """イベントループ遅延モニター
+
+    一定間隔で sleep し、予定時刻からの超過分をループラグとして記録する。
+    ブロッキング処理がイベントループを占有していると値が大きくなる。
+
+    Usage:
+        async with LoopLagMonitor() as lag:
+            await heavy_work()
+        logger.info(lag.summary())
+    """
+
+    def __init__(self, interval_ms: int = LOOP_LAG_INTERVAL_MS):
+        self.interval = interval_ms / 1000.0
+        self.samples = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - expected)
+            self.samples += 1
+            self.total_lag += lag
+            if lag > self.max_lag:
+                self.max_lag = lag
+
+    def start(self) -> None:
+        """計測開始"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """計測停止"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def __aenter__(self) -> "LoopLagMonitor":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.stop()
+
+    def summary(self) -> Dict[str, float]:
+        """計測結果（ミリ秒）"""
+        avg = self.total_lag / self.samples if self.samples else 0.0
+        return {
+            'samples': self.samples,
+            'max_ms': round(self.max_lag * 1000, 1),
+            'avg_ms': round(avg * 1000, 1),
+        }
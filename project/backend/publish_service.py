@@ -17,57 +17,13 @@ import httpx
 import firebase_admin
 from firebase_admin import credentials, auth, firestore
 
+from .filename_grammar import parse_topic_name
+
 from dotenv import load_dotenv
 load_dotenv(os.path.expanduser("~/.config/ai-agents/profiles/default.env"))
 
 logger = logging.getLogger(__name__)
 
-# レベルプレフィックスの順序マッピング
-# intro/beginner(入門) → basic/elementary(初級) → intermediate(中級) → advanced(上級)
-LEVEL_ORDER = {
-    'intro': 0, 'introduction': 0, 'beginner': 0,
-    'basic': 1, 'elementary': 1,
-    'intermediate': 2,
-    'advanced': 3,
-}
-
-
-def get_topic_sort_key(topic: Dict[str, Any]) -> tuple:
-    """トピックのソートキーを生成（レベル→章→話の順）
-
-    対応パターン:
-      A: intro-1-1, basic-2-3, advanced_1-1  (レベルプレフィックス)
-      B: beginner/0-1_intro (レベルサブフォルダ)
-      C: 01-01_xxx (2階層数値)
-      D: 1-1-1_xxx (3階層数値)
-    """
-    subfolder = topic.get('subfolder', '') or ''
-    base_name = topic.get('base_name', '')
-    level_order = 0
-
-    # サブフォルダからレベル検出
-    if subfolder:
-        folder = subfolder.split('/')[-1].lower()
-        level_order = LEVEL_ORDER.get(folder, 0)
-
-    # パターンA: レベルプレフィックス "intro-1-1", "advanced_2-3"
-    m = re.match(r'^([a-zA-Z]+)[-_](\d+)[-_](\d+)', base_name)
-    if m:
-        level_order = LEVEL_ORDER.get(m.group(1).lower(), 99)
-        return (level_order, int(m.group(2)), int(m.group(3)), base_name)
-
-    # パターンD: 3階層数値 "1-1-1_title"
-    m = re.match(r'^(\d+)[-_](\d+)[-_](\d+)', base_name)
-    if m:
-        return (int(m.group(1)), int(m.group(2)), int(m.group(3)), base_name)
-
-    # パターンC: 2階層数値 "01-01_title"
-    m = re.match(r'^(\d+)[-_](\d+)', base_name)
-    if m:
-        return (level_order, int(m.group(1)), int(m.group(2)), base_name)
-
-    return (99, 0, 0, base_name)
-
 
 def extract_episode_number(base_name: str) -> str | None:
     """ファイル名からエピソード番号を抽出
@@ -75,23 +31,7 @@ def extract_episode_number(base_name: str) -> str | None:
     Returns:
       "intro-1-1", "1-2", "1-1-1" 等。マッチしなければ None
     """
-    # パターンA: レベルプレフィックス "intro-1-1", "advanced_2-3"
-    m = re.match(r'^([a-zA-Z]+)[-_](\d+)[-_](\d+)', base_name)
-    if m:
-        level = m.group(1).lower()
-        return f"{level}-{int(m.group(2))}-{int(m.group(3))}"
-
-    # パターンD: 3階層数値 "1-1-1_title"
-    m = re.match(r'^(\d+)[-_](\d+)[-_](\d+)', base_name)
-    if m:
-        return f"{int(m.group(1))}-{int(m.group(2))}-{int(m.group(3))}"
-
-    # パターンC: 2階層数値 "01-01_title"
-    m = re.match(r'^(\d+)[-_](\d+)', base_name)
-    if m:
-        return f"{int(m.group(1))}-{int(m.group(2))}"
-
-    return None
+    return parse_topic_name(base_name).episode_number
 
 
 # Firebase設定
@@ -325,7 +265,10 @@ class PublishService:
         progress_callback=None,
         access_type: str = 'public'
     ) -> PublishResult:
-        """プロジェクトのコンテンツを公開（サブフォルダ→子教室対応）"""
+        """プロジェクトのコンテンツを公開（サブフォルダ→子教室対応）
+
+        topics は Database.get_topics_by_project の順序（sort_key: レベル→章→話）で渡す。
+        """
         result = PublishResult()
 
         try:
@@ -340,10 +283,8 @@ class PublishService:
 
             # 公開対象トピック（HTML or MP3が存在するもの）
             content_path = Path(project_path) / "content"
+            # 順序は DB の sort_key 順（入門→初級→中級→上級、章→話）のまま
             publishable = [t for t in topics if t.get('has_html') or t.get('has_mp3')]
-
-            # レベル対応ソート（入門→初級→中級→上級、章→話の順）
-            publishable.sort(key=get_topic_sort_key)
             result.total_contents = len(publishable)
 
             # サブフォルダ別にグループ化
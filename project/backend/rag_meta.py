@@ -0,0 +1,148 @@
+"""
+rag_chunks.json メタデータプローブ
+パフォーマンス最適化: 数十MBのチャンクファイルを全体パースせず、先頭（または末尾）の chunk_count だけを読む
+"""
+
+import json
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_RAG_META_CACHE_SIZE = 1024
+
+# 先頭・末尾から読むバイト数（これ以下のファイルは全体をパース）
+PROBE_BYTES = 64 * 1024
+
+# 末尾に書かれた chunk_count（トップレベルの最後のキー）
+_TAIL_CHUNK_COUNT = re.compile(r'"chunk_count"\s*:\s*(\d+)\s*\}\s*$')
+_WHITESPACE = re.compile(r'\s*')
+_decoder = json.JSONDecoder()
+
+
+def _probe_head(head: str) -> Optional[int]:
+    """先頭のトップレベルキーを順に読み、chunk_count を返す
+
+    chunk_count より前に読み切れない値（chunks 配列など）があれば None。
+    """
+    pos = _WHITESPACE.match(head, 0).end()
+    if head[pos:pos + 1] != '{':
+        raise ValueError("rag_chunks.json is not a JSON object")
+    pos += 1
+    while True:
+        pos = _WHITESPACE.match(head, pos).end()
+        try:
+            key, pos = _decoder.raw_decode(head, pos)
+            pos = _WHITESPACE.match(head, pos).end()
+            if head[pos:pos + 1] != ':':
+                return None
+            pos = _WHITESPACE.match(head, pos + 1).end()
+            value, pos = _decoder.raw_decode(head, pos)
+        except ValueError:
+            return None
+        if key == 'chunk_count':
+            return value if isinstance(value, int) else None
+        pos = _WHITESPACE.match(head, pos).end()
+        if head[pos:pos + 1] != ',':
+            return None
+        pos += 1
+
+
+def read_rag_chunk_count(path: Path) -> Optional[int]:
+    """rag_chunks.json のチャンク数（ファイルが無ければ None、ブロッキング）
+
+    先頭 → 末尾の順に chunk_count を探し、どちらにも無い場合のみ全体をパースする。
+    """
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+    with f:
+        size = path.stat().st_size
+        if size <= PROBE_BYTES * 2:
+            return json.loads(f.read().decode('utf-8')).get('chunk_count', 0)
+
+        head = f.read(PROBE_BYTES).decode('utf-8', errors='ignore')
+        count = _probe_head(head)
+        if count is not None:
+            return count
+
+        f.seek(size - PROBE_BYTES)
+        tail = f.read().decode('utf-8', errors='ignore')
+        match = _TAIL_CHUNK_COUNT.search(tail)
+        if match:
+            return int(match.group(1))
+
+        logger.debug(f"chunk_count not found in header/tail, parsing full file: {path}")
+        f.seek(0)
+        return json.load(f).get('chunk_count', 0)
+
+
+class RagChunksMetaCache:
+    """rag_chunks.json のチャンク数キャッシュ（パス → (mtime_ns, size) で検証、スレッドセーフ）"""
+
+    def __init__(self, max_size: int = MAX_RAG_META_CACHE_SIZE):
+        self._cache: OrderedDict[str, Tuple[Tuple[int, int], int]] = OrderedDict()
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def chunk_count(self, path: Path) -> Optional[int]:
+        """チャンク数を取得（ファイルが無ければ None、パース失敗時は例外）"""
+        key = str(path)
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            with self._lock:
+                self._cache.pop(key, None)
+            return None
+        sig = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == sig:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return cached[1]
+            self._misses += 1
+
+        count = read_rag_chunk_count(path)
+        if count is None:
+            return None
+        with self._lock:
+            self._cache[key] = (sig, count)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._max_size:
+                self._cache.popitem(last=False)
+        return count
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'size': len(self._cache),
+                'hits': self._hits,
+                'misses': self._misses,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._hits = 0
+            self._misses = 0
+
+
+_rag_meta_cache = RagChunksMetaCache()
+
+
+def get_rag_chunk_count(path: Path) -> Optional[int]:
+    """チャンク数をキャッシュ経由で取得"""
+    return _rag_meta_cache.chunk_count(path)
+
+
+def clear_rag_meta_cache() -> None:
+    """チャンク数キャッシュをクリア"""
+    _rag_meta_cache.clear()
@@ -0,0 +1,98 @@
+"""
+外部RAGビルド進捗のファストパス
+パフォーマンス最適化: rag_build_progress.json の変更はフルスキャンせず、JSONを直接読んでDB更新 + WebSocket通知
+"""
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+import logging
+
+from .database import Database
+from .websocket import ConnectionManager
+
+logger = logging.getLogger(__name__)
+
+# これより長く更新のない進捗ファイルは終了済みのビルドとして無視する（秒）
+RAG_PROGRESS_STALE_SECONDS = 600
+
+# 外部ビルドのステータス → rag_indexes.status
+RAG_PROGRESS_STATUS_MAP = {
+    'chunking': 'chunks_ready',
+    'embedding': 'indexing',
+    'testing': 'indexing',
+    'completed': 'indexed',
+    'failed': 'failed',
+}
+
+
+async def handle_rag_build_progress(
+    db: Database,
+    ws: ConnectionManager,
+    project_name: str,
+    progress_path: str
+) -> None:
+    """rag_build_progress.json のファストパス処理（JSONを直接読み、DB更新 + WebSocket broadcast）
+
+    読み込み・パースはエグゼキューターで行う（RAG構築中は最も頻繁に更新されるファイル）。
+    """
+    try:
+        # スタル判定: 10分以上更新がないファイルは None（スキップ）
+        progress_data = await asyncio.get_running_loop().run_in_executor(
+            None, read_rag_build_progress, Path(progress_path)
+        )
+        if progress_data is None:
+            return
+
+        project = await db.get_project_by_name(project_name)
+        if not project:
+            return
+
+        project_id = project['id']
+        ext_status = progress_data.get('status', '')
+        mapped_status = RAG_PROGRESS_STATUS_MAP.get(ext_status, 'indexing')
+        details = progress_data.get('details') or {}
+
+        # エージェントが明示的に書いた進捗は常に信頼する
+        await db.update_rag_build_progress(
+            project_id=project_id,
+            status=mapped_status,
+            build_phase=progress_data.get('phase', ''),
+            build_message=progress_data.get('message', ''),
+            build_percent=progress_data.get('progress_percent', 0),
+            chunk_count=details.get('chunk_count')
+        )
+
+        # WebSocket broadcast（軽量イベント）
+        await ws.broadcast("rag_external_progress", {
+            "project_id": project_id,
+            "project_name": project_name,
+            "status": ext_status,
+            "phase": progress_data.get('phase', ''),
+            "message": progress_data.get('message', ''),
+            "progress_percent": progress_data.get('progress_percent', 0),
+            "details": details,
+            "mapped_status": mapped_status
+        })
+
+        logger.info(f"RAG progress fast-path: {project_name} ({ext_status}, {progress_data.get('progress_percent', 0)}%)")
+
+    except Exception as e:
+        logger.warning(f"RAG progress fast-path error for {project_name}: {e}")
+
+
+def read_rag_build_progress(path: Path, stale_seconds: float = RAG_PROGRESS_STALE_SECONDS) -> Optional[Dict[str, Any]]:
+    """rag_build_progress.json を読み込む（ブロッキング、エグゼキューターで実行）
+
+    ファイルが無い、または stale_seconds 以上更新がない場合は None。
+    """
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    if time.time() - mtime > stale_seconds:
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
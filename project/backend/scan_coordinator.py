@@ -0,0 +1,296 @@
+"""
+スキャンコーディネーター
+パフォーマンス最適化: 重複スキャン要求の合流、実行中の要求は後続スキャン1回にまとめる
+"""
+
+import asyncio
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+import logging
+
+from .database import Database
+from .file_events import FileEvent
+from .scanner import AsyncScanner, ScanResult
+from .websocket import get_connection_manager
+
+logger = logging.getLogger(__name__)
+
+# 全プロジェクトスキャンのキー
+FULL_SCAN_KEY = '*'
+# プロジェクト単位の反映処理の種別（プロジェクト全体スキャンとは別キーで合流・直列化する）
+# events: ファイルイベント / wbs: WBS.json の再パース / rag_chunks: チャンク数のプローブ
+PROJECT_UPDATE_KINDS = ('events', 'wbs', 'rag_chunks')
+# scan_history に記録するスキャン種別（initial / watch は記録しない）
+RECORDED_SCAN_TYPES = ('full', 'diff')
+# scan_started / scan_progress / scan_completed を通知するスキャン種別
+ANNOUNCED_SCAN_TYPES = ('full', 'diff', 'initial')
+
+
+@dataclass
+class ScanJob:
+    """実行中または待機中のスキャン（同じ対象への要求はこの1件に合流する）"""
+    scan_id: str
+    scan_type: str
+    project_id: Optional[int] = None
+    project_path: Optional[Path] = None       # None: 全プロジェクト
+    kind: str = 'scan'                        # 'scan' または PROJECT_UPDATE_KINDS
+    events: Optional[List[FileEvent]] = None  # kind='events' のファイルイベント（発生順）
+    paranoid: Optional[bool] = None
+    requests: int = 1
+    future: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+    @property
+    def key(self) -> str:
+        if self.project_path is None:
+            return FULL_SCAN_KEY
+        if self.kind != 'scan':
+            return f"{self.kind}:{self.project_path}"
+        return str(self.project_path)
+
+    def merge(self, other: "ScanJob") -> None:
+        """後から来た要求を取り込む（同じキーの要求のみ。paranoid は広い方に揃える）"""
+        self.requests += 1
+        if self.events is not None:
+            self.events.extend(other.events)
+        if other.paranoid:
+            self.paranoid = True
+
+
+@dataclass(frozen=True)
+class ScanTicket:
+    """スキャン要求の受付結果
+
+    scan_id はこの要求を実際にカバーするスキャンのID。
+    coalesced: 待機中のスキャンに合流した / queued: 実行中スキャンの完了後に実行される
+    """
+    scan_id: str
+    coalesced: bool
+    queued: bool
+    future: asyncio.Future
+
+    async def wait(self) -> List[ScanResult]:
+        """スキャン完了まで待って結果を返す"""
+        return await asyncio.shield(self.future)
+
+
+class ScanCoordinator:
+    """スキャン要求の受付・合流・直列化
+
+    - 対象（全プロジェクト or プロジェクトパス）ごとに実行中1件・待機中1件まで
+    - 実行中の対象への要求は待機中スキャンを1件作り、以降の要求はそこへ合流する
+      （実行中のスキャンは要求より前にファイルを読んだ可能性があるため合流させない）
+    - 全プロジェクトスキャンが待機中なら、単一プロジェクトの要求もそこへ合流する
+    - ファイルイベント・WBS.json・rag_chunks.json の反映要求は同じ種別の要求にのみ合流する
+      （ディレクトリ mtime で枝刈りするプロジェクト全体スキャンはイベントのパスを
+      読み直すとは限らないため、合流させるとイベントが失われうる）
+    - 同一プロジェクトの同時スキャンはスキャナーのプロジェクトロックで直列化される
+    """
+
+    def __init__(self, scanner: AsyncScanner, db: Database):
+        self.scanner = scanner
+        self.db = db
+        self._running: Dict[str, ScanJob] = {}
+        self._pending: Dict[str, ScanJob] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def request_full_scan(self, scan_type: str = 'full', paranoid: Optional[bool] = None) -> ScanTicket:
+        """全プロジェクトスキャンを要求"""
+        return self._submit(self._new_job(scan_type, paranoid=paranoid))
+
+    def request_project_scan(
+        self,
+        project_path: Path,
+        project_id: Optional[int] = None,
+        scan_type: str = 'full',
+        paranoid: Optional[bool] = None
+    ) -> ScanTicket:
+        """単一プロジェクトスキャンを要求"""
+        return self._submit(self._new_job(
+            scan_type, project_id=project_id, project_path=project_path, paranoid=paranoid
+        ))
+
+    def request_changed_paths(self, project_path: Path, paths: List[str]) -> ScanTicket:
+        """変更パスのインクリメンタルスキャンを要求（待機中の要求とはパスを合算）"""
+        return self.request_file_events(project_path, [FileEvent('modified', path) for path in paths])
+
+    def request_file_events(self, project_path: Path, events: List[FileEvent]) -> ScanTicket:
+        """ファイルイベントの反映を要求（待機中の要求とはイベントを発生順に連結）"""
+        return self._submit(self._new_job(
+            'watch', project_path=project_path, kind='events', events=list(events)
+        ))
+
+    def request_wbs_change(self, project_path: Path) -> ScanTicket:
+        """WBS.json の変更の反映（再パースしてトピック集合の差分のみ）を要求"""
+        return self._submit(self._new_job('watch', project_path=project_path, kind='wbs'))
+
+    def request_rag_chunks_refresh(self, project_path: Path) -> ScanTicket:
+        """rag_chunks.json の変更の反映（チャンク数のプローブのみ）を要求"""
+        return self._submit(self._new_job('watch', project_path=project_path, kind='rag_chunks'))
+
+    def status(self) -> Dict[str, Any]:
+        """実行中・待機中のスキャン（ログ・デバッグ用）"""
+        return {
+            'running': {key: job.scan_id for key, job in self._running.items()},
+            'pending': {key: job.scan_id for key, job in self._pending.items()},
+        }
+
+    async def shutdown(self) -> None:
+        """実行中のスキャンをキャンセル"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    @staticmethod
+    def _new_job(scan_type: str, **kwargs) -> ScanJob:
+        scan_id = f"scan_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        return ScanJob(scan_id=scan_id, scan_type=scan_type, **kwargs)
+
+    def _submit(self, job: ScanJob) -> ScanTicket:
+        key = job.key
+
+        # 待機中の全プロジェクトスキャンはプロジェクトスキャンの要求をカバーする
+        pending = self._pending.get(key)
+        if pending is None and job.kind == 'scan':
+            pending = self._pending.get(FULL_SCAN_KEY)
+        if pending is not None:
+            pending.merge(job)
+            logger.info(f"Scan request coalesced into {pending.scan_id} ({pending.requests} requests)")
+            return ScanTicket(pending.scan_id, coalesced=True, queued=True, future=pending.future)
+
+        if key in self._running:
+            self._pending[key] = job
+            logger.info(f"Scan {job.scan_id} queued after {self._running[key].scan_id}")
+            return ScanTicket(job.scan_id, coalesced=False, queued=True, future=job.future)
+
+        self._running[key] = job
+        task = asyncio.create_task(self._drain(key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return ScanTicket(job.scan_id, coalesced=False, queued=False, future=job.future)
+
+    async def _drain(self, key: str) -> None:
+        """実行中スキャンの完了後、待機中のスキャンを順に実行"""
+        job: Optional[ScanJob] = self._running[key]
+        try:
+            while job is not None:
+                await self._execute(job)
+                job = self._pending.pop(key, None)
+                if job is not None:
+                    self._running[key] = job
+        finally:
+            # キャンセル時は実行中・待機中の要求を打ち切る
+            self._running.pop(key, None)
+            for unfinished in (job, self._pending.pop(key, None)):
+                if unfinished is not None and not unfinished.future.done():
+                    unfinished.future.cancel()
+
+    async def _execute(self, job: ScanJob) -> None:
+        """1件のスキャンを実行し、履歴・WebSocket 通知を行う"""
+        ws = get_connection_manager()
+        announce = job.scan_type in ANNOUNCED_SCAN_TYPES
+        record = job.scan_type in RECORDED_SCAN_TYPES
+        start_time = datetime.now()
+
+        try:
+            if record:
+                await self.db.create_scan_history(
+                    scan_id=job.scan_id,
+                    scan_type=job.scan_type,
+                    project_id=job.project_id
+                )
+            if announce:
+                await ws.broadcast_scan_started(job.scan_id, job.project_id, job.scan_type)
+
+            async def progress_callback(progress, current):
+                await ws.broadcast_scan_progress(job.scan_id, progress, current)
+
+            results = await self._run(job, progress_callback if announce else None)
+        except Exception as e:
+            logger.error(f"Scan error ({job.scan_id}): {e}")
+            if record:
+                await self.db.update_scan_history(
+                    scan_id=job.scan_id,
+                    status="failed",
+                    error_message=str(e)
+                )
+            if not job.future.done():
+                job.future.set_exception(e)
+                # 誰も待っていない場合に未取得例外の警告を出さない
+                job.future.exception()
+            return
+
+        total_files = sum(r.files_scanned for r in results)
+        total_changes = sum(r.changes_detected for r in results)
+        duration = (datetime.now() - start_time).total_seconds()
+
+        try:
+            if record:
+                await self.db.update_scan_history(
+                    scan_id=job.scan_id,
+                    status="completed",
+                    projects_scanned=len(results),
+                    files_scanned=total_files,
+                    changes_detected=total_changes
+                )
+            if announce:
+                await ws.broadcast_scan_completed(
+                    job.scan_id,
+                    {
+                        "type": job.scan_type,
+                        "projects_scanned": len(results),
+                        "files_scanned": total_files,
+                        "changes_detected": total_changes,
+                        "duration_seconds": duration
+                    }
+                )
+
+            # 各プロジェクトの更新を通知
+            for result in results:
+                project = await self.db.get_project_by_name(result.project_name)
+                if project:
+                    await ws.broadcast_project_update(dict(project))
+        except Exception as e:
+            logger.warning(f"Failed to report scan {job.scan_id}: {e}")
+
+        if not job.future.done():
+            job.future.set_result(results)
+        logger.info(
+            f"Scan completed: {job.scan_id} ({job.scan_type}, {len(results)} projects, "
+            f"{job.requests} requests) in {duration:.2f}s"
+        )
+
+    async def _run(self, job: ScanJob, progress_callback) -> List[ScanResult]:
+        if job.project_path is None:
+            return await self.scanner.scan_all_projects(
+                paranoid=job.paranoid,
+                progress_callback=progress_callback,
+                removed_callback=get_connection_manager().broadcast_projects_removed
+            )
+        if job.kind == 'events':
+            return [await self.scanner.scan_file_events(job.project_path, job.events)]
+        if job.kind == 'wbs':
+            return [await self.scanner.apply_wbs_change(job.project_path)]
+        if job.kind == 'rag_chunks':
+            # 未登録のプロジェクトは結果なし（通知なし）
+            result = await self.scanner.refresh_rag_chunks(job.project_path)
+            return [result] if result is not None else []
+        result = await self.scanner.scan_project(
+            job.project_path, paranoid=job.paranoid, progress_callback=progress_callback
+        )
+        await self.scanner.flush_hash_cache()
+        return [result]
+
+
+# シングルトン
+_coordinator: Optional[ScanCoordinator] = None
+
+
+def get_scan_coordinator(scanner: AsyncScanner, db: Database) -> ScanCoordinator:
+    """スキャンコーディネーターを取得"""
+    global _coordinator
+    if _coordinator is None:
+        _coordinator = ScanCoordinator(scanner, db)
+    return _coordinator
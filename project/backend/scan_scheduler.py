@@ -0,0 +1,283 @@
+"""
+スキャンスケジューラー
+パフォーマンス最適化: グローバルI/O予算、プロジェクトごとの公平配分、大規模プロジェクト優先
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextlib import suppress
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple, TypeVar
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+# 0 の場合は CPU 数と観測レイテンシから自動調整
+SCAN_IO_BUDGET = int(os.environ.get("SCAN_IO_BUDGET", "0"))
+SCAN_PROJECT_CONCURRENCY = int(os.environ.get("SCAN_PROJECT_CONCURRENCY", "0"))
+
+# トピック1件あたりの処理時間の目安（ローカルSSD・キャッシュ済み）。
+# これより遅いほど I/O 待ちが支配的とみなして並列度を上げる
+IO_LATENCY_TARGET_MS = 2.0
+LATENCY_EWMA_ALPHA = 0.2
+MAX_PROJECT_CONCURRENCY = 8
+
+
+@dataclass(slots=True)
+class _ProjectSlots:
+    """1プロジェクトが使用中のI/O枠数"""
+    in_use: int = 0
+
+
+class _BudgetLimiter:
+    """上限を変更できるグローバルI/O予算（スキャナーの生存期間中1つ）
+
+    上限を変えても使用中の枠は数え続けるため、実行中のトピックを含めて上限を超えない。
+    待機者ごとにプロジェクトの配分（share）を持ち、枠が空く・上限や配分が変わるたびに
+    待機順に再評価する（配分を使い切ったプロジェクトの待機者は飛ばして後続に枠を渡す）。
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self._waiters: Deque[Tuple[asyncio.Future, _ProjectSlots, Callable[[], int]]] = deque()
+
+    def resize(self, limit: int) -> None:
+        """上限を変更（拡大分はすぐ待機者に渡す）"""
+        self.limit = limit
+        self.wake()
+
+    async def acquire(self, slots: _ProjectSlots, share: Callable[[], int]) -> None:
+        """グローバル予算とプロジェクトの配分の両方に空きがあるまで待って枠を取得"""
+        waiter = (asyncio.get_running_loop().create_future(), slots, share)
+        self._waiters.append(waiter)
+        self.wake()
+        try:
+            await waiter[0]
+        except asyncio.CancelledError:
+            if waiter[0].done() and not waiter[0].cancelled():
+                # 枠を受け取った直後にキャンセルされた
+                self.release(slots)
+            else:
+                with suppress(ValueError):
+                    self._waiters.remove(waiter)
+            raise
+
+    def release(self, slots: _ProjectSlots) -> None:
+        """枠を返却"""
+        self.in_use -= 1
+        slots.in_use -= 1
+        self.wake()
+
+    def wake(self) -> None:
+        """空いている枠を配分に余裕のある待機者へ順に渡す"""
+        remaining: Deque[Tuple[asyncio.Future, _ProjectSlots, Callable[[], int]]] = deque()
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            future, slots, share = waiter
+            if future.done():
+                continue
+            if self.in_use < self.limit and slots.in_use < share():
+                self.in_use += 1
+                slots.in_use += 1
+                future.set_result(None)
+            else:
+                remaining.append(waiter)
+        self._waiters = remaining
+
+
+class ScanScheduler:
+    """プロジェクト・トピック単位のスキャン並列度を管理
+
+    - グローバルI/O予算: 全プロジェクト合計で同時実行するトピックスキャン数の上限
+    - 公平配分: 各プロジェクトが同時に使える枠は 予算 / 同時進行プロジェクト数 で、
+      トピックごとの枠取得時に再計算する（後から始まったプロジェクトにも枠が回り、
+      巨大プロジェクトがエグゼキューターを占有しない）
+    - LPT順序: 前回のスキャン時間・トピック数が大きいプロジェクトから開始し、
+      最後に巨大プロジェクトが取り残される（ストラグラー）のを防ぐ
+    """
+
+    def __init__(
+        self,
+        max_budget: int,
+        io_budget: int = SCAN_IO_BUDGET,
+        project_concurrency: int = SCAN_PROJECT_CONCURRENCY,
+        cpu_count: Optional[int] = None
+    ):
+        self.cpu_count = cpu_count or os.cpu_count() or 1
+        self.max_budget = max(1, max_budget)
+        self._fixed_budget = io_budget or None
+        self._fixed_projects = project_concurrency or None
+        self._latency_ms: Optional[float] = None
+        self.budget = self._initial_budget()
+        self._limiter = _BudgetLimiter(self.budget)
+        self._active_projects = 0
+
+    def _initial_budget(self) -> int:
+        if self._fixed_budget:
+            return max(1, min(self.max_budget, self._fixed_budget))
+        return max(1, min(self.max_budget, self.cpu_count * 2))
+
+    @property
+    def latency_ms(self) -> Optional[float]:
+        """トピック1件あたりの処理時間（指数移動平均）"""
+        return self._latency_ms
+
+    @property
+    def project_concurrency(self) -> int:
+        """同時にスキャンするプロジェクト数"""
+        if self._fixed_projects:
+            return self._fixed_projects
+        return max(2, min(MAX_PROJECT_CONCURRENCY, self.budget // 2))
+
+    def tune(self) -> int:
+        """観測レイテンシから I/O 予算を再計算（スキャン開始時に呼ぶ）
+
+        予算 = CPU数 × (1 + レイテンシ / 目標レイテンシ)。ファイル読み込みの待ちが長い
+        （ネットワークドライブ等）ほど多くの要求を同時に発行する。
+        イベントループとワーカーを重ねるため下限は CPU数 + 1、上限は max_budget。
+        """
+        if self._fixed_budget or self._latency_ms is None:
+            budget = self._initial_budget()
+        else:
+            factor = 1 + self._latency_ms / IO_LATENCY_TARGET_MS
+            budget = max(self.cpu_count + 1, math.ceil(self.cpu_count * factor))
+            budget = max(1, min(self.max_budget, budget))
+        self.budget = budget
+        self._limiter.resize(budget)
+        return budget
+
+    def record_latency(self, elapsed_ms: float) -> None:
+        """トピック1件の処理時間を記録"""
+        if self._latency_ms is None:
+            self._latency_ms = elapsed_ms
+        else:
+            self._latency_ms += LATENCY_EWMA_ALPHA * (elapsed_ms - self._latency_ms)
+
+    @staticmethod
+    def order_projects(
+        paths: Sequence[Path],
+        costs: Dict[str, Tuple[int, Optional[int]]]
+    ) -> List[Path]:
+        """見積もりコストの大きい順に並べる（未スキャンのプロジェクトは先頭）
+
+        Args:
+            costs: プロジェクトパス → (total_topics, last_scan_duration_ms)
+        """
+        def key(path: Path) -> Tuple[int, int, int]:
+            cost = costs.get(str(path))
+            if cost is None:
+                return (1, 0, 0)
+            topics, duration_ms = cost
+            return (0, duration_ms or 0, topics)
+
+        return sorted(paths, key=key, reverse=True)
+
+    def fair_share(self) -> int:
+        """現在の同時進行プロジェクト数で予算を分けた、1プロジェクトが同時に使える枠数"""
+        return max(1, math.ceil(self.budget / max(1, self._active_projects)))
+
+    async def run_projects(
+        self,
+        paths: Sequence[Path],
+        scan: Callable[[Path], Awaitable[R]]
+    ) -> List[Any]:
+        """プロジェクトを順序どおりに project_concurrency 並列でスキャン
+
+        Returns:
+            paths と同じ順序の結果リスト（例外はそのまま要素として返す）
+        """
+        results: List[Any] = [None] * len(paths)
+        queue = iter(enumerate(paths))
+
+        async def worker() -> None:
+            for i, path in queue:
+                try:
+                    results[i] = await scan(path)
+                except Exception as e:
+                    results[i] = e
+
+        workers = min(len(paths), self.project_concurrency)
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        return results
+
+    async def map_topics(
+        self,
+        items: Sequence[T],
+        func: Callable[[T], Awaitable[R]]
+    ) -> List[R]:
+        """1プロジェクト内のトピックを公平配分のワーカー数で処理（入力順の結果リスト）"""
+        results: List[Any] = [None] * len(items)
+        async for i, result in self.iter_topics(items, func):
+            results[i] = result
+        return results
+
+    async def iter_topics(
+        self,
+        items: Sequence[T],
+        func: Callable[[T], Awaitable[R]]
+    ) -> AsyncIterator[Tuple[int, R]]:
+        """トピックを公平配分の枠で処理し、完了順に (インデックス, 結果) を返す
+
+        各トピックはグローバル予算とプロジェクトの配分の枠を取得してから実行する。
+        配分は取得のたびに同時進行プロジェクト数から再計算する。結果キューは
+        ワーカー数程度に制限され、消費側が遅い場合はワーカーが待つ（メモリを一定に保つ）。
+        途中で反復をやめた場合は残りのワーカーをキャンセルする。
+        """
+        if not items:
+            return
+        limiter = self._limiter
+        slots = _ProjectSlots()
+
+        # 配分が広がった場合に備えて予算の上限までワーカーを用意（配分を超える分は枠待ち）
+        workers = min(len(items), self.max_budget)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+        source = iter(enumerate(items))
+
+        async def worker() -> None:
+            for i, item in source:
+                await limiter.acquire(slots, self.fair_share)
+                try:
+                    start = time.perf_counter()
+                    result = await func(item)
+                    self.record_latency((time.perf_counter() - start) * 1000)
+                finally:
+                    limiter.release(slots)
+                await queue.put((i, result, None))
+
+        async def run_worker() -> None:
+            try:
+                await worker()
+            except Exception as e:
+                await queue.put((None, None, e))
+
+        self._active_projects += 1
+        tasks = [asyncio.create_task(run_worker()) for _ in range(workers)]
+        try:
+            for _ in range(len(items)):
+                i, result, error = await queue.get()
+                if error is not None:
+                    raise error
+                yield i, result
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._active_projects -= 1
+            # 残りのプロジェクトの配分が広がる
+            limiter.wake()
+
+    def summary(self) -> Dict[str, Any]:
+        """現在の設定値（ログ用）"""
+        return {
+            'budget': self.budget,
+            'projects': self.project_concurrency,
+            'latency_ms': round(self._latency_ms, 2) if self._latency_ms is not None else None,
+        }
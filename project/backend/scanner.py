@@ -4,31 +4,63 @@
 """
 
 import asyncio
-import aiofiles
-import json
-import re
+import math
+import os
+import threading
+import time
 import unicodedata
 from pathlib import Path
-from typing import Optional, List, Dict, Set, Tuple
-from collections import defaultdict
-from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, List, Dict, Set, Tuple
+from collections import defaultdict, OrderedDict
+from contextlib import AsyncExitStack
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
-from functools import lru_cache
-import xxhash
+from functools import lru_cache, partial
 import logging
-from tinytag import TinyTag
 
-from .wbs_parser import parse_wbs, ParsedTopic, detect_wbs_format, clear_wbs_cache
+from .file_events import FileEvent
+from .wbs_parser import ParsedTopic, clear_wbs_cache, load_wbs, wbs_cache_stats
+from .rag_meta import clear_rag_meta_cache, get_rag_chunk_count
+from .filename_grammar import clear_topic_name_cache, parse_topic_name
 from .database import Database
+from .dir_index import DirectoryIndex, EXCLUDED_DIRS, ProjectDirState, stat_signature
+from .audio_meta import AudioMetadata, AudioMetadataCache, read_audio_metadata
+from .hashing import HashEngine
+from .perf import LoopLagMonitor
+from .scan_scheduler import ScanScheduler
 
 logger = logging.getLogger(__name__)
 
 # キャッシュ設定
-MAX_HASH_CACHE_SIZE = 1000
-HASH_TTL_SECONDS = 300
+MAX_HASH_CACHE_SIZE = 50000
 
+# ブロッキング処理（stat・ハッシュ計算・MP3タグ解析・JSON読み込み）用スレッド数
+SCAN_WORKERS = int(os.environ.get("SCAN_WORKERS", min(16, (os.cpu_count() or 1) + 4)))
 
-@dataclass
+# フルスキャンをプロジェクト単位でプロセス分割する際のワーカー数（0/1 = 無効）
+SCAN_PROCESS_WORKERS = int(os.environ.get("SCAN_PROCESS_WORKERS", "0"))
+# 1ワーカーあたりのシャード数（小さいシャードで負荷を平準化）
+SHARDS_PER_PROCESS = 4
+
+# 0 の場合はディレクトリ mtime による未変更プロジェクトの枝刈りを行わない
+# （枝刈りしたプロジェクトも既知の成果物は stat シグネチャで確認する）
+SCAN_DIR_PRUNING = os.environ.get("SCAN_DIR_PRUNING", "1") == "1"
+
+# 進捗通知の最小間隔（秒）
+PROGRESS_INTERVAL = 0.25
+
+# トピック対象外のファイル・フォルダ
+EXCLUDED_BASES = {'index', '_fix_report'}
+TOPIC_EXTENSIONS = {'.html', '.txt', '.mp3'}
+SSML_SUFFIX = '_ssml.txt'
+# トピックの成果物（種別, ファイル名サフィックス）
+TOPIC_ARTIFACTS = (('html', '.html'), ('txt', '.txt'), ('mp3', '.mp3'), ('ssml', SSML_SUFFIX))
+# MP3 の削除・移動時に合わせてクリア・付け替えるメタデータ
+MP3_META_FIELDS = ('mp3_duration_ms', 'mp3_bitrate', 'mp3_sample_rate', 'mp3_channels')
+
+
+@dataclass(slots=True)
 class FileInfo:
     """ファイル情報"""
     path: Path
@@ -37,7 +69,69 @@ class FileInfo:
     size: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
+class TopicScan:
+    """トピック1件のスキャン結果（トピック数だけ生成されるため __slots__ で小さく保つ）
+
+    DB層・フィンガープリントには Mapping として渡す（get / [] でフィールドを参照できる）。
+    """
+    base_name: str
+    topic_id: Optional[str] = None
+    chapter: Optional[str] = None
+    title: Optional[str] = None
+    subfolder: Optional[str] = None
+    has_html: bool = False
+    has_txt: bool = False
+    has_mp3: bool = False
+    has_ssml: bool = False
+    html_hash: Optional[str] = None
+    txt_hash: Optional[str] = None
+    mp3_hash: Optional[str] = None
+    ssml_hash: Optional[str] = None
+    html_sig: Optional[str] = None
+    txt_sig: Optional[str] = None
+    mp3_sig: Optional[str] = None
+    ssml_sig: Optional[str] = None
+    mp3_duration_ms: int = 0
+    mp3_bitrate: Optional[int] = None
+    mp3_sample_rate: Optional[int] = None
+    mp3_channels: Optional[int] = None
+    files_scanned: int = 0
+    changes: int = 0
+
+    @classmethod
+    def for_topic(cls, topic: ParsedTopic) -> "TopicScan":
+        return cls(
+            base_name=topic.base_name,
+            topic_id=topic.topic_id,
+            chapter=topic.chapter,
+            title=topic.title,
+            subfolder=topic.subfolder,
+        )
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "TopicScan":
+        """保存済みのトピック行（ファイル状態）から作成"""
+        result = cls(**{name: row[name] for name in cls.__slots__ if name in row})
+        for kind, _ in TOPIC_ARTIFACTS:
+            setattr(result, f'has_{kind}', bool(row.get(f'has_{kind}')))
+        result.mp3_duration_ms = row.get('mp3_duration_ms') or 0
+        return result
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+@dataclass(slots=True)
 class ScanResult:
     """スキャン結果"""
     project_name: str
@@ -50,292 +144,1448 @@ class ScanResult:
     mp3_total_duration_ms: int = 0
     files_scanned: int = 0
     changes_detected: int = 0
+    topics_inserted: int = 0
+    topics_updated: int = 0
+    topics_unchanged: int = 0
+    topics_deleted: int = 0
+    skipped: bool = False        # ディレクトリ mtime・WBS.json が前回と同じでトピック走査を省略
     duration_ms: float = 0
-    topics: List[Dict] = field(default_factory=list)
+    topics: Optional[List[TopicScan]] = None   # keep_topics=True の場合のみトピックごとの結果
+
+
+# 進捗コールバック (progress: 0.0〜1.0, current: "プロジェクト名/base_name")
+ProgressCallback = Callable[[float, str], Awaitable[None]]
+# 削除したプロジェクト [{'id', 'name', 'path'}] の通知
+ProjectsRemovedCallback = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+
+class ProgressReporter:
+    """スキャン進捗の集計と通知の間引き
+
+    プロジェクトごとの完了率を平均して全体の進捗とし、コールバックは
+    PROGRESS_INTERVAL 秒に1回まで呼ぶ（finish は必ず通知）。
+    """
+
+    def __init__(
+        self,
+        callback: ProgressCallback,
+        project_count: int = 1,
+        min_interval: float = PROGRESS_INTERVAL
+    ):
+        self.callback = callback
+        self.project_count = max(1, project_count)
+        self.min_interval = min_interval
+        self._fractions: Dict[str, float] = {}
+        self._last_sent = 0.0
+
+    @property
+    def progress(self) -> float:
+        return min(1.0, sum(self._fractions.values()) / self.project_count)
+
+    async def update(self, project_name: str, done: int, total: int, current: str) -> None:
+        """プロジェクト内の進捗を更新（間隔内の更新は通知しない）"""
+        self._fractions[project_name] = done / total if total else 1.0
+        now = time.monotonic()
+        if now - self._last_sent < self.min_interval:
+            return
+        self._last_sent = now
+        await self._send(self.progress, current)
+
+    async def finish(self, current: str = "") -> None:
+        """完了を通知"""
+        self._last_sent = time.monotonic()
+        await self._send(1.0, current)
+
+    async def _send(self, progress: float, current: str) -> None:
+        try:
+            await self.callback(round(progress, 4), current)
+        except Exception as e:
+            logger.debug(f"Progress callback failed: {e}")
 
 
 class HashCache:
-    """LRUハッシュキャッシュ（高速差分検出用）"""
+    """LRUハッシュキャッシュ（高速差分検出用）
+
+    パスごとに (hash, stat シグネチャ) を保持する。OrderedDict による O(1) の
+    LRU 追い出しを行い、SQLite への永続化（warm / flush）に対応する。
+    """
 
     def __init__(self, max_size: int = MAX_HASH_CACHE_SIZE):
-        self._cache: Dict[str, Tuple[str, float]] = {}
+        self._cache: "OrderedDict[str, Tuple[str, Optional[str]]]" = OrderedDict()
         self._max_size = max_size
-
-    def get(self, path: str) -> Optional[str]:
-        """キャッシュからハッシュを取得"""
-        if path in self._cache:
-            hash_val, timestamp = self._cache[path]
-            # TTLチェック
-            if (datetime.now().timestamp() - timestamp) < HASH_TTL_SECONDS:
-                return hash_val
-            else:
-                del self._cache[path]
-        return None
-
-    def set(self, path: str, hash_val: str) -> None:
+        self._dirty: Set[str] = set()
+        # スキャナーのワーカースレッドからも参照されるためロックで保護
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: str, sig: Optional[str] = None) -> Optional[str]:
+        """キャッシュからハッシュを取得（sig 指定時はシグネチャ一致時のみヒット）"""
+        with self._lock:
+            entry = self._cache.get(path)
+            if entry is None or (sig is not None and entry[1] != sig):
+                self.misses += 1
+                return None
+            self._cache.move_to_end(path)
+            self.hits += 1
+            return entry[0]
+
+    @property
+    def max_size(self) -> int:
+        """最大エントリ数"""
+        return self._max_size
+
+    def peek(self, path: str) -> Optional[str]:
+        """統計・LRU順序を変えずにハッシュを参照"""
+        entry = self._cache.get(path)
+        return entry[0] if entry else None
+
+    def set(self, path: str, hash_val: str, sig: Optional[str] = None) -> None:
         """ハッシュをキャッシュに保存"""
-        # LRU: キャッシュが満杯なら最古を削除
-        if len(self._cache) >= self._max_size:
-            oldest_key = min(self._cache, key=lambda k: self._cache[k][1])
-            del self._cache[oldest_key]
-
-        self._cache[path] = (hash_val, datetime.now().timestamp())
+        with self._lock:
+            if path in self._cache:
+                self._cache.move_to_end(path)
+            self._cache[path] = (hash_val, sig)
+            self._dirty.add(path)
+
+            # LRU: キャッシュが満杯なら最古を削除（O(1)）
+            while len(self._cache) > self._max_size:
+                oldest_key, _ = self._cache.popitem(last=False)
+                self._dirty.discard(oldest_key)
+                self.evictions += 1
 
     def is_changed(self, path: str, new_hash: str) -> bool:
         """ファイルが変更されたか判定"""
         old_hash = self.get(path)
         return old_hash is None or old_hash != new_hash
 
+    def load(self, entries: List[Tuple[str, str, Optional[str]]]) -> None:
+        """永続化済みエントリ (path, hash, sig) を読み込み（古い順に渡すこと）"""
+        with self._lock:
+            for path, hash_val, sig in entries:
+                self._cache[path] = (hash_val, sig)
+                self._cache.move_to_end(path)
+            while len(self._cache) > self._max_size:
+                self._cache.popitem(last=False)
+
+    def drain_dirty(self) -> List[Tuple[str, str, Optional[str]]]:
+        """前回 flush 以降に更新されたエントリを LRU の古い順に取り出す"""
+        with self._lock:
+            if not self._dirty:
+                return []
+            entries = [
+                (path, *entry) for path, entry in self._cache.items() if path in self._dirty
+            ]
+            self._dirty.clear()
+        return entries
+
+    def discard_prefix(self, prefix: str) -> int:
+        """prefix で始まるパスのエントリを削除（削除されたプロジェクト用）"""
+        with self._lock:
+            paths = [path for path in self._cache if path.startswith(prefix)]
+            for path in paths:
+                del self._cache[path]
+                self._dirty.discard(path)
+        return len(paths)
+
+    def stats(self) -> Dict[str, int]:
+        """ヒット・ミス・追い出し件数"""
+        return {
+            'size': len(self._cache),
+            'max_size': self._max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
     def clear(self) -> None:
         """キャッシュをクリア"""
-        self._cache.clear()
+        with self._lock:
+            self._cache.clear()
+            self._dirty.clear()
 
 
 class AsyncScanner:
     """高速非同期ファイルスキャナー"""
 
-    def __init__(self, db: Database, base_path: Path):
+    def __init__(
+        self,
+        db: Database,
+        base_path: Path,
+        paranoid: bool = False,
+        max_workers: int = SCAN_WORKERS,
+        hash_engine: Optional[HashEngine] = None,
+        scheduler: Optional[ScanScheduler] = None,
+        process_workers: int = SCAN_PROCESS_WORKERS,
+        dir_pruning: bool = SCAN_DIR_PRUNING
+    ):
         self.db = db
         self.base_path = base_path
         self.hash_cache = HashCache()
-        self._scanning = False
-
-    async def scan_all_projects(self) -> List[ScanResult]:
-        """全プロジェクトをスキャン"""
-        if self._scanning:
-            logger.warning("Scan already in progress")
-            return []
+        # MP3コンテンツハッシュ → メタデータ（TinyTag 解析は新規・変更音声のみ）
+        self.audio_cache = AudioMetadataCache()
+        # 拡張子別のハッシュ戦略（SCAN_HASH_STRATEGY 環境変数で設定）
+        self.hash_engine = hash_engine or HashEngine.from_spec()
+        # True: stat シグネチャを信用せず毎回全ファイルをハッシュ計算
+        self.paranoid = paranoid
+        # ブロッキング処理専用のエグゼキューター（イベントループを塞がない）
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="scanner"
+        )
+        # 並列度の管理（I/O予算はエグゼキューターのワーカー数が上限）
+        self.scheduler = scheduler or ScanScheduler(max_budget=max_workers)
+        # 2以上でフルスキャンを ProcessPoolExecutor でシャード並列化
+        self.process_workers = process_workers
+        # True: ディレクトリ mtime が前回と同じで既知の成果物の stat も変わっていないプロジェクトを再走査しない
+        # （paranoid スキャンでは常に無効）
+        self.dir_pruning = dir_pruning
+        # 全プロジェクトスキャンを直列化（実行中に呼ばれた場合は完了を待ってから実行）
+        self._full_scan_lock = asyncio.Lock()
+        # 同一プロジェクトのスキャンを直列化（フル・単一・インクリメンタル共通）
+        self._project_locks: Dict[str, asyncio.Lock] = {}
+
+    def _project_lock(self, project_path: Path) -> asyncio.Lock:
+        """プロジェクト単位のスキャンロック"""
+        key = unicodedata.normalize('NFC', project_path.name)
+        lock = self._project_locks.get(key)
+        if lock is None:
+            lock = self._project_locks[key] = asyncio.Lock()
+        return lock
+
+    def _pruning_enabled(self, paranoid: Optional[bool]) -> bool:
+        """このスキャンでディレクトリ mtime による枝刈りを行うか"""
+        if paranoid is None:
+            paranoid = self.paranoid
+        return self.dir_pruning and not paranoid
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        """ブロッキング関数をスキャナー専用エグゼキューターで実行"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    async def scan_all_projects(
+        self,
+        paranoid: Optional[bool] = None,
+        process_workers: Optional[int] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+        removed_callback: Optional[ProjectsRemovedCallback] = None
+    ) -> List[ScanResult]:
+        """全プロジェクトをスキャン
+
+        Args:
+            paranoid: 指定時はこのスキャンに限り paranoid モードを上書き
+            process_workers: 指定時はこのスキャンに限りプロセス並列数を上書き（2以上で有効）
+            progress_callback: 進捗通知 (progress, current)。最大 1/PROGRESS_INTERVAL 回/秒
+            removed_callback: フォルダが無くなりDBから削除したプロジェクトの通知（削除時のみ1回）
+
+        別の全プロジェクトスキャンの実行中に呼ばれた場合は、その完了を待ってから実行する
+        （要求の合流は ScanCoordinator が行う）。
+        """
+        if process_workers is None:
+            process_workers = self.process_workers
+        if self._full_scan_lock.locked():
+            logger.info("Full scan already in progress, waiting for it to finish")
+        async with self._full_scan_lock:
+            return await self._scan_all_projects_locked(
+                paranoid, process_workers, progress_callback, removed_callback
+            )
 
-        self._scanning = True
+    async def _scan_all_projects_locked(
+        self,
+        paranoid: Optional[bool],
+        process_workers: int,
+        progress_callback: Optional[ProgressCallback],
+        removed_callback: Optional[ProjectsRemovedCallback]
+    ) -> List[ScanResult]:
+        """scan_all_projects の本体（全プロジェクトスキャンのロック取得済み）"""
         results = []
+        lag_monitor = LoopLagMonitor()
+        lag_monitor.start()
 
         try:
             start_time = datetime.now()
 
             # 削除されたプロジェクトをクリーンアップ
-            deleted_count = await self._cleanup_deleted_projects()
+            deleted_count = await self._cleanup_deleted_projects(removed_callback)
             if deleted_count > 0:
                 logger.info(f"Cleaned up {deleted_count} deleted projects")
 
             # プロジェクトフォルダを検出（WBS.json または content/ フォルダがあるもの）
-            # 除外: old, 隠しフォルダ
-            excluded_folders = {'old', '.git', '__pycache__', 'node_modules'}
-            project_dirs = [
-                d for d in self.base_path.iterdir()
-                if d.is_dir()
-                and d.name not in excluded_folders
-                and not d.name.startswith('.')
-                and ((d / 'WBS.json').exists() or (d / 'content').is_dir())
-            ]
+            project_dirs = await self._run_blocking(self._find_project_dirs)
 
-            logger.info(f"Found {len(project_dirs)} projects to scan")
+            # ディレクトリ mtime・WBS.json が前回と同じプロジェクトはトピック走査を省略
+            skipped: List[ScanResult] = []
+            if self._pruning_enabled(paranoid):
+                skipped, project_dirs = await self._skip_unchanged_projects(project_dirs)
 
-            # 並列スキャン（最大4並列）
-            semaphore = asyncio.Semaphore(4)
+            # 前回のスキャン時間・トピック数が大きいプロジェクトから開始
+            costs = await self.db.get_project_scan_costs()
+            project_dirs = self.scheduler.order_projects(project_dirs, costs)
+            self.scheduler.tune()
+            schedule = self.scheduler.summary()
 
-            async def scan_with_limit(project_path: Path) -> ScanResult:
-                async with semaphore:
-                    return await self.scan_project(project_path)
+            logger.info(
+                f"Found {len(project_dirs)} projects to scan, {len(skipped)} unchanged "
+                f"(I/O budget {schedule['budget']}, {schedule['projects']} projects in parallel)"
+            )
+
+            reporter = (
+                ProgressReporter(progress_callback, project_count=len(project_dirs))
+                if progress_callback else None
+            )
 
-            tasks = [scan_with_limit(p) for p in project_dirs]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            if process_workers > 1:
+                results = await self._scan_projects_sharded(
+                    project_dirs, paranoid, process_workers, reporter=reporter
+                )
+            else:
+                results = await self.scheduler.run_projects(
+                    project_dirs,
+                    lambda project_path: self.scan_project(
+                        project_path, paranoid=paranoid, reporter=reporter
+                    )
+                )
+            if reporter:
+                await reporter.finish()
 
             # エラーをフィルタリング
-            valid_results = []
+            valid_results = list(skipped)
             for r in results:
                 if isinstance(r, Exception):
                     logger.error(f"Scan error: {r}")
                 else:
                     valid_results.append(r)
 
+            # ハッシュキャッシュを永続化（再起動後も再利用）
+            try:
+                await self.flush_hash_cache()
+            except Exception as e:
+                logger.warning(f"Failed to flush hash cache: {e}")
+
             total_time = (datetime.now() - start_time).total_seconds() * 1000
-            logger.info(f"Full scan completed: {len(valid_results)} projects in {total_time:.0f}ms")
+            cache_stats = self.hash_cache.stats()
+            audio_stats = self.audio_cache.stats()
+            wbs_stats = wbs_cache_stats()
+            lag = lag_monitor.summary()
+            logger.info(
+                f"Full scan completed: {len(valid_results)} projects in {total_time:.0f}ms "
+                f"(hash cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses / "
+                f"{cache_stats['evictions']} evictions; "
+                f"audio metadata: {audio_stats['hits']} hits / {audio_stats['misses']} misses; "
+                f"wbs: {wbs_stats['hits']} hits / {wbs_stats['misses']} misses; "
+                f"topic latency: {self.scheduler.summary()['latency_ms']}ms; "
+                f"loop lag: max {lag['max_ms']}ms / avg {lag['avg_ms']}ms)"
+            )
 
             return valid_results
 
         finally:
-            self._scanning = False
+            await lag_monitor.stop()
+
+    async def _skip_unchanged_projects(
+        self,
+        project_dirs: List[Path]
+    ) -> Tuple[List[ScanResult], List[Path]]:
+        """トピック構成・ファイルに変更のないプロジェクトを振り分ける
+
+        Returns:
+            (省略したプロジェクトの結果, スキャンが必要なプロジェクト)
+        """
+        stored_states = await self.db.get_project_dir_states()
+        dir_states = await self._run_blocking(
+            lambda: [ProjectDirState.capture(path, stored_states.get(str(path))) for path in project_dirs]
+        )
+
+        # ディレクトリ構成が同じプロジェクトも、既知の成果物の上書き保存は stat で確認する
+        candidates = [
+            path for path, dir_state in zip(project_dirs, dir_states)
+            if dir_state.topics_unchanged(stored_states.get(str(path)))
+        ]
+        topic_states = await self.db.get_all_topic_file_states() if candidates else {}
+        files_unchanged = await self._run_blocking(
+            lambda: {
+                path: self._stored_files_unchanged(
+                    path / 'content',
+                    topic_states.get(stored_states[str(path)]['name'], {})
+                )
+                for path in candidates
+            }
+        )
+
+        skipped: List[ScanResult] = []
+        skipped_ids: List[int] = []
+        changed: List[Path] = []
+        for path, dir_state in zip(project_dirs, dir_states):
+            stored = stored_states.get(str(path))
+            if not files_unchanged.get(path):
+                changed.append(path)
+                continue
+            result = ScanResult(project_name=stored['name'], project_path=path)
+            await self._apply_unchanged_project(result, stored, dir_state)
+            skipped.append(result)
+            skipped_ids.append(stored['id'])
+
+        # スキャン日時は1文でまとめて更新
+        await self.db.mark_projects_scanned(skipped_ids)
+        return skipped, changed
+
+    async def _apply_unchanged_project(
+        self,
+        result: ScanResult,
+        stored: Dict[str, Any],
+        dir_state: ProjectDirState
+    ) -> None:
+        """変更のないプロジェクトの結果を保存済み統計から作成（rag_chunks.json のみ個別に確認）"""
+        result.skipped = True
+        result.total_topics = stored['total_topics'] or 0
+        result.completed_topics = stored['completed_topics'] or 0
+        result.html_count = stored['html_count'] or 0
+        result.txt_count = stored['txt_count'] or 0
+        result.mp3_count = stored['mp3_count'] or 0
+        result.mp3_total_duration_ms = stored['mp3_total_duration_ms'] or 0
+        result.topics_unchanged = result.total_topics
+
+        if not dir_state.rag_chunks_unchanged(stored):
+            await self._refresh_rag_chunks(stored['id'], result.project_name, result.project_path, dir_state)
+            await self.db.save_project_dir_state(stored['id'], dir_state.settled())
+
+    async def _refresh_rag_chunks(
+        self,
+        project_id: int,
+        project_name: str,
+        project_path: Path,
+        dir_state: Optional[ProjectDirState] = None
+    ) -> None:
+        """rag_chunks.json のチャンク数をDBに反映（読み込み失敗時は次回も再確認する）"""
+        try:
+            chunk_count = await self._run_blocking(
+                get_rag_chunk_count, project_path / "rag_chunks.json"
+            )
+        except Exception as e:
+            logger.warning(f"Failed to parse rag_chunks.json for {project_name}: {e}")
+            if dir_state is not None:
+                dir_state.rag_chunks_sig = ''
+        else:
+            await self._apply_rag_chunks(project_id, project_name, chunk_count)
+
+    async def refresh_rag_chunks(self, project_path: Path) -> Optional[ScanResult]:
+        """rag_chunks.json の変更のみを反映（チャンク数のプローブ、トピックは走査しない）
+
+        Returns:
+            ScanResult（トピック数等は集計しない）。未登録のプロジェクトなら None
+        """
+        start_time = datetime.now()
+        project_name = unicodedata.normalize('NFC', project_path.name)
+        async with self._project_lock(project_path):
+            project = await self.db.get_project_by_name(project_name)
+            if not project:
+                return None
+            await self._refresh_rag_chunks(project['id'], project_name, project_path)
+        result = ScanResult(project_name=project_name, project_path=project_path)
+        result.duration_ms = (datetime.now() - start_time).total_seconds() * 1000
+        return result
+
+    def _find_project_dirs(self) -> List[Path]:
+        """プロジェクトフォルダを検出（ブロッキング、エグゼキューターで実行）
 
-    async def _cleanup_deleted_projects(self) -> int:
-        """実フォルダが存在しないプロジェクトをDBから削除"""
-        deleted_count = 0
+        除外: old, 隠しフォルダ
+        """
+        excluded_folders = {'old', '.git', '__pycache__', 'node_modules'}
+        return [
+            d for d in self.base_path.iterdir()
+            if d.is_dir()
+            and d.name not in excluded_folders
+            and not d.name.startswith('.')
+            and ((d / 'WBS.json').exists() or (d / 'content').is_dir())
+        ]
 
-        # DB内の全プロジェクトを取得
-        db_projects = await self.db.get_all_projects()
+    @staticmethod
+    def _check_project_path(project_path: Path) -> Tuple[bool, bool]:
+        """(フォルダが存在する, WBS.json または content/ がある)（ブロッキング）"""
+        exists = project_path.exists()
+        has_content = exists and (
+            (project_path / 'WBS.json').exists() or (project_path / 'content').is_dir()
+        )
+        return exists, has_content
 
-        for project in db_projects:
-            project_path = Path(project['path'])
+    async def _cleanup_deleted_projects(
+        self,
+        removed_callback: Optional[ProjectsRemovedCallback] = None
+    ) -> int:
+        """実フォルダが存在しないプロジェクトをDBからまとめて削除（1トランザクション）
 
+        ベースフォルダ自体にアクセスできない場合（ネットワークドライブの一時的な切断等）は
+        全プロジェクトが消えたように見えるため、何も削除しない。
+        """
+        if not await self._run_blocking(self.base_path.is_dir):
+            logger.warning(f"Base path not accessible, skipping project cleanup: {self.base_path}")
+            return 0
+
+        db_projects = await self.db.get_project_paths()
+        if not db_projects:
+            return 0
+
+        # 各プロジェクトの stat はエグゼキューターで並行実行
+        checks = await asyncio.gather(*(
+            self._run_blocking(self._check_project_path, Path(project['path']))
+            for project in db_projects
+        ))
+
+        removed = []
+        for project, (exists, has_content) in zip(db_projects, checks):
             # フォルダが存在しない、またはWBS.json/contentがない場合は削除
-            if not project_path.exists():
-                logger.info(f"Project folder not found, removing from DB: {project['name']} ({project_path})")
-                await self.db.delete_project(project['id'])
-                deleted_count += 1
-            elif not (project_path / 'WBS.json').exists() and not (project_path / 'content').is_dir():
+            if not exists:
+                logger.info(f"Project folder not found, removing from DB: {project['name']} ({project['path']})")
+            elif not has_content:
                 logger.info(f"Project has no WBS.json or content folder, removing from DB: {project['name']}")
-                await self.db.delete_project(project['id'])
-                deleted_count += 1
+            else:
+                continue
+            removed.append(project)
+
+        if not removed:
+            return 0
+
+        await self.db.delete_projects([project['id'] for project in removed])
+        for project in removed:
+            self.hash_cache.discard_prefix(project['path'].rstrip(os.sep) + os.sep)
+        if removed_callback:
+            try:
+                await removed_callback(removed)
+            except Exception as e:
+                logger.debug(f"Projects removed callback failed: {e}")
+        return len(removed)
+
+    def _prepare_project(self, project_path: Path) -> Tuple[List[ParsedTopic], Optional[str], DirectoryIndex]:
+        """ディレクトリ走査・WBSパース・base_name 解決（ブロッキング、エグゼキューターで実行）
+
+        Returns:
+            (topics, wbs_format, dir_index)
+        """
+        wbs_path = project_path / 'WBS.json'
+        content_path = project_path / 'content'
+
+        topics = []
+        wbs_format = None
+
+        # content/ を1回だけ走査し、以降の全フェーズで共有
+        dir_index = DirectoryIndex.build(content_path)
+
+        if wbs_path.exists():
+            # 読み込み・形式検出・パースは WBS.json の変更1回につき1回（キャッシュ）
+            # パース失敗時は例外のままスキャンを中断する（編集途中の WBS でトピックを消さない）
+            document = load_wbs(wbs_path)
+            wbs_format = document.format
+            if wbs_format == 'unknown':
+                logger.warning(f"Unknown WBS format: {wbs_path}")
+            html_stems = [
+                name[:-5] for name in dir_index.files('') if name.endswith('.html')
+            ]
+            topics = document.parse(content_path, html_stems=html_stems)
+
+        # WBS.jsonがない場合、またはトピックがない場合はファイルシステムから検出
+        if not topics:
+            topics = self._detect_topics_from_files(dir_index)
+
+        # index.html, _fix_report.html等の非トピックファイルを除外
+        topics = [t for t in topics if t.base_name not in EXCLUDED_BASES]
 
-        return deleted_count
+        # WBS base_name と実ファイル名の不一致をフォールバックマッチングで解決
+        if topics:
+            topics = self._resolve_base_names(topics, dir_index)
 
-    async def scan_project(self, project_path: Path) -> ScanResult:
-        """単一プロジェクトをスキャン"""
+        return topics, wbs_format, dir_index
+
+    async def scan_project(
+        self,
+        project_path: Path,
+        paranoid: Optional[bool] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+        reporter: Optional[ProgressReporter] = None,
+        keep_topics: bool = False
+    ) -> ScanResult:
+        """単一プロジェクトをスキャン
+
+        Args:
+            progress_callback: 進捗通知 (progress, current)
+            reporter: 複数プロジェクトで共有する進捗集計（scan_all_projects から指定）
+            keep_topics: True の場合のみ result.topics にトピックごとの結果を保持（通常は集計値のみ）
+        """
         start_time = datetime.now()
         project_name = unicodedata.normalize('NFC', project_path.name)
 
         result = ScanResult(
             project_name=project_name,
-            project_path=project_path
+            project_path=project_path,
+            topics=[] if keep_topics else None
         )
+        own_reporter = reporter is None and progress_callback is not None
+        if own_reporter:
+            reporter = ProgressReporter(progress_callback)
 
         try:
-            # WBS.jsonをパース（存在する場合）
-            wbs_path = project_path / 'WBS.json'
-            content_path = project_path / 'content'
+            async with self._project_lock(project_path):
+                async for tr in self.iter_project_scan(
+                    project_path, paranoid=paranoid, result=result, reporter=reporter
+                ):
+                    if keep_topics:
+                        result.topics.append(tr)
+            if own_reporter:
+                await reporter.finish(project_name)
+            return result
+
+        except Exception as e:
+            logger.error(f"Error scanning {project_name}: {e}")
+            result.duration_ms = (datetime.now() - start_time).total_seconds() * 1000
+            return result
+
+    async def apply_wbs_change(self, project_path: Path, keep_topics: bool = False) -> ScanResult:
+        """WBS.json の変更を反映（再パースしてトピック集合の差分のみ更新）
+
+        既存トピックは保存済みの行に WBS 由来のフィールド（topic_id・chapter・title）だけを反映して
+        ファイルに触れず、WBS に追加されたトピックのみファイルをスキャンする。WBS から外れた
+        トピックは削除する。WBS 形式が変わった（WBS.json の作成・削除を含む）場合はフルスキャン。
+        """
+        async with self._project_lock(project_path):
+            result = await self._apply_wbs_change_locked(project_path, keep_topics)
+        if result is None:
+            return await self.scan_project(project_path, keep_topics=keep_topics)
+        return result
+
+    async def _apply_wbs_change_locked(
+        self,
+        project_path: Path,
+        keep_topics: bool = False
+    ) -> Optional[ScanResult]:
+        """apply_wbs_change の本体（フルスキャンが必要な場合は None）
+
+        ディレクトリ状態は保存しない（未反映のコンテンツ変更があり得るため、次回のフルスキャンで確認）。
+        """
+        start_time = datetime.now()
+        project_name = unicodedata.normalize('NFC', project_path.name)
+        content_path = project_path / 'content'
+
+        project = await self.db.get_project_by_name(project_name)
+        if not project:
+            return None
+        project_id = project['id']
+
+        # パース失敗時は例外のまま中断する（編集途中の WBS でトピックを消さない）
+        topics, wbs_format, dir_index = await self._run_blocking(self._prepare_project, project_path)
+        if wbs_format != project.get('wbs_format'):
+            logger.info(f"WBS format changed in {project_name}, falling back to full scan")
+            return None
+
+        result = ScanResult(
+            project_name=project_name,
+            project_path=project_path,
+            topics=[] if keep_topics else None
+        )
+        result.total_topics = len(topics)
+        stored_states = await self.db.get_topic_file_states(project_id)
+
+        rows: List[TopicScan] = []
+        added = 0
+        for topic in topics:
+            stored = stored_states.get((topic.base_name, topic.subfolder or ''))
+            if stored is not None:
+                tr = TopicScan.from_row(stored)
+                tr.topic_id = topic.topic_id
+                tr.chapter = topic.chapter
+                tr.title = topic.title
+            else:
+                tr = await self._scan_topic_files(topic, content_path, stored, dir_index=dir_index)
+                added += 1
+            self._accumulate_topic(result, tr)
+            if self._is_savable(tr):
+                rows.append(tr)
+            if keep_topics:
+                result.topics.append(tr)
+        scan_ms = (datetime.now() - start_time).total_seconds() * 1000
+
+        # 変わっていない行は書き込まれない（WBS由来フィールド・追加・削除のみ反映）
+        counts = await self.db.bulk_upsert_topics(
+            project_id,
+            rows,
+            active_keys=[(t.base_name, t.subfolder or '') for t in topics],
+            stats=self._project_stats(result, scan_ms)
+        )
+        self._apply_write_counts(result, counts)
 
-            topics = []
-            wbs_format = None
+        result.duration_ms = (datetime.now() - start_time).total_seconds() * 1000
+        logger.info(
+            f"WBS change applied to {project_name}: {len(topics)} topics, {added} scanned "
+            f"({result.topics_inserted} inserted, {result.topics_updated} updated, "
+            f"{result.topics_deleted} deleted) in {result.duration_ms:.0f}ms"
+        )
+        return result
 
-            if wbs_path.exists():
-                topics = parse_wbs(wbs_path, content_path)
+    async def iter_project_scan(
+        self,
+        project_path: Path,
+        paranoid: Optional[bool] = None,
+        result: Optional[ScanResult] = None,
+        reporter: Optional[ProgressReporter] = None
+    ) -> AsyncIterator[TopicScan]:
+        """単一プロジェクトをスキャンし、トピックの結果を完了順に返す（非同期ジェネレーター）
+
+        全トピックを返し終えた後、DB書き込み（1トランザクション）と RAG 状態の更新を行う。
+        集計値は result に逐次加算され、result.topics には追加しない。
+        途中で反復をやめた場合は DB に書き込まない。
+        同一プロジェクトとの直列化は行わない（scan_project はプロジェクトロック内で呼ぶ）。
+
+        Usage:
+            async for topic in scanner.iter_project_scan(path):
+                ...
+        """
+        start_time = datetime.now()
+        project_name = unicodedata.normalize('NFC', project_path.name)
+        if result is None:
+            result = ScanResult(project_name=project_name, project_path=project_path)
+        content_path = project_path / 'content'
+
+        # 前回からの変更確認（ディレクトリ mtime・WBS.json・rag_chunks.json）
+        stored_dir = None
+        if self._pruning_enabled(paranoid):
+            stored_dir = (await self.db.get_project_dir_states(str(project_path))).get(str(project_path))
+        dir_state = await self._run_blocking(ProjectDirState.capture, project_path, stored_dir)
+        if dir_state.topics_unchanged(stored_dir) and await self._run_blocking(
+            self._stored_files_unchanged,
+            content_path,
+            await self.db.get_topic_file_states(stored_dir['id'])
+        ):
+            await self._apply_unchanged_project(result, stored_dir, dir_state)
+            await self.db.mark_projects_scanned([stored_dir['id']])
+            if reporter:
+                await reporter.update(project_name, 0, 0, project_name)
+            result.duration_ms = (datetime.now() - start_time).total_seconds() * 1000
+            logger.info(f"Skipped unchanged project {project_name} in {result.duration_ms:.0f}ms")
+            return
 
-                # WBS形式検出
-                with open(wbs_path, 'r', encoding='utf-8') as f:
-                    import json
-                    wbs_data = json.load(f)
-                    wbs_format = detect_wbs_format(wbs_data)
+        # ディレクトリ走査・WBSパース（エグゼキューターで1回）
+        topics, wbs_format, dir_index = await self._run_blocking(
+            self._prepare_project, project_path
+        )
+
+        # プロジェクトをDB登録
+        project_id = await self.db.upsert_project(
+            name=project_name,
+            path=str(project_path),
+            wbs_format=wbs_format
+        )
 
-            # プロジェクトをDB登録
-            project_id = await self.db.upsert_project(
-                name=project_name,
-                path=str(project_path),
-                wbs_format=wbs_format
+        result.total_topics = len(topics)
+
+        # 保存済みのハッシュ・stat シグネチャを一括取得
+        stored_states = await self.db.get_topic_file_states(project_id)
+
+        # 各トピックのファイル状態をスキャン（スケジューラーの公平配分で並列、完了順）
+        rows: List[TopicScan] = []
+        done = 0
+        async for _, tr in self.scheduler.iter_topics(
+            topics,
+            lambda topic: self._scan_topic_files(
+                topic, content_path,
+                stored=stored_states.get((topic.base_name, topic.subfolder or '')),
+                paranoid=paranoid,
+                dir_index=dir_index
             )
+        ):
+            self._accumulate_topic(result, tr)
+            if self._is_savable(tr):
+                rows.append(tr)
+            done += 1
+            if reporter:
+                await reporter.update(project_name, done, len(topics), f"{project_name}/{tr.base_name}")
+            yield tr
+        scan_ms = (datetime.now() - start_time).total_seconds() * 1000
+
+        # RAG chunks 検出（rag_chunks.json が前回から変わっていなければ省略）
+        if not dir_state.rag_chunks_unchanged(stored_dir):
+            await self._refresh_rag_chunks(project_id, project_name, project_path, dir_state)
+
+        # トピックUPSERT・stale 削除・プロジェクト統計・ディレクトリ状態を1トランザクションで反映
+        db_start = time.perf_counter()
+        counts = await self.db.bulk_upsert_topics(
+            project_id,
+            rows,
+            active_keys=[(t.base_name, t.subfolder or '') for t in topics],
+            stats=self._project_stats(result, scan_ms),
+            dir_state=dir_state.settled()
+        )
+        db_ms = (time.perf_counter() - db_start) * 1000
+        self._apply_write_counts(result, counts)
+        if counts['deleted'] > 0:
+            logger.info(f"Deleted {counts['deleted']} stale topics from {project_name}")
+
+        if reporter and not topics:
+            await reporter.update(project_name, 0, 0, project_name)
 
-            # WBS.jsonがない場合、またはトピックがない場合はファイルシステムから検出
-            if not topics and content_path.exists():
-                topics = await self._detect_topics_from_files(content_path)
+        result.duration_ms = (datetime.now() - start_time).total_seconds() * 1000
+        self._log_project_result(result, db_ms)
 
-            # index.html, _fix_report.html等の非トピックファイルを除外
-            EXCLUDED_BASES = {'index', '_fix_report'}
-            topics = [t for t in topics if t.base_name not in EXCLUDED_BASES]
+    @staticmethod
+    def _accumulate_topic(result: ScanResult, tr: TopicScan) -> None:
+        """トピック1件のスキャン結果をプロジェクト集計に加算"""
+        if tr.has_html:
+            result.html_count += 1
+        if tr.has_txt:
+            result.txt_count += 1
+        if tr.has_mp3:
+            result.mp3_count += 1
+        if tr.has_html and tr.has_txt and tr.has_mp3:
+            result.completed_topics += 1
+        result.mp3_total_duration_ms += tr.mp3_duration_ms
+        result.files_scanned += tr.files_scanned
+
+    @classmethod
+    def _aggregate_topic_results(cls, result: ScanResult, topic_results: List[TopicScan]) -> None:
+        """トピックのスキャン結果をプロジェクト集計に加算（結果自体は保持しない）"""
+        for tr in topic_results:
+            cls._accumulate_topic(result, tr)
 
-            # WBS base_name と実ファイル名の不一致をフォールバックマッチングで解決
-            if topics and content_path.exists():
-                topics = self._resolve_base_names(topics, content_path)
+    @staticmethod
+    def _project_stats(result: ScanResult, scan_ms: float) -> Dict[str, int]:
+        """update_project_stats 用の統計値"""
+        return {
+            'total_topics': result.total_topics,
+            'completed_topics': result.completed_topics,
+            'html_count': result.html_count,
+            'txt_count': result.txt_count,
+            'mp3_count': result.mp3_count,
+            'mp3_total_duration_ms': result.mp3_total_duration_ms,
+            'last_scan_duration_ms': int(scan_ms),
+        }
 
-            result.total_topics = len(topics)
+    async def _apply_rag_chunks(self, project_id: int, project_name: str, chunk_count: Optional[int]) -> None:
+        """rag_chunks.json の検出結果をDBに反映（None = ファイルなし）"""
+        has_rag_chunks = chunk_count is not None
+        await self.db.update_project_has_rag_chunks(project_id, has_rag_chunks)
 
-            # ファイルシステムに存在しなくなったトピックをDBから削除
-            active_keys = [(t.base_name, t.subfolder or '') for t in topics]
-            stale_deleted = await self.db.delete_stale_topics(project_id, active_keys)
-            if stale_deleted > 0:
-                logger.info(f"Deleted {stale_deleted} stale topics from {project_name}")
+        if has_rag_chunks:
+            # チャンク数も更新（構築中・構築済みのステータスは上書きしない）
+            if await self.db.record_rag_chunks(project_id, chunk_count):
+                logger.info(f"RAG chunks detected: {project_name} ({chunk_count} chunks)")
 
-            # 各トピックのファイル状態をスキャン（並列）
-            scan_tasks = []
+    @staticmethod
+    def _log_project_result(result: ScanResult, db_ms: float) -> None:
+        logger.info(
+            f"Scanned {result.project_name}: {result.total_topics} topics, "
+            f"{result.html_count}H/{result.txt_count}T/{result.mp3_count}M "
+            f"({result.topics_inserted} new / {result.topics_updated} updated / "
+            f"{result.topics_unchanged} unchanged / {result.topics_deleted} deleted) "
+            f"in {result.duration_ms:.0f}ms (db write {db_ms:.0f}ms, 1 transaction)"
+        )
+
+    def _scan_project_sync(
+        self,
+        project_path: Path,
+        stored_states: Dict[Tuple[str, str], Dict],
+        paranoid: bool,
+        stored_dir: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """1プロジェクトのファイルシステム側の処理をすべて同期実行（シャードワーカー用）
+
+        DBには触れず、親プロセスがまとめて書き込むためのコンパクトな結果を返す。
+        stored_dir は前回のディレクトリ状態（未変更ディレクトリ・rag_chunks.json の再確認を省く）。
+        """
+        start = time.perf_counter()
+        project_name = unicodedata.normalize('NFC', project_path.name)
+        output: Dict[str, Any] = {'name': project_name, 'path': str(project_path)}
+        try:
+            dir_state = ProjectDirState.capture(project_path, stored_dir)
+            topics, wbs_format, dir_index = self._prepare_project(project_path)
+            content_path = project_path / 'content'
+            output['wbs_format'] = wbs_format
+            output['active_keys'] = [(t.base_name, t.subfolder or '') for t in topics]
+            topic_results = []
             for topic in topics:
-                scan_tasks.append(
-                    self._scan_topic_files(project_id, topic, content_path)
+                stored = stored_states.get((topic.base_name, topic.subfolder or ''))
+                topic_results.append(
+                    self._scan_topic_files_sync(topic, content_path, stored, paranoid, dir_index)
                 )
+            output['topic_results'] = topic_results
+            output['scan_ms'] = (time.perf_counter() - start) * 1000
+            if dir_state.rag_chunks_unchanged(stored_dir):
+                output['rag_chunks_unchanged'] = True
+            else:
+                try:
+                    output['rag_chunk_count'] = get_rag_chunk_count(project_path / "rag_chunks.json")
+                except Exception as e:
+                    output['rag_error'] = str(e)
+                    dir_state.rag_chunks_sig = ''
+            output['dir_state'] = dir_state.settled()
+        except Exception as e:
+            output['error'] = str(e)
+            output['scan_ms'] = (time.perf_counter() - start) * 1000
+        return output
 
-            topic_results = await asyncio.gather(*scan_tasks)
-
-            # 結果集計
-            for tr in topic_results:
-                if tr.get('has_html'):
-                    result.html_count += 1
-                if tr.get('has_txt'):
-                    result.txt_count += 1
-                if tr.get('has_mp3'):
-                    result.mp3_count += 1
-                if tr.get('has_html') and tr.get('has_txt') and tr.get('has_mp3'):
-                    result.completed_topics += 1
-                result.mp3_total_duration_ms += tr.get('mp3_duration_ms', 0)
-                result.files_scanned += tr.get('files_scanned', 0)
-                result.changes_detected += tr.get('changes', 0)
-                result.topics.append(tr)
+    async def _scan_projects_sharded(
+        self,
+        project_dirs: List[Path],
+        paranoid: Optional[bool],
+        workers: int,
+        reporter: Optional[ProgressReporter] = None
+    ) -> List[ScanResult]:
+        """プロジェクトを ProcessPoolExecutor でシャード並列スキャンし、1トランザクションで書き込む
+
+        ワーカーはファイル走査・ハッシュ計算・MP3解析を行い、親プロセスが結果を集約して
+        DB書き込み・キャッシュ更新を行う。DBへの反映内容は逐次スキャンと同一。
+        """
+        if paranoid is None:
+            paranoid = self.paranoid
+
+        # 既存状態の読み込みから書き込みまで対象プロジェクトを全てロック
+        async with AsyncExitStack() as stack:
+            for path in project_dirs:
+                await stack.enter_async_context(self._project_lock(path))
+            return await self._scan_projects_sharded_locked(project_dirs, paranoid, workers, reporter)
 
-            # プロジェクト統計を更新
-            await self.db.update_project_stats(
-                project_id=project_id,
-                total_topics=result.total_topics,
-                completed_topics=result.completed_topics,
-                html_count=result.html_count,
-                txt_count=result.txt_count,
-                mp3_count=result.mp3_count,
-                mp3_total_duration_ms=result.mp3_total_duration_ms
+    async def _scan_projects_sharded_locked(
+        self,
+        project_dirs: List[Path],
+        paranoid: bool,
+        workers: int,
+        reporter: Optional[ProgressReporter]
+    ) -> List[ScanResult]:
+        """_scan_projects_sharded の本体（プロジェクトロック取得済み）"""
+        stored_all = await self.db.get_all_topic_file_states()
+        stored_dirs = await self.db.get_project_dir_states() if self._pruning_enabled(paranoid) else {}
+
+        # LPT順のまま小さめのシャードに分割（先に大きいシャードが投入される）
+        chunk = max(1, math.ceil(len(project_dirs) / (workers * SHARDS_PER_PROCESS)))
+        shards = [project_dirs[i:i + chunk] for i in range(0, len(project_dirs), chunk)]
+
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = []
+            for shard in shards:
+                shard_states = {}
+                shard_dirs = {}
+                for path in shard:
+                    name = unicodedata.normalize('NFC', path.name)
+                    shard_states[name] = stored_all.get(name, {})
+                    shard_dirs[str(path)] = stored_dirs.get(str(path))
+                futures.append(self._report_shard(reporter, loop.run_in_executor(
+                    pool,
+                    partial(
+                        _scan_project_shard, self.base_path, shard, shard_states, paranoid,
+                        self.hash_engine, shard_dirs
+                    )
+                )))
+            shard_outputs = await asyncio.gather(*futures, return_exceptions=True)
+
+        # 集約: ワーカーで計算したハッシュ・MP3メタデータを親のキャッシュへ
+        outputs: List[Dict[str, Any]] = []
+        results: List[Any] = []
+        for shard, shard_output in zip(shards, shard_outputs):
+            if isinstance(shard_output, Exception):
+                results.extend(shard_output for _ in shard)
+                continue
+            project_outputs, hash_entries, audio_entries = shard_output
+            for path, hash_value, sig in hash_entries:
+                self.hash_cache.set(path, hash_value, sig)
+            for content_hash, *values in audio_entries:
+                self.audio_cache.set(content_hash, AudioMetadata(*values))
+            outputs.extend(project_outputs)
+
+        scans = []
+        project_results = []
+        for output in outputs:
+            result = ScanResult(project_name=output['name'], project_path=Path(output['path']))
+            result.duration_ms = output['scan_ms']
+            if 'error' in output:
+                logger.error(f"Error scanning {output['name']}: {output['error']}")
+                results.append(result)
+                continue
+            topic_results = output['topic_results']
+            result.total_topics = len(topic_results)
+            self._aggregate_topic_results(result, topic_results)
+            scans.append({
+                'name': output['name'],
+                'path': output['path'],
+                'wbs_format': output['wbs_format'],
+                'topics': [tr for tr in topic_results if self._is_savable(tr)],
+                'active_keys': output['active_keys'],
+                'stats': self._project_stats(result, output['scan_ms']),
+                'dir_state': output['dir_state'],
+            })
+            project_results.append((result, output))
+
+        # 全プロジェクトを1トランザクションで反映
+        db_start = time.perf_counter()
+        applied = await self.db.bulk_apply_project_scans(scans)
+        db_ms = (time.perf_counter() - db_start) * 1000
+
+        for (result, output), (project_id, counts) in zip(project_results, applied):
+            self._apply_write_counts(result, counts)
+            if counts['deleted'] > 0:
+                logger.info(f"Deleted {counts['deleted']} stale topics from {result.project_name}")
+            if 'rag_error' in output:
+                logger.warning(f"Failed to parse rag_chunks.json for {result.project_name}: {output['rag_error']}")
+            elif not output.get('rag_chunks_unchanged'):
+                await self._apply_rag_chunks(project_id, result.project_name, output['rag_chunk_count'])
+            self._log_project_result(result, db_ms)
+            results.append(result)
+
+        logger.info(
+            f"Sharded scan: {len(project_dirs)} projects in {len(shards)} shards "
+            f"across {workers} processes (db write {db_ms:.0f}ms, 1 transaction)"
+        )
+        return results
+
+    @staticmethod
+    async def _report_shard(reporter: Optional[ProgressReporter], future: Awaitable[Tuple]) -> Tuple:
+        """シャード完了時にそのプロジェクト分の進捗を通知"""
+        output = await future
+        if reporter:
+            for project in output[0]:
+                await reporter.update(project['name'], 1, 1, project['name'])
+        return output
+
+    async def scan_changed_paths(
+        self,
+        project_path: Path,
+        paths: List[str],
+        keep_topics: bool = False
+    ) -> ScanResult:
+        """変更されたパスに対応するトピックのみを再スキャン（インクリメンタル）
+
+        ウォッチャーが通知したパスを (subfolder, base_name) に変換し、
+        該当トピックだけをスキャンしてプロジェクト統計を差分更新する。
+        トピック集合が変わりうる変更（WBS.json 等、WBS管理下の新規トピック）は
+        フルスキャンにフォールバックする。
+        """
+        async with self._project_lock(project_path):
+            result = await self._scan_changed_paths_locked(project_path, paths, keep_topics)
+        if result is None:
+            return await self.scan_project(project_path, keep_topics=keep_topics)
+        return result
+
+    async def _scan_changed_paths_locked(
+        self,
+        project_path: Path,
+        paths: List[str],
+        keep_topics: bool = False
+    ) -> Optional[ScanResult]:
+        """scan_changed_paths の本体（フルスキャンが必要な場合は None）"""
+        start_time = datetime.now()
+        project_name = unicodedata.normalize('NFC', project_path.name)
+        content_path = project_path / 'content'
+
+        project = await self.db.get_project_by_name(project_name)
+        if not project:
+            return None
+
+        topic_keys: Set[Tuple[str, str]] = set()
+        for path in paths:
+            key = self._topic_key_from_path(content_path, Path(path))
+            if key is None:
+                logger.info(f"Non-topic change in {project_name}, falling back to full scan: {path}")
+                return None
+            if key[1]:
+                topic_keys.add(key)
+
+        result = ScanResult(
+            project_name=project_name,
+            project_path=project_path,
+            topics=[] if keep_topics else None
+        )
+        project_id = project['id']
+        has_wbs = await self._run_blocking((project_path / 'WBS.json').exists)
+
+        # 対象トピックの既存状態を取得
+        targets = []
+        for subfolder, base_name in sorted(topic_keys):
+            row = await self.db.get_topic(project_id, base_name, subfolder)
+            if row is None and has_wbs:
+                # WBS管理下の新規トピックは base_name 解決が必要なためフルスキャン
+                logger.info(f"New topic under WBS in {project_name}, falling back to full scan: {base_name}")
+                return None
+            targets.append((subfolder, base_name, row))
+
+        delta = defaultdict(int)
+        upserts: List[TopicScan] = []
+        for subfolder, base_name, row in targets:
+            if row is not None:
+                topic = ParsedTopic(
+                    topic_id=row['topic_id'] or '',
+                    chapter=row['chapter'] or '',
+                    title=row['title'] or base_name,
+                    base_name=base_name,
+                    subfolder=subfolder
+                )
+            else:
+                topic = ParsedTopic(
+                    topic_id=parse_topic_name(base_name).topic_id or base_name[:5],
+                    chapter=subfolder,
+                    title=base_name,
+                    base_name=base_name,
+                    subfolder=subfolder
+                )
+
+            tr = await self._run_blocking(
+                self._scan_topic_files_sync, topic, content_path, row, self.paranoid, None
             )
 
-            # RAG chunks 検出
-            rag_chunks_path = project_path / "rag_chunks.json"
-            has_rag_chunks = rag_chunks_path.exists()
-            await self.db.update_project_has_rag_chunks(project_id, has_rag_chunks)
+            if not (tr.has_html or tr.has_txt or tr.has_mp3) and not has_wbs:
+                # ファイル検出プロジェクトではファイルが無くなったトピックは削除
+                if row is not None:
+                    await self.db.delete_topic(project_id, base_name, subfolder)
+                    self._accumulate_topic_delta(delta, row, sign=-1)
+                    result.topics_deleted += 1
+                continue
 
-            if has_rag_chunks:
-                # チャンク数も更新
-                try:
-                    with open(rag_chunks_path, 'r', encoding='utf-8') as f:
-                        rag_data = json.load(f)
-                    chunk_count = rag_data.get('chunk_count', 0)
-                    await self.db.upsert_rag_index(
-                        project_id=project_id,
-                        status='chunks_ready',
-                        chunk_count=chunk_count
-                    )
-                    logger.info(f"RAG chunks detected: {project_name} ({chunk_count} chunks)")
-                except Exception as e:
-                    logger.warning(f"Failed to parse rag_chunks.json for {project_name}: {e}")
+            upserts.append(tr)
+            if row is not None:
+                self._accumulate_topic_delta(delta, row, sign=-1)
+            self._accumulate_topic_delta(delta, tr, sign=1)
+            result.files_scanned += tr.files_scanned
+            if keep_topics:
+                result.topics.append(tr)
 
-            result.duration_ms = (datetime.now() - start_time).total_seconds() * 1000
-            logger.info(
-                f"Scanned {project_name}: {result.total_topics} topics, "
-                f"{result.html_count}H/{result.txt_count}T/{result.mp3_count}M "
-                f"in {result.duration_ms:.0f}ms"
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': result.topics_deleted}
+        if upserts:
+            counts.update(await self.db.bulk_upsert_topics(project_id, upserts), deleted=result.topics_deleted)
+        self._apply_write_counts(result, counts)
+        await self.db.apply_project_stats_delta(project_id, **delta)
+        await self._load_project_totals(result)
+
+        result.duration_ms = (datetime.now() - start_time).total_seconds() * 1000
+        logger.info(
+            f"Incremental scan {project_name}: {len(targets)} topics "
+            f"({result.changes_detected} changes) in {result.duration_ms:.0f}ms"
+        )
+        return result
+
+    async def scan_file_events(
+        self,
+        project_path: Path,
+        events: List[FileEvent],
+        keep_topics: bool = False
+    ) -> ScanResult:
+        """ウォッチャーのファイルイベントを反映（インクリメンタル）
+
+        削除・移動はファイルを読まずにDBのみ更新する。削除はトピックのファイルフラグを下ろし、
+        移動は移動元の保存済みハッシュ・stat シグネチャ・MP3メタデータを移動先トピックへ付け替える
+        （同一ファイルシステム内のリネームでは size・mtime・inode が変わらない）。
+        作成・変更と付け替えできない移動先は scan_changed_paths と同様に該当トピックのみ再スキャンし、
+        トピック集合が変わりうる変更はフルスキャンにフォールバックする。
+        """
+        async with self._project_lock(project_path):
+            result = await self._apply_file_events_locked(project_path, events, keep_topics)
+        if result is None:
+            return await self.scan_project(project_path, keep_topics=keep_topics)
+        return result
+
+    async def _apply_file_events_locked(
+        self,
+        project_path: Path,
+        events: List[FileEvent],
+        keep_topics: bool = False
+    ) -> Optional[ScanResult]:
+        """scan_file_events の本体（フルスキャンが必要な場合は None）
+
+        フルスキャンにフォールバックする場合も、移動先のハッシュ・MP3メタデータは
+        キャッシュに登録してからフォールバックする（フルスキャンでもファイルを読まない）。
+        """
+        start_time = datetime.now()
+        project_name = unicodedata.normalize('NFC', project_path.name)
+        content_path = project_path / 'content'
+
+        project = await self.db.get_project_by_name(project_name)
+        if not project:
+            return None
+        project_id = project['id']
+
+        # 保存済みの行（(base_name, subfolder) キー）と更新後の行
+        needs_state = any(e.event_type in ('deleted', 'moved') for e in events)
+        stored = await self.db.get_topic_file_states(project_id) if needs_state else {}
+        states: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        rescan_paths: Dict[str, None] = {}
+        fallback: Optional[str] = None
+        has_wbs: Optional[bool] = None
+        moved = deleted = 0
+
+        for event in events:
+            if event.is_directory:
+                expanded = self._expand_directory_event(content_path, event, stored)
+                if expanded is None:
+                    fallback = f"folder {event.event_type}: {event.path}"
+                    continue
+            else:
+                expanded = [event]
+
+            for file_event in expanded:
+                if file_event.event_type not in ('deleted', 'moved'):
+                    rescan_paths[file_event.path] = None
+                    continue
+
+                src = self._artifact_from_path(content_path, Path(file_event.path))
+                dest = None
+                if file_event.dest_path:
+                    dest = self._artifact_from_path(content_path, Path(file_event.dest_path))
+                    if dest is None:
+                        fallback = f"moved outside content: {file_event.dest_path}"
+                        continue
+                if src is None:
+                    fallback = f"non-topic change: {file_event.path}"
+                    continue
+
+                taken = self._take_artifact(stored, states, src)
+                if dest is None or not dest[1]:
+                    # 削除・トピック対象外への移動はフラグを下ろすだけ
+                    deleted += taken is not None
+                    continue
+                if (
+                    taken is None
+                    or src[2] != dest[2]
+                    or not self.hash_engine.is_compatible(taken[f'{dest[2]}_hash'], Path(file_event.dest_path))
+                ):
+                    # 付け替えられない移動先（追跡外のファイル・種別の変更）は再スキャン
+                    rescan_paths[file_event.dest_path] = None
+                    continue
+
+                self._seed_moved_artifact(file_event.dest_path, dest[2], taken)
+                key = (dest[1], dest[0])
+                row = states.get(key) or stored.get(key)
+                if row is None:
+                    if has_wbs is None:
+                        has_wbs = await self._run_blocking((project_path / 'WBS.json').exists)
+                    if has_wbs:
+                        # WBS管理下の新規トピックは base_name 解決が必要なためフルスキャン
+                        fallback = f"new topic under WBS: {dest[1]}"
+                        continue
+                    row = {
+                        'base_name': dest[1],
+                        'subfolder': dest[0],
+                        'topic_id': parse_topic_name(dest[1]).topic_id or dest[1][:5],
+                        'chapter': dest[0],
+                        'title': dest[1],
+                    }
+                row = states.setdefault(key, dict(row))
+                row.update(taken)
+                moved += 1
+
+        if fallback is not None:
+            logger.info(f"File events in {project_name} need a full scan ({fallback})")
+            return None
+
+        # 更新後の行を反映（ファイルが無くなったトピックはファイル検出プロジェクトのみ削除）
+        delta = defaultdict(int)
+        upserts: List[TopicScan] = []
+        removed_keys: Set[Tuple[str, str]] = set()
+        for key, row in states.items():
+            previous = stored.get(key)
+            if not any(row.get(f'has_{kind}') for kind, _ in TOPIC_ARTIFACTS):
+                if has_wbs is None:
+                    has_wbs = await self._run_blocking((project_path / 'WBS.json').exists)
+                if not has_wbs:
+                    if previous is not None:
+                        removed_keys.add(key)
+                        self._accumulate_topic_delta(delta, previous, sign=-1)
+                    continue
+            tr = TopicScan.from_row(row)
+            upserts.append(tr)
+            if previous is not None:
+                self._accumulate_topic_delta(delta, previous, sign=-1)
+            self._accumulate_topic_delta(delta, tr, sign=1)
+
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0}
+        if upserts or removed_keys:
+            active_keys = [key for key in stored if key not in removed_keys] if removed_keys else None
+            counts = await self.db.bulk_upsert_topics(project_id, upserts, active_keys=active_keys)
+            await self.db.apply_project_stats_delta(project_id, **delta)
+
+        # 作成・変更されたパスは該当トピックのみ再スキャン
+        if rescan_paths:
+            result = await self._scan_changed_paths_locked(project_path, list(rescan_paths), keep_topics)
+            if result is None:
+                return None
+            for field in ('inserted', 'updated', 'unchanged', 'deleted'):
+                counts[field] += getattr(result, f'topics_{field}')
+        else:
+            result = ScanResult(
+                project_name=project_name,
+                project_path=project_path,
+                topics=[] if keep_topics else None
             )
+            await self._load_project_totals(result)
+        self._apply_write_counts(result, counts)
+        if keep_topics:
+            result.topics[:0] = upserts
+
+        result.duration_ms = (datetime.now() - start_time).total_seconds() * 1000
+        logger.info(
+            f"Applied {len(events)} file events to {project_name}: {moved} moved, {deleted} deleted "
+            f"without hashing, {len(rescan_paths)} paths rescanned "
+            f"({result.changes_detected} changes) in {result.duration_ms:.0f}ms"
+        )
+        return result
 
-            return result
+    def _expand_directory_event(
+        self,
+        content_path: Path,
+        event: FileEvent,
+        stored: Dict[Tuple[str, str], Dict[str, Any]]
+    ) -> Optional[List[FileEvent]]:
+        """フォルダの削除・移動を保存済みトピックのファイル単位のイベントに展開
 
-        except Exception as e:
-            logger.error(f"Error scanning {project_name}: {e}")
-            result.duration_ms = (datetime.now() - start_time).total_seconds() * 1000
-            return result
+        content/ 外・content/ 自体・フォルダの作成など展開できない場合は None。
+        """
+        if event.event_type not in ('deleted', 'moved'):
+            return None
+        try:
+            src_dir = Path(event.path).relative_to(content_path).as_posix()
+        except ValueError:
+            return None
+        if src_dir == '.':
+            return None
+
+        dest_dir = None
+        if event.dest_path:
+            try:
+                dest_dir = Path(event.dest_path).relative_to(content_path).as_posix()
+            except ValueError:
+                dest_dir = None    # content/ 外への移動は削除と同じ
+            if dest_dir == '.':
+                return None
+
+        expanded = []
+        for (base_name, subfolder), row in stored.items():
+            if subfolder != src_dir and not subfolder.startswith(src_dir + '/'):
+                continue
+            for kind, suffix in TOPIC_ARTIFACTS:
+                if not row.get(f'has_{kind}'):
+                    continue
+                src = content_path / subfolder / f"{base_name}{suffix}"
+                if dest_dir is None:
+                    expanded.append(FileEvent('deleted', str(src)))
+                else:
+                    dest = content_path / (dest_dir + subfolder[len(src_dir):]) / f"{base_name}{suffix}"
+                    expanded.append(FileEvent('moved', str(src), str(dest)))
+        return expanded
+
+    @staticmethod
+    def _artifact_fields(kind: str) -> Tuple[str, ...]:
+        """成果物1種別分のトピック行のフィールド"""
+        fields = (f'has_{kind}', f'{kind}_hash', f'{kind}_sig')
+        return fields + MP3_META_FIELDS if kind == 'mp3' else fields
+
+    def _take_artifact(
+        self,
+        stored: Dict[Tuple[str, str], Dict[str, Any]],
+        states: Dict[Tuple[str, str], Dict[str, Any]],
+        artifact: Tuple[str, str, str]
+    ) -> Optional[Dict[str, Any]]:
+        """トピック行から成果物を取り外す（フラグ・ハッシュ等をクリア）
+
+        Returns:
+            取り外した成果物のフィールド（追跡していないファイルなら None）
+        """
+        subfolder, base_name, kind = artifact
+        key = (base_name, subfolder)
+        row = states.get(key) or stored.get(key)
+        if not kind or row is None or not row.get(f'has_{kind}'):
+            return None
+        row = states.setdefault(key, dict(row))
+        fields = self._artifact_fields(kind)
+        taken = {field: row[field] for field in fields}
+        for field in fields:
+            row[field] = None
+        row[f'has_{kind}'] = False
+        if kind == 'mp3':
+            row['mp3_duration_ms'] = 0
+        return taken
+
+    def _seed_moved_artifact(self, dest_path: str, kind: str, taken: Dict[str, Any]) -> None:
+        """移動先パスのハッシュ・MP3メタデータをキャッシュに登録（以降のスキャンでファイルを読まない）"""
+        self.hash_cache.set(dest_path, taken[f'{kind}_hash'], taken[f'{kind}_sig'])
+        if kind == 'mp3':
+            meta = AudioMetadata.from_row(taken)
+            if meta is not None:
+                self.audio_cache.set(taken['mp3_hash'], meta, persist=False)
+
+    async def _load_project_totals(self, result: ScanResult) -> None:
+        """集計値に更新後のプロジェクト統計を設定"""
+        updated = await self.db.get_project_by_name(result.project_name)
+        if updated:
+            result.total_topics = updated['total_topics']
+            result.completed_topics = updated['completed_topics']
+            result.html_count = updated['html_count']
+            result.txt_count = updated['txt_count']
+            result.mp3_count = updated['mp3_count']
+            result.mp3_total_duration_ms = updated.get('mp3_total_duration_ms') or 0
 
     @staticmethod
-    def _extract_episode_info(base_name: str) -> Tuple[str, Optional[str]]:
-        """base_name からレベル接頭語とエピソード番号を抽出
+    def _topic_key_from_path(content_path: Path, path: Path) -> Optional[Tuple[str, str]]:
+        """変更パスを (subfolder, base_name) に変換
 
         Returns:
-            (prefix, episode): prefix はレベル名（例: "intro", "advanced"）、
-                                episode はエピソード番号（例: "01-01", "1-1-1"）。
-                                抽出できない場合は ('', None)。
-
-        Examples:
-            '01-01_title'       -> ('', '01-01')
-            'intro-1-1'         -> ('intro', '1-1')
-            'advanced_1-1_xxx'  -> ('advanced', '1-1')
-            '1-1-1_title'       -> ('', '1-1-1')
+            トピックファイルなら (subfolder, base_name)、トピック対象外のコンテンツファイルなら
+            (subfolder, '')、content/ 外などトピックに対応付けられない場合は None。
         """
-        # アルファベット接頭語あり: advanced_1-1_xxx, intro-1-1
-        # 3階層目は同じセパレータの場合のみ許可（\2 で後方参照）
-        m = re.match(r'^([a-zA-Z]+)[-_](\d{1,3})([-_])(\d{1,3})(?:(\3)(\d{1,3}))?(?:[-_]|$)', base_name)
-        if m:
-            episode = f"{m.group(2)}-{m.group(4)}"
-            if m.group(6):  # 3階層目あり
-                episode += f"-{m.group(6)}"
-            return m.group(1).lower(), episode
-
-        # 接頭語なし: 01-01_title, 1-1-1_title
-        m = re.match(r'^(\d{1,3})([-_])(\d{1,3})(?:(\2)(\d{1,3}))?(?:[-_]|$)', base_name)
-        if m:
-            episode = f"{m.group(1)}-{m.group(3)}"
-            if m.group(5):  # 3階層目あり
-                episode += f"-{m.group(5)}"
-            return '', episode
-
-        return '', None
-
-    def _build_file_index(self, content_path: Path) -> Dict[str, List[Tuple[str, str, str]]]:
+        artifact = AsyncScanner._artifact_from_path(content_path, path)
+        return artifact[:2] if artifact is not None else None
+
+    @staticmethod
+    def _artifact_from_path(content_path: Path, path: Path) -> Optional[Tuple[str, str, str]]:
+        """パスを (subfolder, base_name, 成果物の種別) に変換
+
+        Returns:
+            トピックファイルなら (subfolder, base_name, 'html' / 'txt' / 'mp3' / 'ssml')、
+            トピック対象外のコンテンツファイルなら (subfolder, '', '')、
+            content/ 外などトピックに対応付けられない場合は None。
+        """
+        try:
+            rel = path.relative_to(content_path)
+        except ValueError:
+            return None
+
+        dirs = rel.parts[:-1]
+        if any(d.startswith('.') or d in EXCLUDED_DIRS for d in dirs):
+            return ('', '', '')
+        subfolder = '/'.join(dirs)
+
+        name = rel.name
+        if name.endswith(SSML_SUFFIX):
+            base_name = name[:-len(SSML_SUFFIX)]
+            kind = 'ssml'
+        elif path.suffix in TOPIC_EXTENSIONS:
+            base_name = path.stem
+            kind = path.suffix[1:]
+        else:
+            return (subfolder, '', '')
+
+        if base_name in EXCLUDED_BASES or base_name.endswith('_ssml') or not parse_topic_name(base_name).topic_id:
+            return (subfolder, '', '')
+        return (subfolder, base_name, kind)
+
+    @staticmethod
+    def _apply_write_counts(result: ScanResult, counts: Dict[str, int]) -> None:
+        """DB書き込み件数を ScanResult に反映（changes_detected は実際に変わった行数）"""
+        result.topics_inserted = counts['inserted']
+        result.topics_updated = counts['updated']
+        result.topics_unchanged = counts['unchanged']
+        result.topics_deleted = counts['deleted']
+        result.changes_detected = counts['inserted'] + counts['updated'] + counts['deleted']
+
+    @staticmethod
+    def _accumulate_topic_delta(delta: Dict[str, int], topic: Dict, sign: int) -> None:
+        """トピック1件分の統計を差分に加算（sign=-1 で減算）"""
+        has_html = bool(topic.get('has_html'))
+        has_txt = bool(topic.get('has_txt'))
+        has_mp3 = bool(topic.get('has_mp3'))
+        delta['total_topics'] += sign
+        delta['html_count'] += sign * has_html
+        delta['txt_count'] += sign * has_txt
+        delta['mp3_count'] += sign * has_mp3
+        delta['completed_topics'] += sign * (has_html and has_txt and has_mp3)
+        delta['mp3_total_duration_ms'] += sign * (topic.get('mp3_duration_ms') or 0)
+
+    def _build_file_index(self, dir_index: DirectoryIndex) -> Dict[str, List[Tuple[str, str, str]]]:
         """content ディレクトリ内のファイルをエピソード番号でインデックス化
 
         Returns:
@@ -343,24 +1593,19 @@ class AsyncScanner:
         """
         index = defaultdict(list)
 
-        def scan_dir(dir_path: Path, subfolder: str = ""):
-            if not dir_path.exists():
-                return
-            for item in dir_path.iterdir():
-                if item.is_dir():
-                    if item.name.startswith('.') or item.name in ['__pycache__', 'node_modules', 'old']:
-                        continue
-                    new_sub = f"{subfolder}/{item.name}" if subfolder else item.name
-                    scan_dir(item, new_sub)
-                elif item.suffix == '.html' and item.stem not in ('index', '_fix_report'):
-                    prefix, episode = self._extract_episode_info(item.stem)
-                    if episode:
-                        index[episode].append((item.stem, prefix, subfolder))
-
-        scan_dir(content_path)
+        for subfolder, name in dir_index.iter_files():
+            if not name.endswith('.html'):
+                continue
+            stem = name[:-5]
+            if stem in ('index', '_fix_report'):
+                continue
+            name_info = parse_topic_name(stem)
+            if name_info.match_episode:
+                index[name_info.match_episode].append((stem, name_info.match_prefix, subfolder))
+
         return index
 
-    def _resolve_base_names(self, topics: List[ParsedTopic], content_path: Path) -> List[ParsedTopic]:
+    def _resolve_base_names(self, topics: List[ParsedTopic], dir_index: DirectoryIndex) -> List[ParsedTopic]:
         """WBS base_name が実ファイルと一致しない場合、エピソード番号でフォールバックマッチング
 
         マッチング優先順位:
@@ -370,20 +1615,20 @@ class AsyncScanner:
         4. エピソード番号 + サブフォルダで絞り込み
         """
         # ファイルインデックスを構築
-        file_index = self._build_file_index(content_path)
+        file_index = self._build_file_index(dir_index)
 
         resolved = []
         resolved_count = 0
 
         for topic in topics:
             # 1. 完全一致チェック
-            search_path = content_path / topic.subfolder if topic.subfolder else content_path
-            if (search_path / f"{topic.base_name}.html").exists():
+            if dir_index.exists(topic.subfolder, f"{topic.base_name}.html"):
                 resolved.append(topic)
                 continue
 
             # エピソード番号を抽出
-            wbs_prefix, episode = self._extract_episode_info(topic.base_name)
+            name_info = parse_topic_name(topic.base_name)
+            wbs_prefix, episode = name_info.match_prefix, name_info.match_episode
             if not episode:
                 resolved.append(topic)
                 continue
@@ -447,223 +1692,239 @@ class AsyncScanner:
 
         return resolved
 
-    async def _detect_topics_from_files(self, content_path: Path, subfolder: str = "") -> List[ParsedTopic]:
-        """ファイルシステムからトピックを再帰的に検出（数値-数値パターンを含むファイルのみ）"""
+    def _detect_topics_from_files(self, dir_index: DirectoryIndex) -> List[ParsedTopic]:
+        """ディレクトリインデックスからトピックを検出（数値-数値パターンを含むファイルのみ）"""
         topics = []
         seen_bases = set()  # (subfolder, base_name) のペアで重複チェック
 
-        # 数値-数値または数値_数値パターン（例: 1-1, 01-02, 2-3, 1_1, 10_2）
-        topic_pattern = re.compile(r'\d+[-_]\d+')
-
-        current_path = content_path / subfolder if subfolder else content_path
-
-        if not current_path.exists():
-            return topics
-
-        for item in current_path.iterdir():
-            # サブフォルダの場合は再帰的にスキャン
-            if item.is_dir():
-                # 隠しフォルダと特殊フォルダをスキップ
-                if item.name.startswith('.') or item.name in ['__pycache__', 'node_modules', 'old']:
-                    continue
-
-                # サブフォルダパスを構築
-                new_subfolder = f"{subfolder}/{item.name}" if subfolder else item.name
-                sub_topics = await self._detect_topics_from_files(content_path, new_subfolder)
-                topics.extend(sub_topics)
+        for subfolder, name in dir_index.iter_files():
+            stem, dot, ext = name.rpartition('.')
+            if not dot or f".{ext}" not in TOPIC_EXTENSIONS:
                 continue
+            base_name = stem
 
-            # ファイルの場合
-            if item.suffix in ['.html', '.txt', '.mp3']:
-                base_name = item.stem
-
-                # _ssml で終わるファイルはスキップ（SSMLは別途チェック）
-                if base_name.endswith('_ssml'):
-                    continue
-
-                # 数値-数値または数値_数値パターンを含むファイル名のみを対象とする
-                # 例: 01-01_xxx, advanced_1-1, basic_2-3, 1_1_xxx など
-                if not topic_pattern.search(base_name):
-                    continue
-
-                # 重複チェック（サブフォルダ + ファイル名）
-                key = (subfolder, base_name)
-                if key not in seen_bases:
-                    seen_bases.add(key)
-
-                    # トピックID抽出（数値-数値部分）
-                    match = topic_pattern.search(base_name)
-                    topic_id = match.group(0) if match else base_name[:5]
-
-                    topics.append(ParsedTopic(
-                        topic_id=topic_id,
-                        chapter=subfolder if subfolder else "",  # サブフォルダ名をchapterとして使用
-                        title=base_name,
-                        base_name=base_name,
-                        subfolder=subfolder
-                    ))
-
-        # レベル対応ソート（入門→初級→中級→上級の順）
-        LEVEL_ORDER = {
-            'intro': 0, 'introduction': 0, 'beginner': 0,
-            'basic': 1, 'elementary': 1,
-            'intermediate': 2,
-            'advanced': 3,
-        }
+            # _ssml で終わるファイルはスキップ（SSMLは別途チェック）
+            if base_name.endswith('_ssml'):
+                continue
 
-        def sort_key(t):
-            subfolder = t.subfolder or ''
-            base_name = t.base_name
-            level_order = 0
+            # 数値-数値または数値_数値パターンを含むファイル名のみを対象とする
+            # 例: 01-01_xxx, advanced_1-1, basic_2-3, 1_1_xxx など
+            topic_id = parse_topic_name(base_name).topic_id
+            if not topic_id:
+                continue
 
-            # サブフォルダからレベル検出
-            if subfolder:
-                folder = subfolder.split('/')[-1].lower()
-                level_order = LEVEL_ORDER.get(folder, 0)
+            # 重複チェック（サブフォルダ + ファイル名）
+            key = (subfolder, base_name)
+            if key not in seen_bases:
+                seen_bases.add(key)
+
+                topics.append(ParsedTopic(
+                    topic_id=topic_id,  # トピックID（数値-数値部分）
+                    chapter=subfolder if subfolder else "",  # サブフォルダ名をchapterとして使用
+                    title=base_name,
+                    base_name=base_name,
+                    subfolder=subfolder
+                ))
 
-            # レベルプレフィックス: "intro-1-1", "advanced_2-3"
-            m = re.match(r'^([a-zA-Z]+)[-_](\d+)[-_](\d+)', base_name)
-            if m:
-                level_order = LEVEL_ORDER.get(m.group(1).lower(), 99)
-                return (level_order, int(m.group(2)), int(m.group(3)), base_name)
+        # 表示順は DB の topics.sort_key で決まるためここではソートしない
+        return topics
 
-            # 3階層数値: "1-1-1_title"
-            m = re.match(r'^(\d+)[-_](\d+)[-_](\d+)', base_name)
-            if m:
-                return (int(m.group(1)), int(m.group(2)), int(m.group(3)), base_name)
+    async def _scan_topic_files(
+        self,
+        topic: ParsedTopic,
+        content_path: Path,
+        stored: Optional[Dict] = None,
+        paranoid: Optional[bool] = None,
+        dir_index: Optional[DirectoryIndex] = None
+    ) -> TopicScan:
+        """トピックのファイル状態をスキャン（DB保存は呼び出し元で一括）
+
+        stat・ハッシュ計算・MP3タグ解析はエグゼキューターへの1回のホップでまとめて実行する。
+        """
+        if paranoid is None:
+            paranoid = self.paranoid
 
-            # 2階層数値: "01-01_title"
-            m = re.match(r'^(\d+)[-_](\d+)', base_name)
-            if m:
-                return (level_order, int(m.group(1)), int(m.group(2)), base_name)
+        return await self._run_blocking(
+            self._scan_topic_files_sync, topic, content_path, stored, paranoid, dir_index
+        )
 
-            return (99, 0, 0, base_name)
+    def _stored_files_unchanged(
+        self,
+        content_path: Path,
+        stored_states: Dict[Tuple[str, str], Dict]
+    ) -> bool:
+        """保存済みトピックの成果物が stat シグネチャどおりか（ブロッキング、エグゼキューターで実行）
+
+        ディレクトリ mtime はエントリの追加・削除でしか変わらず、上書き保存を検出できないため、
+        枝刈りするプロジェクトも既知の成果物だけは stat で確認する（走査・ハッシュ計算はしない）。
+        ハッシュ戦略が変わった保存値がある場合も False（再スキャンで計算し直す）。
+        """
+        for (base_name, subfolder), stored in stored_states.items():
+            folder = content_path / subfolder if subfolder else content_path
+            for kind, suffix in TOPIC_ARTIFACTS:
+                if not stored.get(f'has_{kind}'):
+                    continue
+                file_path = folder / f"{base_name}{suffix}"
+                if not self.hash_engine.is_compatible(stored.get(f'{kind}_hash'), file_path):
+                    return False
+                try:
+                    sig = self._stat_signature(file_path.stat())
+                except OSError:
+                    return False
+                if sig != stored.get(f'{kind}_sig'):
+                    return False
+        return True
 
-        return sorted(topics, key=sort_key)
+    @staticmethod
+    def _is_savable(result: TopicScan) -> bool:
+        """数値-数値パターンを含まないトピックは保存しない"""
+        return bool(parse_topic_name(result.base_name).topic_id)
 
-    async def _scan_topic_files(
+    def _scan_topic_files_sync(
         self,
-        project_id: int,
         topic: ParsedTopic,
-        content_path: Path
-    ) -> Dict:
-        """トピックのファイル状態をスキャン（数値-数値パターンを含むファイル、サブフォルダ対応）"""
-        # 数値-数値または数値_数値パターン（例: 1-1, 01-02, 2-3, 1_1, 10_2）
-        topic_pattern = re.compile(r'\d+[-_]\d+')
-
-        result = {
-            'base_name': topic.base_name,
-            'topic_id': topic.topic_id,
-            'chapter': topic.chapter,
-            'title': topic.title,
-            'subfolder': topic.subfolder,
-            'has_html': False,
-            'has_txt': False,
-            'has_mp3': False,
-            'has_ssml': False,
-            'html_hash': None,
-            'txt_hash': None,
-            'mp3_hash': None,
-            'ssml_hash': None,
-            'mp3_duration_ms': 0,
-            'files_scanned': 0,
-            'changes': 0
-        }
+        content_path: Path,
+        stored: Optional[Dict],
+        paranoid: bool,
+        dir_index: Optional[DirectoryIndex]
+    ) -> TopicScan:
+        """トピックのファイル状態をスキャン（ブロッキング、エグゼキューターで実行）
+
+        Args:
+            stored: DBに保存済みのトピック行。stat シグネチャが一致するファイルは
+                    保存済みハッシュを再利用し、ファイルを読まない。
+            paranoid: True の場合はシグネチャに関わらず全ファイルをハッシュ計算
+            dir_index: 指定時は存在確認・stat をインデックスから取得（再走査しない）
+        """
+        result = TopicScan.for_topic(topic)
 
         # 数値-数値パターンを含むファイル名のみを対象とする
-        if not topic_pattern.search(topic.base_name):
+        if not parse_topic_name(topic.base_name).topic_id:
             return result
 
         # サブフォルダを考慮したパスを計算
         actual_content_path = content_path / topic.subfolder if topic.subfolder else content_path
 
-        # ファイル存在チェックとハッシュ計算
-        for ext in ['html', 'txt', 'mp3']:
-            file_path = actual_content_path / f"{topic.base_name}.{ext}"
-
-            if file_path.exists() and topic_pattern.search(file_path.stem):
-                result[f'has_{ext}'] = True
-                result['files_scanned'] += 1
-
-                # xxHashで高速ハッシュ計算
-                file_hash = await self._compute_hash(file_path)
-                result[f'{ext}_hash'] = file_hash
-
-                # 変更検出
-                cache_key = str(file_path)
-                if self.hash_cache.is_changed(cache_key, file_hash):
-                    result['changes'] += 1
-                    self.hash_cache.set(cache_key, file_hash)
-
-        # MP3再生時間を取得
-        if result['has_mp3']:
-            mp3_path = actual_content_path / f"{topic.base_name}.mp3"
-            try:
-                tag = TinyTag.get(str(mp3_path))
-                if tag.duration:
-                    result['mp3_duration_ms'] = int(tag.duration * 1000)
-            except Exception as e:
-                logger.debug(f"Could not read MP3 duration for {mp3_path}: {e}")
-
-        # SSMLファイルのチェック（{base_name}_ssml.txt）
-        ssml_path = actual_content_path / f"{topic.base_name}_ssml.txt"
-        if ssml_path.exists():
-            result['has_ssml'] = True
-            result['files_scanned'] += 1
+        # ファイル存在チェック（stat）とハッシュ計算
+        # ssml は {base_name}_ssml.txt
+        artifacts = (
+            ('html', f"{topic.base_name}.html"),
+            ('txt', f"{topic.base_name}.txt"),
+            ('mp3', f"{topic.base_name}.mp3"),
+            ('ssml', f"{topic.base_name}{SSML_SUFFIX}"),
+        )
+        for kind, file_name in artifacts:
+            file_path = actual_content_path / file_name
+            if dir_index is not None:
+                st = dir_index.stat(topic.subfolder, file_name)
+                if st is None:
+                    continue
+            else:
+                try:
+                    st = file_path.stat()
+                except OSError:
+                    continue
 
-            ssml_hash = await self._compute_hash(ssml_path)
-            result['ssml_hash'] = ssml_hash
+            setattr(result, f'has_{kind}', True)
+            result.files_scanned += 1
 
-            cache_key = str(ssml_path)
-            if self.hash_cache.is_changed(cache_key, ssml_hash):
-                result['changes'] += 1
-                self.hash_cache.set(cache_key, ssml_hash)
+            sig = self._stat_signature(st)
+            setattr(result, f'{kind}_sig', sig)
 
-        # DBに保存
-        await self.db.upsert_topic(
-            project_id=project_id,
-            base_name=topic.base_name,
-            topic_id=topic.topic_id,
-            chapter=topic.chapter,
-            title=topic.title,
-            subfolder=topic.subfolder,
-            has_html=result['has_html'],
-            has_txt=result['has_txt'],
-            has_mp3=result['has_mp3'],
-            has_ssml=result['has_ssml'],
-            html_hash=result['html_hash'],
-            txt_hash=result['txt_hash'],
-            mp3_hash=result['mp3_hash'],
-            ssml_hash=result['ssml_hash'],
-            mp3_duration_ms=result['mp3_duration_ms']
-        )
+            cache_key = str(file_path)
+            previous_hash = stored.get(f'{kind}_hash') if stored else None
+            file_hash = None
+            if not paranoid:
+                # stat シグネチャ一致: キャッシュ → 保存済みハッシュの順に再利用（ファイルを読まない）
+                # ハッシュ戦略が変わった保存値は再利用しない
+                file_hash = self.hash_cache.get(cache_key, sig)
+                if not self.hash_engine.is_compatible(file_hash, file_path):
+                    file_hash = None
+                if (
+                    file_hash is None
+                    and stored
+                    and stored.get(f'{kind}_sig') == sig
+                    and self.hash_engine.is_compatible(previous_hash, file_path)
+                ):
+                    file_hash = previous_hash
+                    self.hash_cache.set(cache_key, file_hash, sig)
+            if file_hash is None:
+                # xxHashで高速ハッシュ計算
+                file_hash = self.hash_engine.hash_file(file_path, st.st_size)
+                self.hash_cache.set(cache_key, file_hash, sig)
+            setattr(result, f'{kind}_hash', file_hash)
+
+            # 変更検出（DB保存値との比較）
+            if previous_hash != file_hash:
+                result.changes += 1
+
+        # MP3メタデータ（再生時間等）を取得
+        if result.has_mp3:
+            meta = self._resolve_audio_metadata(
+                actual_content_path / f"{topic.base_name}.mp3", result.mp3_hash, stored, paranoid
+            )
+            result.mp3_duration_ms = meta.duration_ms
+            result.mp3_bitrate = meta.bitrate
+            result.mp3_sample_rate = meta.sample_rate
+            result.mp3_channels = meta.channels
 
         return result
 
-    async def _compute_hash(self, file_path: Path) -> str:
-        """xxHashでファイルハッシュを高速計算"""
-        hasher = xxhash.xxh64()
+    def _resolve_audio_metadata(
+        self,
+        mp3_path: Path,
+        mp3_hash: str,
+        stored: Optional[Dict],
+        paranoid: bool
+    ) -> AudioMetadata:
+        """MP3メタデータを取得（ブロッキング）
+
+        MP3ハッシュが保存済みトピック行と同じならその値、次にコンテンツハッシュキーの
+        キャッシュを再利用し、どちらにも無い場合のみ TinyTag でヘッダーを解析する。
+        """
+        if not paranoid:
+            if stored and stored.get('mp3_hash') == mp3_hash:
+                meta = AudioMetadata.from_row(stored)
+                if meta is not None:
+                    self.audio_cache.set(mp3_hash, meta, persist=False)
+                    return meta
+            meta = self.audio_cache.get(mp3_hash)
+            if meta is not None:
+                return meta
+
+        meta = read_audio_metadata(mp3_path)
+        self.audio_cache.set(mp3_hash, meta)
+        return meta
 
-        async with aiofiles.open(file_path, 'rb') as f:
-            while chunk := await f.read(65536):  # 64KB chunks
-                hasher.update(chunk)
+    @staticmethod
+    def _stat_signature(st) -> str:
+        """stat 結果から変更検出用シグネチャ（size:mtime_ns:inode）を生成"""
+        return stat_signature(st)
 
-        return hasher.hexdigest()
+    async def _compute_hash(self, file_path: Path) -> str:
+        """xxHashでファイルハッシュを高速計算（1ファイル1ホップ）"""
+        return await self._run_blocking(self.hash_engine.hash_file, file_path)
 
     async def scan_single_file(self, file_path: Path) -> Optional[FileInfo]:
         """単一ファイルをスキャン（差分検出用）"""
-        if not file_path.exists():
+        try:
+            stat = await self._run_blocking(file_path.stat)
+        except FileNotFoundError:
             return None
 
         try:
-            file_hash = await self._compute_hash(file_path)
+            sig = self._stat_signature(stat)
             cache_key = str(file_path)
-            changed = self.hash_cache.is_changed(cache_key, file_hash)
+            previous_hash = self.hash_cache.peek(cache_key)
 
-            if changed:
-                self.hash_cache.set(cache_key, file_hash)
+            file_hash = None if self.paranoid else self.hash_cache.get(cache_key, sig)
+            if not self.hash_engine.is_compatible(file_hash, file_path):
+                file_hash = None
+            if file_hash is None:
+                file_hash = await self._compute_hash(file_path)
+                self.hash_cache.set(cache_key, file_hash, sig)
+            changed = previous_hash != file_hash
 
-            stat = file_path.stat()
             return FileInfo(
                 path=file_path,
                 hash=file_hash,
@@ -675,8 +1936,77 @@ class AsyncScanner:
             logger.error(f"Error scanning file {file_path}: {e}")
             return None
 
+    async def load_hash_cache(self) -> int:
+        """SQLiteからハッシュキャッシュを復元（再起動後のウォームアップ）"""
+        entries = await self.db.load_file_hashes(self.hash_cache.max_size)
+        self.hash_cache.load(entries)
+        audio_entries = await self.db.load_audio_metadata(self.audio_cache.max_size)
+        self.audio_cache.load(audio_entries)
+        logger.info(
+            f"Hash cache warmed: {len(entries)} entries "
+            f"({len(audio_entries)} audio metadata)"
+        )
+        return len(entries)
+
+    async def flush_hash_cache(self) -> int:
+        """ハッシュキャッシュの更新分をSQLiteへ書き出し"""
+        entries = self.hash_cache.drain_dirty()
+        await self.db.save_file_hashes(entries, keep=self.hash_cache.max_size)
+        await self.db.save_audio_metadata(
+            self.audio_cache.drain_dirty(), keep=self.audio_cache.max_size
+        )
+        if entries:
+            logger.debug(f"Hash cache flushed: {len(entries)} entries")
+        return len(entries)
+
     def clear_cache(self) -> None:
         """全キャッシュをクリア"""
         self.hash_cache.clear()
+        self.audio_cache.clear()
         clear_wbs_cache()
+        clear_rag_meta_cache()
+        clear_topic_name_cache()
         logger.info("Scanner cache cleared")
+
+    def close(self) -> None:
+        """エグゼキューターを停止"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _scan_project_shard(
+    base_path: Path,
+    project_paths: List[Path],
+    stored_states: Dict[str, Dict[Tuple[str, str], Dict]],
+    paranoid: bool,
+    hash_engine: HashEngine,
+    dir_states: Optional[Dict[str, Optional[Dict[str, Any]]]] = None
+) -> Tuple[List[Dict[str, Any]], List[Tuple[str, str, Optional[str]]], List[Tuple]]:
+    """シャードワーカー（子プロセスで実行）
+
+    DB接続を持たないスキャナーで各プロジェクトを同期スキャンし、
+    (プロジェクト結果, 新規ハッシュ, 新規MP3メタデータ) を返す。
+    """
+    scanner = AsyncScanner(None, base_path, paranoid=paranoid, max_workers=1, hash_engine=hash_engine)
+    try:
+        outputs = [
+            scanner._scan_project_sync(
+                path, stored_states.get(unicodedata.normalize('NFC', path.name), {}), paranoid,
+                (dir_states or {}).get(str(path))
+            )
+            for path in project_paths
+        ]
+        return outputs, scanner.hash_cache.drain_dirty(), scanner.audio_cache.drain_dirty()
+    finally:
+        scanner.close()
+
+
+# シングルトンインスタンス
+_scanner: Optional[AsyncScanner] = None
+
+
+def get_scanner(db: Database, base_path: Path, **kwargs) -> AsyncScanner:
+    """AsyncScannerインスタンスを取得（全スキャン経路でハッシュキャッシュを共有）"""
+    global _scanner
+    if _scanner is None:
+        _scanner = AsyncScanner(db, base_path, **kwargs)
+    return _scanner
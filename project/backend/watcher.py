@@ -1,11 +1,15 @@
 """
 ファイルウォッチャー
-パフォーマンス最適化: watchdog + asyncio、デバウンス処理
+パフォーマンス最適化: watchdog + asyncio、プロジェクトごとの適応デバウンス（静穏期間 + 最大遅延）、
+イベント種別（作成・変更・削除・移動）を保持して削除・リネームをハッシュ計算なしで反映
 """
 
 import asyncio
+import os
+from collections import deque
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Callable, Optional, List, Set
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, List, Set, Tuple
 from datetime import datetime
 import threading
 import logging
@@ -13,107 +17,322 @@ import logging
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler, FileSystemEvent
 
+from .file_events import FILE_EVENT_TYPES, FileEvent
+
 logger = logging.getLogger(__name__)
 
 # デバウンス設定
 DEBOUNCE_MS = 100
+# 連続して書き込みが続いても、バッチ最初のイベントからこの時間内に必ずフラッシュ
+MAX_LATENCY_MS = 1000
+# 適応デバウンス: 静穏期間 = イベント到着間隔の移動平均 × ADAPTIVE_FACTOR（DEBOUNCE_MS〜MAX_DEBOUNCE_MS）
+MAX_DEBOUNCE_MS = 2000
+ADAPTIVE_FACTOR = 2.0
+ADAPTIVE_SMOOTHING = 0.3
+# この時間イベントが無ければ到着間隔をリセット（次のイベントは単発の編集として扱う）
+ADAPTIVE_IDLE_MS = 1000
+# 間隔の短い到着がこの回数続いてから静穏期間を伸ばす（続けての保存程度では伸ばさない）
+ADAPTIVE_MIN_STREAK = 2
+# 最大遅延は静穏期間のこの倍数まで伸ばす（一括生成中は数回のフラッシュにまとめる）
+MAX_LATENCY_WINDOWS = 4
+# キー（プロジェクト）ごとのコールバックの同時実行数
+WATCH_CONCURRENCY = int(os.environ.get("WATCH_CONCURRENCY", "4"))
+
+# イベントを (キー, イベント) に振り分ける関数（プロジェクトをまたぐ移動は複数に分かれる）
+Partition = Callable[[FileEvent], List[Tuple[Hashable, FileEvent]]]
+# 振り分け先ごとのハンドラー (project_name, events)
+RouteHandler = Callable[[str, List[FileEvent]], Awaitable[None]]
 SUPPORTED_EXTENSIONS = {'.html', '.txt', '.mp3'}
 
+# イベントの振り分け先: プロジェクト直下の構造化JSONファイルは種類ごとの軽量ハンドラー、
+# それ以外（content/ 配下）はトピックのインクリメンタルスキャン
+CONTENT_ROUTE = 'content'
+PROJECT_FILE_ROUTES = {
+    'WBS.json': 'wbs',
+    'rag_chunks.json': 'rag_chunks',
+    'rag_build_progress.json': 'rag_progress',
+}
+
+
+def _is_supported(path: str) -> bool:
+    path = Path(path)
+    return path.suffix.lower() in SUPPORTED_EXTENSIONS or path.name in PROJECT_FILE_ROUTES
+
+
+@dataclass(slots=True)
+class _DebounceWindow:
+    """キー（プロジェクト）ごとのデバウンス状態"""
+    delay: float
+    # 同じイベントは最後の発生位置に移して1件にまとめる（作成→削除→作成 の順序を保つ）
+    events: Dict[FileEvent, None] = field(default_factory=dict)
+    batch_started_at: float = 0.0
+    last_event_at: float = 0.0
+    interval: Optional[float] = None    # イベント到着間隔の移動平均（秒）
+    streak: int = 0                     # ADAPTIVE_IDLE_MS 以内の到着が続いた回数
+    flushing: bool = False
+
 
 class DebounceBuffer:
-    """デバウンスバッファ（連続イベント集約）"""
+    """デバウンスバッファ（連続イベント集約）
+
+    watchdog スレッドからは submit() で deque に積むだけ（ロック・タスク生成なし）で、
+    イベントループへの通知は未処理分に対して call_soon_threadsafe 1回にまとめる。
+    イベントは partition でキー（プロジェクト）ごとの窓に振り分け、常駐のフラッシュタスク1つが
+    窓ごとに、最後のイベントから静穏期間が経過するか、バッチ最初のイベントから最大遅延が
+    経過した時点でコールバック (key, events) を呼ぶ。静穏期間はキーごとのイベント到着間隔に
+    合わせて delay_ms〜max_delay_ms で伸縮する（単発の編集は短く、一括生成中は長く）。
+    コールバックは同じキーでは直列、キー間では max_concurrency 件まで並行に実行する。
+    """
 
-    def __init__(self, delay_ms: int = DEBOUNCE_MS):
+    def __init__(
+        self,
+        delay_ms: int = DEBOUNCE_MS,
+        max_latency_ms: int = MAX_LATENCY_MS,
+        max_delay_ms: int = MAX_DEBOUNCE_MS,
+        partition: Optional[Partition] = None,
+        max_concurrency: int = WATCH_CONCURRENCY
+    ):
         self.delay_seconds = delay_ms / 1000.0
-        self._pending_paths: Set[str] = set()
-        self._timer_task: Optional[asyncio.Task] = None
-        self._lock = asyncio.Lock()
+        self.max_delay_seconds = max(delay_ms, max_delay_ms) / 1000.0
+        self.max_latency_seconds = max(delay_ms, max_latency_ms) / 1000.0
+        self.max_concurrency = max(1, max_concurrency)
+        self._partition = partition
+        self._inbox: Deque[FileEvent] = deque()
+        self._wakeup_scheduled = False
+        self._windows: Dict[Hashable, _DebounceWindow] = {}
+        self._arrived: Optional[asyncio.Event] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_tasks: Set[asyncio.Task] = set()
         self._callback: Optional[Callable] = None
         self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._submitted = 0
+        self._wakeups = 0
+        self._flushes = 0
 
     def set_callback(self, callback: Callable, loop: asyncio.AbstractEventLoop) -> None:
-        """コールバックとイベントループを設定"""
+        """コールバック (key, events) とイベントループを設定"""
         self._callback = callback
         self._loop = loop
 
-    async def add_event(self, path: str) -> None:
-        """イベントを追加（デバウンス処理）"""
-        async with self._lock:
-            self._pending_paths.add(path)
-
-            # 既存のタイマーをキャンセル
-            if self._timer_task and not self._timer_task.done():
-                self._timer_task.cancel()
-                try:
-                    await self._timer_task
-                except asyncio.CancelledError:
-                    pass
-
-            # 新しいタイマーを設定
-            self._timer_task = asyncio.create_task(self._flush_after_delay())
-
-    async def _flush_after_delay(self) -> None:
-        """デバウンス待機後、イベントを処理"""
-        await asyncio.sleep(self.delay_seconds)
+    def start(self) -> None:
+        """フラッシュタスクを開始（イベントループ上で呼ぶ）"""
+        if self._flusher is None:
+            self._arrived = asyncio.Event()
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._flusher = self._loop.create_task(self._run())
 
-        async with self._lock:
-            if not self._pending_paths:
-                return
-
-            paths = list(self._pending_paths)
-            self._pending_paths.clear()
-
-        # コールバック実行
-        if self._callback:
+    async def stop(self) -> None:
+        """フラッシュタスク・実行中のコールバックを停止（未処理のイベントは破棄）"""
+        tasks = [*self._flush_tasks]
+        if self._flusher is not None:
+            tasks.append(self._flusher)
+            self._flusher = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._inbox.clear()
+        self._windows.clear()
+
+    def submit(self, event: FileEvent) -> None:
+        """イベントを追加（任意のスレッドから呼べる）"""
+        self._submitted += 1
+        self._inbox.append(event)
+        if not self._wakeup_scheduled:
+            self._wakeup_scheduled = True
             try:
-                await self._callback(paths)
-            except Exception as e:
-                logger.error(f"Debounce callback error: {e}")
+                self._loop.call_soon_threadsafe(self._drain_inbox)
+            except RuntimeError:
+                # 停止済みのループ（シャットダウン中）
+                pass
+
+    def _drain_inbox(self) -> None:
+        """受信したイベントをキーごとの窓に移す（イベントループ上で実行）
+
+        フラグを先に下ろしてから取り出すため、取り出し後に積まれたイベントは次の通知で処理される。
+        """
+        self._wakeup_scheduled = False
+        self._wakeups += 1
+        touched: Dict[Hashable, _DebounceWindow] = {}
+        inbox = self._inbox
+        while inbox:
+            event = inbox.popleft()
+            routed = self._partition(event) if self._partition else ((None, event),)
+            for key, routed_event in routed:
+                window = touched.get(key) or self._windows.get(key)
+                if window is None:
+                    window = self._windows[key] = _DebounceWindow(self.delay_seconds)
+                touched[key] = window
+                window.events.pop(routed_event, None)
+                window.events[routed_event] = None
+
+        now = self._loop.time()
+        for window in touched.values():
+            self._observe_arrival(window, now)
+        if touched and self._arrived is not None:
+            self._arrived.set()
+
+    def _observe_arrival(self, window: _DebounceWindow, now: float) -> None:
+        """到着間隔の移動平均を更新し、窓の静穏期間を調整"""
+        if window.last_event_at:
+            gap = now - window.last_event_at
+            if gap > ADAPTIVE_IDLE_MS / 1000.0:
+                window.interval = None
+                window.streak = 0
+            elif window.interval is None:
+                window.interval = gap
+                window.streak = 1
+            else:
+                window.interval += ADAPTIVE_SMOOTHING * (gap - window.interval)
+                window.streak += 1
+        if window.streak < ADAPTIVE_MIN_STREAK:
+            window.delay = self.delay_seconds
+        else:
+            window.delay = min(self.max_delay_seconds, max(self.delay_seconds, window.interval * ADAPTIVE_FACTOR))
+        if not window.batch_started_at:
+            window.batch_started_at = now
+        window.last_event_at = now
+
+    def _deadline(self, window: _DebounceWindow) -> float:
+        """窓のフラッシュ時刻（静穏期間経過 or 最大遅延到達の早い方）"""
+        ceiling = max(self.max_latency_seconds, window.delay * MAX_LATENCY_WINDOWS)
+        return min(window.last_event_at + window.delay, window.batch_started_at + ceiling)
+
+    async def _run(self) -> None:
+        """フラッシュタスク本体（期限の来た窓をフラッシュし、次の期限かイベント到着まで待つ）"""
+        loop = asyncio.get_running_loop()
+        idle_seconds = ADAPTIVE_IDLE_MS / 1000.0
+        while True:
+            self._arrived.clear()
+            now = loop.time()
+            next_deadline = None
+            for key, window in list(self._windows.items()):
+                if window.flushing:
+                    continue
+                if not window.events:
+                    # しばらくイベントの無い窓は破棄（到着間隔もリセットされるため）
+                    if now - window.last_event_at > idle_seconds:
+                        del self._windows[key]
+                    continue
+                deadline = self._deadline(window)
+                if deadline <= now:
+                    self._start_flush(key, window)
+                elif next_deadline is None or deadline < next_deadline:
+                    next_deadline = deadline
+
+            timer = loop.call_at(next_deadline, self._arrived.set) if next_deadline is not None else None
+            await self._arrived.wait()
+            if timer is not None:
+                timer.cancel()
+
+    def _start_flush(self, key: Hashable, window: _DebounceWindow) -> asyncio.Task:
+        """窓のイベントを取り出してコールバックをタスクで実行"""
+        events = list(window.events)
+        window.events = {}
+        window.batch_started_at = 0.0
+        window.flushing = True
+        self._flushes += 1
+        task = self._loop.create_task(self._flush_window(key, window, events))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+        return task
+
+    async def _flush_window(self, key: Hashable, window: _DebounceWindow, events: List[FileEvent]) -> None:
+        """同時実行数の上限内でコールバックを実行"""
+        try:
+            async with self._semaphore:
+                if self._callback:
+                    try:
+                        await self._callback(key, events)
+                    except Exception as e:
+                        logger.error(f"Debounce callback error: {e}")
+        finally:
+            window.flushing = False
+            # 実行中に溜まったイベントの期限を再評価
+            if self._arrived is not None:
+                self._arrived.set()
+
+    async def flush(self) -> None:
+        """保留中のイベントを期限を待たずにコールバックへ渡し、完了まで待つ"""
+        tasks = [
+            self._start_flush(key, window)
+            for key, window in list(self._windows.items())
+            if window.events and not window.flushing
+        ]
+        await asyncio.gather(*tasks)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'submitted': self._submitted,
+            'wakeups': self._wakeups,
+            'flushes': self._flushes,
+            'pending': sum(len(w.events) for w in self._windows.values()) + len(self._inbox),
+            'running': len(self._flush_tasks),
+            'windows': {key: round(w.delay * 1000) for key, w in self._windows.items()},
+        }
 
 
 class ContentEventHandler(FileSystemEventHandler):
     """コンテンツファイル変更ハンドラー"""
 
-    def __init__(self, debounce_buffer: DebounceBuffer, loop: asyncio.AbstractEventLoop):
+    def __init__(self, debounce_buffer: DebounceBuffer):
         super().__init__()
         self.debounce_buffer = debounce_buffer
-        self.loop = loop
 
     def on_any_event(self, event: FileSystemEvent) -> None:
         """全イベントをハンドル"""
-        if event.is_directory:
+        file_event = self._to_file_event(event)
+        if file_event is None:
             return
 
-        # サポートされる拡張子のみ処理
-        path = Path(event.src_path)
-        if path.suffix.lower() not in SUPPORTED_EXTENSIONS:
-            return
+        logger.debug(f"File event: {file_event}")
 
-        # イベントタイプをフィルタ
-        if event.event_type not in ('created', 'modified', 'deleted', 'moved'):
-            return
+        # watchdog スレッドからはバッファに積むだけ（ループへの通知はまとめて1回）
+        self.debounce_buffer.submit(file_event)
 
-        logger.debug(f"File event: {event.event_type} - {path}")
+    @staticmethod
+    def _to_file_event(event: FileSystemEvent) -> Optional[FileEvent]:
+        """watchdog イベントを FileEvent に変換（対象外は None）"""
+        if event.event_type not in FILE_EVENT_TYPES:
+            return None
+        src = str(event.src_path)
+        dest = str(event.dest_path) if event.event_type == 'moved' else None
 
-        # asyncioイベントループにタスクを追加
-        asyncio.run_coroutine_threadsafe(
-            self.debounce_buffer.add_event(str(path)),
-            self.loop
-        )
+        # フォルダは削除・移動のみ（中のファイルは個別に通知されないため）
+        if event.is_directory:
+            if event.event_type in ('deleted', 'moved'):
+                return FileEvent(event.event_type, src, dest, is_directory=True)
+            return None
+
+        # サポートされる拡張子のみ処理（移動は移動元・移動先のどちらかが対象なら通知）
+        if dest is not None:
+            if not (_is_supported(src) or _is_supported(dest)):
+                return None
+        elif not _is_supported(src):
+            return None
+        return FileEvent(event.event_type, src, dest)
 
 
 class ContentWatcher:
-    """コンテンツフォルダ監視クラス"""
+    """コンテンツフォルダ監視クラス
+
+    partition 指定時はキーごとにデバウンスし、on_change_callback(key, events) を呼ぶ
+    （未指定時は on_change_callback(events)）。
+    """
 
     def __init__(
         self,
         path: Path,
-        on_change_callback: Callable[[List[str]], None],
-        debounce_ms: int = DEBOUNCE_MS
+        on_change_callback: Callable[..., None],
+        debounce_ms: int = DEBOUNCE_MS,
+        max_latency_ms: int = MAX_LATENCY_MS,
+        partition: Optional[Partition] = None
     ):
         self.path = path
         self.on_change_callback = on_change_callback
         self.debounce_ms = debounce_ms
+        self.max_latency_ms = max_latency_ms
+        self.partition = partition
 
         self._observer: Optional[Observer] = None
         self._debounce_buffer: Optional[DebounceBuffer] = None
@@ -130,18 +349,18 @@ class ContentWatcher:
             return
 
         # デバウンスバッファ初期化
-        self._debounce_buffer = DebounceBuffer(self.debounce_ms)
+        self._debounce_buffer = DebounceBuffer(
+            self.debounce_ms, self.max_latency_ms, partition=self.partition
+        )
         self._debounce_buffer.set_callback(
             self._process_changes,
             asyncio.get_event_loop()
         )
+        self._debounce_buffer.start()
 
         # watchdog Observer初期化
         self._observer = Observer()
-        handler = ContentEventHandler(
-            self._debounce_buffer,
-            asyncio.get_event_loop()
-        )
+        handler = ContentEventHandler(self._debounce_buffer)
 
         # 全サブフォルダを監視
         self._observer.schedule(handler, str(self.path), recursive=True)
@@ -160,18 +379,25 @@ class ContentWatcher:
             self._observer.join(timeout=5)
             self._observer = None
 
+        if self._debounce_buffer:
+            await self._debounce_buffer.stop()
+            self._debounce_buffer = None
+
         self._running = False
         logger.info(f"Stopped watching: {self.path}")
 
-    async def _process_changes(self, paths: List[str]) -> None:
-        """変更されたパスを処理"""
-        if not paths:
+    async def _process_changes(self, key: Hashable, events: List[FileEvent]) -> None:
+        """ファイルイベントを処理"""
+        if not events:
             return
 
-        logger.info(f"Processing {len(paths)} file changes")
+        logger.info(f"Processing {len(events)} file events" + (f" ({key})" if key is not None else ""))
 
         try:
-            await self.on_change_callback(paths)
+            if self.partition is not None:
+                await self.on_change_callback(key, events)
+            else:
+                await self.on_change_callback(events)
         except Exception as e:
             logger.error(f"Error processing file changes: {e}")
 
@@ -182,49 +408,82 @@ class ContentWatcher:
 
 
 class MultiProjectWatcher:
-    """複数プロジェクト監視マネージャー"""
+    """複数プロジェクト監視マネージャー
+
+    イベントを (プロジェクト, 振り分け先) ごとにデバウンスし、並行にハンドラーを呼ぶ。
+    プロジェクト直下の WBS.json・rag_chunks.json・rag_build_progress.json は handlers に
+    登録した振り分け先のハンドラー、それ以外と未登録の振り分け先は on_change_callback が受け取る。
+    """
 
     def __init__(
         self,
         base_path: Path,
-        on_change_callback: Callable[[str, List[str]], None],
-        debounce_ms: int = DEBOUNCE_MS
+        on_change_callback: RouteHandler,
+        debounce_ms: int = DEBOUNCE_MS,
+        max_latency_ms: int = MAX_LATENCY_MS,
+        handlers: Optional[Dict[str, RouteHandler]] = None
     ):
         self.base_path = base_path
         self.on_change_callback = on_change_callback
         self.debounce_ms = debounce_ms
+        self.max_latency_ms = max_latency_ms
+        self.handlers: Dict[str, RouteHandler] = dict(handlers or {})
 
         self._watcher: Optional[ContentWatcher] = None
 
     async def start(self) -> None:
         """全プロジェクトの監視を開始"""
-        async def handle_changes(paths: List[str]) -> None:
-            # パスからプロジェクト名を特定
-            project_changes: dict = {}
-
-            for path in paths:
-                # パスからプロジェクト名を抽出
-                try:
-                    rel_path = Path(path).relative_to(self.base_path)
-                    project_name = rel_path.parts[0]
-
-                    if project_name not in project_changes:
-                        project_changes[project_name] = []
-                    project_changes[project_name].append(path)
-                except ValueError:
-                    logger.warning(f"Path outside base: {path}")
-
-            # プロジェクトごとにコールバック
-            for project_name, project_paths in project_changes.items():
-                await self.on_change_callback(project_name, project_paths)
-
         self._watcher = ContentWatcher(
             self.base_path,
-            handle_changes,
-            self.debounce_ms
+            self._dispatch,
+            self.debounce_ms,
+            self.max_latency_ms,
+            partition=self._route
         )
         await self._watcher.start()
 
+    async def _dispatch(self, key: Tuple[str, str], events: List[FileEvent]) -> None:
+        """振り分け先のハンドラーを呼ぶ"""
+        project_name, route = key
+        handler = self.handlers.get(route, self.on_change_callback)
+        await handler(project_name, events)
+
+    def _route_key(self, path: str) -> Optional[Tuple[str, str]]:
+        """パスから (プロジェクト名, 振り分け先) を求める（ベースフォルダ直下・対象外のファイルは None）"""
+        try:
+            parts = Path(path).relative_to(self.base_path).parts
+        except ValueError:
+            logger.warning(f"Path outside base: {path}")
+            return None
+        if len(parts) < 2:
+            return None
+        route = PROJECT_FILE_ROUTES.get(parts[-1])
+        if route is not None:
+            # 構造化JSONはプロジェクト直下のもののみ
+            return (parts[0], route) if len(parts) == 2 else None
+        # スキャナーが読むのは content/ 配下のみ（プロジェクト直下の一時ファイル等は無視）
+        return (parts[0], CONTENT_ROUTE) if parts[1] == 'content' else None
+
+    def _route(self, event: FileEvent) -> List[Tuple[Tuple[str, str], FileEvent]]:
+        """イベントを ((プロジェクト名, 振り分け先), イベント) に変換
+
+        移動元と移動先で振り分け先が異なる移動（プロジェクトをまたぐ移動、一時ファイルから
+        rag_build_progress.json への置き換え等）は移動元の削除・移動先の作成に分ける。
+        """
+        src_key = self._route_key(event.path)
+        if event.event_type != 'moved':
+            return [(src_key, event)] if src_key else []
+
+        dest_key = self._route_key(event.dest_path)
+        if src_key == dest_key:
+            return [(src_key, event)] if src_key else []
+        split = []
+        if src_key:
+            split.append((src_key, FileEvent('deleted', event.path, is_directory=event.is_directory)))
+        if dest_key:
+            split.append((dest_key, FileEvent('created', event.dest_path, is_directory=event.is_directory)))
+        return split
+
     async def stop(self) -> None:
         """監視を停止"""
         if self._watcher:
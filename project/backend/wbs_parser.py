@@ -1,20 +1,24 @@
 """
 WBSパーサー（両形式対応）
-パフォーマンス最適化: キャッシュ付きパース、遅延評価
+パフォーマンス最適化: (パス, mtime, サイズ) キーのパースキャッシュ、1回の読み込みで形式検出とパース
 """
 
 import json
 import re
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Optional, Dict, Any, Protocol
+from typing import List, Optional, Dict, Any, Protocol, Tuple
 from dataclasses import dataclass
-from functools import lru_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
+# キャッシュするWBSファイル数（プロジェクト数程度）
+MAX_WBS_CACHE_SIZE = 256
 
-@dataclass
+
+@dataclass(slots=True)
 class ParsedTopic:
     """パース済みトピック"""
     topic_id: str
@@ -64,8 +68,10 @@ class ObjectFormatParser:
 class ArrayFormatParser:
     """配列型WBSパーサー（生成AI入門講座形式）"""
 
-    def __init__(self, content_path: Optional[Path] = None):
+    def __init__(self, content_path: Optional[Path] = None, html_stems: Optional[List[str]] = None):
         self.content_path = content_path
+        # スキャナーが走査済みの content/ 直下 HTML ファイル名（拡張子なし）
+        self.html_stems = html_stems
 
     def parse(self, data: dict) -> List[ParsedTopic]:
         """配列型WBSをパース（ファイルシステムから推論）"""
@@ -94,6 +100,9 @@ class ArrayFormatParser:
 
     def _scan_content_files(self) -> List[str]:
         """content/フォルダのHTMLファイルを基準にトピックを特定（index.html除外）"""
+        if self.html_stems is not None:
+            return sorted({base for base in self.html_stems if base != 'index'})
+
         if not self.content_path or not self.content_path.exists():
             return []
 
@@ -178,17 +187,116 @@ def detect_wbs_format(wbs_data: dict) -> str:
     return 'unknown'
 
 
-@lru_cache(maxsize=100)
-def _load_wbs_cached(wbs_path: str) -> Dict[str, Any]:
-    """WBSファイルをキャッシュ付きで読み込み"""
-    with open(wbs_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+@dataclass(frozen=True)
+class WBSDocument:
+    """読み込み済みWBS
+
+    オブジェクト型のトピックは WBS.json だけで決まるため読み込み時にパースして保持する。
+    配列型のトピックは content/ のファイルから決まるため、パースは parse 時に行う。
+    """
+    format: str
+    data: Dict[str, Any]
+    topics: Tuple[ParsedTopic, ...] = ()
+
+    def parse(
+        self,
+        content_path: Optional[Path] = None,
+        html_stems: Optional[List[str]] = None
+    ) -> List[ParsedTopic]:
+        """トピック一覧（呼び出し元が変更してもキャッシュに影響しない新しいリスト）"""
+        if self.format == 'object':
+            return list(self.topics)
+        if self.format == 'array':
+            return ArrayFormatParser(content_path, html_stems).parse(self.data)
+        return []
 
 
-def parse_wbs(wbs_path: Path, content_path: Optional[Path] = None) -> List[ParsedTopic]:
-    """WBSファイルをパース（自動形式検出）"""
+class WBSCache:
+    """WBS.json のパースキャッシュ（LRU、スレッドセーフ）
+
+    (パス, mtime_ns, サイズ) が一致する場合のみ再利用するため、編集は次の読み込みで
+    即座に反映される。ファイルは変更1回につき1回だけ読み込み・パースする。
+    """
+
+    def __init__(self, max_size: int = MAX_WBS_CACHE_SIZE):
+        self._cache: OrderedDict[str, Tuple[Tuple[int, int], WBSDocument]] = OrderedDict()
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def load(self, wbs_path: Path) -> WBSDocument:
+        """WBSを読み込み（ブロッキング）
+
+        Raises:
+            FileNotFoundError, json.JSONDecodeError: 読み込み・パースに失敗した場合（キャッシュしない）
+        """
+        key = str(wbs_path)
+        st = wbs_path.stat()
+        sig = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == sig:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return cached[1]
+            self._misses += 1
+
+        with open(wbs_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        format_type = detect_wbs_format(data)
+        topics = tuple(ObjectFormatParser().parse(data)) if format_type == 'object' else ()
+        document = WBSDocument(format=format_type, data=data, topics=topics)
+        logger.info(f"Detected WBS format: {format_type} for {wbs_path}")
+
+        with self._lock:
+            self._cache[key] = (sig, document)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._max_size:
+                self._cache.popitem(last=False)
+        return document
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'size': len(self._cache),
+                'hits': self._hits,
+                'misses': self._misses,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._hits = 0
+            self._misses = 0
+
+
+_wbs_cache = WBSCache()
+
+
+def load_wbs(wbs_path: Path) -> WBSDocument:
+    """WBSをキャッシュ経由で読み込み（例外は呼び出し元へ）"""
+    return _wbs_cache.load(wbs_path)
+
+
+def wbs_cache_stats() -> Dict[str, int]:
+    """WBSキャッシュの統計"""
+    return _wbs_cache.stats()
+
+
+def parse_wbs(
+    wbs_path: Path,
+    content_path: Optional[Path] = None,
+    html_stems: Optional[List[str]] = None
+) -> List[ParsedTopic]:
+    """WBSファイルをパース（自動形式検出）
+
+    Args:
+        html_stems: 走査済みの content/ 直下 HTML ファイル名。指定時は配列型パーサーが
+                    content/ を再度 glob しない。
+    """
     try:
-        data = _load_wbs_cached(str(wbs_path))
+        document = load_wbs(wbs_path)
     except json.JSONDecodeError as e:
         logger.error(f"WBS JSON parse error: {wbs_path} - {e}")
         return []
@@ -196,21 +304,12 @@ def parse_wbs(wbs_path: Path, content_path: Optional[Path] = None) -> List[Parse
         logger.error(f"WBS file not found: {wbs_path}")
         return []
 
-    format_type = detect_wbs_format(data)
-    logger.info(f"Detected WBS format: {format_type} for {wbs_path}")
-
-    if format_type == 'object':
-        parser = ObjectFormatParser()
-        return parser.parse(data)
-    elif format_type == 'array':
-        parser = ArrayFormatParser(content_path)
-        return parser.parse(data)
-    else:
+    if document.format not in ('object', 'array'):
         logger.warning(f"Unknown WBS format: {wbs_path}")
-        return []
+    return document.parse(content_path, html_stems)
 
 
 def clear_wbs_cache() -> None:
     """WBSキャッシュをクリア"""
-    _load_wbs_cached.cache_clear()
+    _wbs_cache.clear()
     logger.info("WBS cache cleared")
@@ -5,7 +5,7 @@ WebSocket接続管理
 
 import asyncio
 import json
-from typing import Set, Dict, Any, Optional
+from typing import Set, Dict, Any, List, Optional
 from datetime import datetime
 from fastapi import WebSocket, WebSocketDisconnect
 import logging
@@ -122,6 +122,16 @@ class ConnectionManager:
         """プロジェクト更新をブロードキャスト"""
         return await self.broadcast("project_updated", {"project": project_data})
 
+    async def broadcast_projects_removed(self, projects: List[Dict[str, Any]]) -> int:
+        """削除されたプロジェクトをまとめてブロードキャスト"""
+        return await self.broadcast(
+            "projects_removed",
+            {
+                "project_ids": [p['id'] for p in projects],
+                "names": [p['name'] for p in projects]
+            }
+        )
+
     async def broadcast_topic_change(
         self,
         project_id: int,
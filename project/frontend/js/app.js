@@ -26,6 +26,7 @@ const app = createApp({
         const currentView = ref('dashboard');
         const isLoading = ref(true);
         const isScanning = ref(false);
+        const scanProgress = ref({ progress: 0, current: '' });
         const wsConnected = ref(false);
         const lastUpdated = ref(null);
         const sortBy = ref('name');
@@ -735,11 +736,11 @@ const app = createApp({
             if (isScanning.value) return;
 
             isScanning.value = true;
-            showToast('スキャンを開始しました', 'info');
 
             try {
-                await API.triggerScan();
-                // スキャン完了はWebSocketで通知される
+                const response = await API.triggerScan();
+                // 実行中のスキャンがある場合は待機・統合される（完了はWebSocketで通知される）
+                showToast(response.message || 'スキャンを開始しました', 'info');
             } catch (error) {
                 console.error('Failed to trigger scan:', error);
                 showToast('スキャンの開始に失敗しました', 'error');
@@ -931,6 +932,21 @@ const app = createApp({
                 lastUpdated.value = new Date().toISOString();
             });
 
+            // フォルダが無くなったプロジェクトの削除（スキャン開始時にまとめて1回）
+            wsService.on('projects_removed', (data) => {
+                const removedIds = new Set(data.project_ids || []);
+                projects.value = projects.value.filter(p => !removedIds.has(p.id));
+
+                if (selectedProject.value && removedIds.has(selectedProject.value.id)) {
+                    selectedProject.value = null;
+                    topics.value = [];
+                    currentView.value = 'dashboard';
+                }
+
+                updateStats();
+                lastUpdated.value = new Date().toISOString();
+            });
+
             // トピック変更
             wsService.on('topic_changed', (data) => {
                 const { project_id, topic } = data;
@@ -946,12 +962,23 @@ const app = createApp({
             // スキャン開始
             wsService.on('scan_started', (data) => {
                 isScanning.value = true;
+                scanProgress.value = { progress: 0, current: '' };
                 showToast('スキャン実行中...', 'info');
             });
 
+            // スキャン進捗（サーバー側で間引き済み）
+            wsService.on('scan_progress', (data) => {
+                isScanning.value = true;
+                scanProgress.value = {
+                    progress: data.progress || 0,
+                    current: data.current || ''
+                };
+            });
+
             // スキャン完了
             wsService.on('scan_completed', (data) => {
                 isScanning.value = false;
+                scanProgress.value = { progress: 0, current: '' };
                 fetchProjects(); // 最新データを取得
                 showToast(
                     `スキャン完了: ${data.result?.projects_scanned || 0}プロジェクト`,
@@ -1041,6 +1068,7 @@ const app = createApp({
             currentView,
             isLoading,
             isScanning,
+            scanProgress,
             wsConnected,
             lastUpdated,
             sortBy,
@@ -0,0 +1,88 @@
+"""
+Database のテスト
+"""
+
+import asyncio
+import os
+
+from backend.database import Database
+
+
+def test_file_hashes_prune_and_project_delete(tmp_path):
+    """ハッシュキャッシュは書き込み順に刈り込まれ、削除したプロジェクトの行は残らない"""
+
+    async def scenario():
+        db = Database(tmp_path / 'test.db')
+        await db.connect()
+        await db.init_tables()
+        try:
+            project_path = os.path.join(str(tmp_path), 'course')
+            sibling_path = os.path.join(str(tmp_path), 'course2')
+            project_id = await db.upsert_project(name='course', path=project_path)
+            await db.upsert_project(name='course2', path=sibling_path)
+
+            # 同一秒内の書き込みでも新しい keep 件が残る
+            entries = [(os.path.join(project_path, 'content', f'{i}-1_t.html'), f'h{i}', None) for i in range(5)]
+            await db.save_file_hashes(entries, keep=3)
+            await db.save_file_hashes([entries[0]], keep=3)
+            assert [path for path, _, _ in await db.load_file_hashes(10)] == [
+                entries[3][0], entries[4][0], entries[0][0]
+            ]
+
+            sibling_entry = (os.path.join(sibling_path, 'content', '1-1_t.html'), 'h', None)
+            await db.save_file_hashes([sibling_entry], keep=10)
+            await db.delete_projects([project_id])
+            assert await db.load_file_hashes(10) == [sibling_entry]
+        finally:
+            await db.disconnect()
+
+    asyncio.run(scenario())
+
+
+def test_project_writes_skip_unchanged_values(tmp_path):
+    """path・wbs_format・has_rag_chunks が変わらない書き込みは updated_at を更新しない"""
+
+    async def scenario():
+        db = Database(tmp_path / 'test.db')
+        await db.connect()
+        await db.init_tables()
+        try:
+            project_id = await db.upsert_project(name='course', path='/courses/course', wbs_format='v1')
+            await db.update_project_has_rag_chunks(project_id, True)
+            await db._connection.execute(
+                "UPDATE projects SET updated_at = '2000-01-01 00:00:00' WHERE id = ?", (project_id,)
+            )
+
+            assert await db.upsert_project(name='course', path='/courses/course') == project_id
+            assert await db.upsert_project(name='course', path='/courses/course', wbs_format='v1') == project_id
+            await db.update_project_has_rag_chunks(project_id, True)
+            project = await db.get_project_by_name('course')
+            assert project['updated_at'] == '2000-01-01 00:00:00'
+            assert project['wbs_format'] == 'v1'
+
+            assert await db.upsert_project(name='course', path='/moved/course') == project_id
+            project = await db.get_project_by_name('course')
+            assert project['path'] == '/moved/course'
+            assert project['updated_at'] != '2000-01-01 00:00:00'
+        finally:
+            await db.disconnect()
+
+    asyncio.run(scenario())
+
+
+def test_audio_metadata_prune_keeps_latest_writes(tmp_path):
+    """MP3メタデータは同一秒内の書き込みでも書き込み順に刈り込まれる"""
+
+    async def scenario():
+        db = Database(tmp_path / 'test.db')
+        await db.connect()
+        await db.init_tables()
+        try:
+            entries = [(f'hash{i}', 1000 * i, 128, 44100, 2) for i in range(5)]
+            await db.save_audio_metadata(entries, keep=3)
+            await db.save_audio_metadata([entries[0]], keep=3)
+            assert [row[0] for row in await db.load_audio_metadata(10)] == ['hash3', 'hash4', 'hash0']
+        finally:
+            await db.disconnect()
+
+    asyncio.run(scenario())
@@ -0,0 +1,81 @@
+"""
+rag_build_progress.json ファストパスのテスト
+"""
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from backend.database import Database
+from backend.rag_progress import handle_rag_build_progress
+
+
+class _RecordingConnectionManager:
+    """broadcast の呼び出しを記録する"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def broadcast(self, event_type, data):
+        self.messages.append((event_type, data))
+        return 0
+
+
+def test_rag_progress_updates_index_and_broadcasts(tmp_path):
+    """進捗ファイルの内容が rag_indexes に1文で反映され、軽量イベントが通知される"""
+
+    async def scenario():
+        db = Database(tmp_path / 'test.db')
+        await db.connect()
+        await db.init_tables()
+        ws = _RecordingConnectionManager()
+        try:
+            project_path = tmp_path / 'course'
+            project_id = await db.upsert_project(name='course', path=str(project_path))
+            await db.record_rag_chunks(project_id, 12)
+
+            progress_path = project_path / 'rag_build_progress.json'
+            project_path.mkdir()
+            progress_path.write_text(json.dumps({
+                'status': 'embedding',
+                'phase': 'embedding',
+                'message': 'Embedding chunks',
+                'progress_percent': 40,
+                'details': {},
+            }), encoding='utf-8')
+            await handle_rag_build_progress(db, ws, 'course', str(progress_path))
+
+            row = await db.get_rag_index(project_id)
+            assert row['status'] == 'indexing'
+            assert row['build_phase'] == 'embedding'
+            assert row['build_message'] == 'Embedding chunks'
+            assert row['build_percent'] == 40
+            assert row['chunk_count'] == 12
+
+            event_type, data = ws.messages[-1]
+            assert event_type == 'rag_external_progress'
+            assert data['project_id'] == project_id
+            assert data['mapped_status'] == 'indexing'
+            assert data['progress_percent'] == 40
+
+            progress_path.write_text(json.dumps({
+                'status': 'completed',
+                'phase': 'done',
+                'message': 'Index built',
+                'progress_percent': 100,
+                'details': {'chunk_count': 15},
+            }), encoding='utf-8')
+            await handle_rag_build_progress(db, ws, 'course', str(progress_path))
+
+            row = await db.get_rag_index(project_id)
+            assert row['status'] == 'indexed'
+            assert row['chunk_count'] == 15
+            assert row['index_built_at'] is not None
+            assert len(ws.messages) == 2
+        finally:
+            await db.disconnect()
+
+    asyncio.run(scenario())
@@ -0,0 +1,112 @@
+"""
+ScanCoordinator のテスト
+"""
+
+import asyncio
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from backend.database import Database
+from backend.file_events import FileEvent
+from backend.scan_coordinator import ScanCoordinator
+from backend.scanner import AsyncScanner
+
+
+def _make_project(base_path: Path) -> Path:
+    """トピック1件のプロジェクトを作成（ディレクトリ mtime は枝刈り対象になるよう過去にずらす）"""
+    project_path = base_path / 'course'
+    content_path = project_path / 'content'
+    content_path.mkdir(parents=True)
+    (content_path / '1-1_intro.html').write_text('<p>v1</p>', encoding='utf-8')
+
+    past = time.time() - 60
+    for path in (content_path / '1-1_intro.html', content_path, project_path):
+        os.utime(path, (past, past))
+    return project_path
+
+
+async def _topic_hash(db: Database) -> str:
+    project = await db.get_project_by_name('course')
+    topic = await db.get_topic(project['id'], '1-1_intro')
+    return topic['html_hash']
+
+
+def test_watch_events_behind_pending_full_scan_update_topic(tmp_path):
+    """待機中のフルスキャンがあってもウォッチャーの上書き保存は反映される"""
+
+    async def scenario():
+        base_path = tmp_path / 'courses'
+        project_path = _make_project(base_path)
+        db = Database(tmp_path / 'test.db')
+        await db.connect()
+        await db.init_tables()
+        scanner = AsyncScanner(db, base_path, max_workers=2)
+        coordinator = ScanCoordinator(scanner, db)
+        try:
+            await coordinator.request_full_scan().wait()
+            before = await _topic_hash(db)
+
+            running = coordinator.request_full_scan()
+            pending = coordinator.request_full_scan()
+            assert pending.queued
+
+            # 上書き保存（エントリは変わらないのでディレクトリ mtime も変わらない）
+            html_path = project_path / 'content' / '1-1_intro.html'
+            html_path.write_text('<p>v2</p>', encoding='utf-8')
+            ticket = coordinator.request_file_events(project_path, [FileEvent('modified', str(html_path))])
+            assert ticket.scan_id != pending.scan_id
+            assert not ticket.coalesced
+
+            await asyncio.gather(running.wait(), pending.wait(), ticket.wait())
+            assert await _topic_hash(db) != before
+        finally:
+            await coordinator.shutdown()
+            scanner.close()
+            await db.disconnect()
+
+    asyncio.run(scenario())
+
+
+def test_project_file_updates_go_through_coordinator(tmp_path):
+    """WBS.json・rag_chunks.json の反映は種別ごとのキーで直列化され、プロジェクトスキャンに合流しない"""
+
+    async def scenario():
+        base_path = tmp_path / 'courses'
+        project_path = _make_project(base_path)
+        db = Database(tmp_path / 'test.db')
+        await db.connect()
+        await db.init_tables()
+        scanner = AsyncScanner(db, base_path, max_workers=2)
+        coordinator = ScanCoordinator(scanner, db)
+        try:
+            await coordinator.request_full_scan().wait()
+
+            running = coordinator.request_project_scan(project_path)
+            pending = coordinator.request_project_scan(project_path)
+            (project_path / 'rag_chunks.json').write_text('{"chunk_count": 7, "chunks": []}', encoding='utf-8')
+            rag_ticket = coordinator.request_rag_chunks_refresh(project_path)
+            wbs_ticket = coordinator.request_wbs_change(project_path)
+            assert rag_ticket.scan_id != pending.scan_id
+            assert wbs_ticket.scan_id not in (pending.scan_id, rag_ticket.scan_id)
+            # 実行中の反映要求への後続要求は待機中の1件に合流する
+            assert coordinator.request_rag_chunks_refresh(project_path).coalesced is False
+            assert coordinator.request_rag_chunks_refresh(project_path).coalesced is True
+
+            results = await rag_ticket.wait()
+            await asyncio.gather(running.wait(), pending.wait(), wbs_ticket.wait())
+            assert [r.project_name for r in results] == ['course']
+
+            project = await db.get_project_by_name('course')
+            assert project['has_rag_chunks']
+            assert (await db.get_rag_index(project['id']))['chunk_count'] == 7
+        finally:
+            await coordinator.shutdown()
+            scanner.close()
+            await db.disconnect()
+
+    asyncio.run(scenario())
@@ -0,0 +1,78 @@
+"""
+ScanScheduler のテスト
+"""
+
+import asyncio
+
+from backend.scan_scheduler import ScanScheduler
+
+
+class _Tracker:
+    """プロジェクト別・全体の同時実行数を記録"""
+
+    def __init__(self):
+        self.running = {}
+        self.peak = {}
+        self.total = 0
+        self.total_peak = 0
+
+    async def run(self, project: str, item: int) -> int:
+        self.running[project] = self.running.get(project, 0) + 1
+        self.peak[project] = max(self.peak.get(project, 0), self.running[project])
+        self.total += 1
+        self.total_peak = max(self.total_peak, self.total)
+        try:
+            await asyncio.sleep(0.005)
+        finally:
+            self.running[project] -= 1
+            self.total -= 1
+        return item
+
+
+async def _consume(scheduler: ScanScheduler, tracker: _Tracker, project: str, count: int) -> list:
+    return [
+        i async for i, _ in scheduler.iter_topics(
+            list(range(count)), lambda item: tracker.run(project, item)
+        )
+    ]
+
+
+def test_later_project_gets_fair_share():
+    """先に始まった大きなプロジェクトが予算を占有し続けない"""
+
+    async def scenario():
+        scheduler = ScanScheduler(max_budget=8, io_budget=8, cpu_count=1)
+        tracker = _Tracker()
+        large = asyncio.create_task(_consume(scheduler, tracker, 'large', 200))
+        await asyncio.sleep(0.02)
+        assert tracker.running['large'] == 8
+
+        small = asyncio.create_task(_consume(scheduler, tracker, 'small', 40))
+        await asyncio.sleep(0.02)
+        assert tracker.running['small'] == 4
+        assert tracker.running['large'] == 4
+
+        assert len(await small) == 40
+        assert len(await large) == 200
+        assert tracker.total_peak == 8
+
+    asyncio.run(scenario())
+
+
+def test_tune_during_scan_keeps_budget():
+    """スキャン中に予算を縮めても実行中の枠を含めて上限を超えない"""
+
+    async def scenario():
+        scheduler = ScanScheduler(max_budget=8, io_budget=8, cpu_count=1)
+        tracker = _Tracker()
+        task = asyncio.create_task(_consume(scheduler, tracker, 'project', 100))
+        await asyncio.sleep(0.02)
+
+        scheduler._fixed_budget = 2
+        scheduler.tune()
+        await asyncio.sleep(0.02)
+        tracker.total_peak = tracker.total
+        assert len(await task) == 100
+        assert tracker.total_peak <= 2
+
+    asyncio.run(scenario())
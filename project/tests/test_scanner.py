@@ -0,0 +1,93 @@
+"""
+AsyncScanner のテスト
+"""
+
+import asyncio
+import os
+import time
+from pathlib import Path
+
+from backend.database import Database
+from backend.scanner import AsyncScanner
+
+
+def _write_past(path: Path, text: str) -> None:
+    """ファイルを作成し、親ディレクトリを含めて mtime を過去にずらす（枝刈りの対象にする）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+    past = time.time() - 60
+    for target in (path, *path.parents[:3]):
+        os.utime(target, (past, past))
+
+
+async def _topic_hashes(db: Database) -> dict:
+    project = await db.get_project_by_name('course')
+    return {t['base_name']: t['html_hash'] for t in await db.get_topics_by_project(project['id'])}
+
+
+def test_pruned_scan_detects_in_place_edits(tmp_path):
+    """ディレクトリ mtime が変わらない上書き保存も stat シグネチャで検出する"""
+
+    async def scenario():
+        base_path = tmp_path / 'courses'
+        content_path = base_path / 'course' / 'content'
+        _write_past(content_path / 'ch1' / '1-1_intro.html', '<p>v1</p>')
+        _write_past(content_path / 'ch2' / '2-1_next.html', '<p>v1</p>')
+
+        db = Database(tmp_path / 'test.db')
+        await db.connect()
+        await db.init_tables()
+        scanner = AsyncScanner(db, base_path, max_workers=2, dir_pruning=True)
+        try:
+            await scanner.scan_all_projects()
+            before = await _topic_hashes(db)
+
+            # プロジェクト全体が未変更扱いになる場合
+            (content_path / 'ch1' / '1-1_intro.html').write_text('<p>v2</p>', encoding='utf-8')
+            results = await scanner.scan_all_projects()
+            assert not results[0].skipped
+            after = await _topic_hashes(db)
+            assert after['1-1_intro'] != before['1-1_intro']
+            assert after['2-1_next'] == before['2-1_next']
+
+            # 別のサブフォルダだけディレクトリ mtime が変わった場合
+            (content_path / 'ch2' / '2-2_extra.html').write_text('<p>new</p>', encoding='utf-8')
+            (content_path / 'ch1' / '1-1_intro.html').write_text('<p>v3</p>', encoding='utf-8')
+            await scanner.scan_project(base_path / 'course')
+            latest = await _topic_hashes(db)
+            assert latest['1-1_intro'] != after['1-1_intro']
+            assert '2-2_extra' in latest
+
+            # 変更がなければプロジェクトごと省略される（直近の mtime は信用されないため過去にずらす）
+            for path in content_path.rglob('*.html'):
+                _write_past(path, path.read_text(encoding='utf-8'))
+            await scanner.scan_all_projects()
+            results = await scanner.scan_all_projects()
+            assert results[0].skipped
+        finally:
+            scanner.close()
+            await db.disconnect()
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_full_scans_wait_instead_of_returning_empty(tmp_path):
+    """実行中に呼ばれた全プロジェクトスキャンは空の結果を返さず、完了を待って実行される"""
+
+    async def scenario():
+        base_path = tmp_path / 'courses'
+        _write_past(base_path / 'course' / 'content' / '1-1_intro.html', '<p>v1</p>')
+
+        db = Database(tmp_path / 'test.db')
+        await db.connect()
+        await db.init_tables()
+        scanner = AsyncScanner(db, base_path, max_workers=2)
+        try:
+            first, second = await asyncio.gather(scanner.scan_all_projects(), scanner.scan_all_projects())
+            assert [r.project_name for r in first] == ['course']
+            assert [r.project_name for r in second] == ['course']
+        finally:
+            scanner.close()
+            await db.disconnect()
+
+    asyncio.run(scenario())